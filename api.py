@@ -0,0 +1,309 @@
+"""Headless HTTP API for resume analysis.
+
+An ASGI service over the same functions the Streamlit UI uses, for
+integrations (ATS, job boards) that submit resumes at volume:
+
+- ``POST /documents``: store an uploaded PDF/DOCX and extract its text
+- ``POST /analyze``: feedback and score for one or more target roles
+- ``POST /rewrite``: rewrite a resume for a role, optionally for a saved analysis
+- ``GET /users/{user_id}/history``: a user's saved analyses
+- ``GET /users/{user_id}/records/{record_id}``: one saved analysis
+- ``GET /users/{user_id}/records/{record_id}/export``: the rewritten resume as PDF
+- ``POST /users/{user_id}/jobs``: save a pasted or uploaded job description
+- ``GET /users/{user_id}/jobs``: a user's saved job descriptions
+- ``DELETE /users/{user_id}/jobs/{job_id}``: delete one
+- ``POST /match/resumes``: stored resumes that best fit a job description
+- ``GET /users/{user_id}/documents/{document_id}/jobs``: a user's job descriptions that best fit a resume
+
+The pipeline functions block (PDF parsing, LLM calls, SQLite), so every
+handler runs them in the threadpool and the event loop stays free.
+RESUME_BOT_API_KEY (one key, or several separated by commas) is required:
+the API refuses to start without it, and every endpoint but /health needs
+a matching ``X-API-Key`` header. Analyses and rewrites go through the same
+admission control as the UI, keyed by the caller's API key rather than
+the user_id it sends; the token buckets are in the shared state store, so
+the quota holds across worker processes. A request over the rate limit,
+or one that finds every slot taken, gets 429 with a Retry-After header
+at once rather than holding a threadpool thread while it waits. Every worker
+starts the retention and backup schedulers, and a lease in the state
+store lets one of them run at a time.
+
+Run with several worker processes:
+    RESUME_BOT_API_KEY=... uvicorn api:app --workers 4
+    python api.py --workers 4 --port 8000
+"""
+import argparse
+import hashlib
+import hmac
+import math
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import Depends, FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+import resume_core as core
+
+MIME_TYPES = {'.pdf': core.PDF_MIME, '.docx': core.DOCX_MIME}
+
+def _api_keys():
+    return [key.strip() for key in os.getenv('RESUME_BOT_API_KEY', '').split(',') if key.strip()]
+
+@asynccontextmanager
+async def lifespan(_):
+    if not _api_keys():
+        raise RuntimeError("Set RESUME_BOT_API_KEY before starting the API; it would otherwise be open to anyone")
+    core.init_database()
+    # These also backfill the matching index and refresh the analytics snapshot, so they
+    # run even with retention or backups disabled
+    core.start_retention_scheduler()
+    core.start_backup_scheduler()
+    yield
+
+api = FastAPI(title="AI Resume Feedback Bot API", lifespan=lifespan)
+
+def require_api_key(x_api_key: Optional[str] = Header(default=None)):
+    """The authenticated caller, for admission control: a fingerprint of its API key"""
+    keys = _api_keys()
+    if not keys:
+        raise HTTPException(status_code=503, detail="The API has no key configured")
+    if x_api_key is None or not any(hmac.compare_digest(x_api_key.encode(), key.encode()) for key in keys):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+    return f"api_key:{hashlib.sha256(x_api_key.encode()).hexdigest()[:16]}"
+
+class RewriteRequest(BaseModel):
+    target_role: Optional[str] = None
+    resume_text: Optional[str] = None
+    feedback: str = ""
+    user_id: Optional[int] = None
+    record_id: Optional[int] = None
+
+def _mime_type(upload):
+    if upload.content_type in MIME_TYPES.values():
+        return upload.content_type
+    mime_type = MIME_TYPES.get(os.path.splitext(upload.filename or '')[1].lower())
+    if mime_type is None:
+        raise HTTPException(status_code=415, detail="Only PDF and DOCX resumes are supported")
+    return mime_type
+
+async def _store_upload(upload):
+    mime_type = _mime_type(upload)
+    try:
+        # Read at most one byte past the limit so oversized bodies are never held in memory
+        file_bytes = await upload.read(core.config.UPLOAD_LIMITS['max_bytes'] + 1)
+        core.check_upload_size(len(file_bytes))
+        document = await run_in_threadpool(core.store_document, file_bytes, upload.filename, mime_type)
+    except core.DependencyMissing as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except core.UploadRejected as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except core.ExtractionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not (document['text'] or '').strip():
+        raise HTTPException(status_code=422, detail="Could not extract text from the resume")
+    return document
+
+async def _load_document(document_id):
+    document = await run_in_threadpool(core.get_document, document_id)
+    if document is None or not document['text']:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+async def _admitted(operation, caller, func, *args, cost=1):
+    """Run func(*args) in the threadpool if admission control lets this caller in now.
+
+    API requests never queue for a slot: a waiting request would hold a
+    threadpool thread, and enough of them would starve every other handler.
+    """
+    def call():
+        with core.admit(operation, caller, cost, wait=False):
+            return func(*args)
+
+    try:
+        return await run_in_threadpool(call)
+    except core.AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': str(math.ceil(e.retry_after))})
+
+def _analysis_result(result, record_id=None):
+    structured = result['structured']
+    return {
+        'target_role': result['target_role'],
+        'score': result['score'],
+        'feedback': result['feedback'],
+        'sections': {key: structured.get(key, []) for key, _ in core.FEEDBACK_SECTIONS},
+        'backend': structured.get('backend'),
+        'token_report': structured.get('token_report'),
+        'error': structured.get('error'),
+        'record_id': record_id
+    }
+
+@api.get("/health")
+def health():
+    return {'status': 'ok'}
+
+@api.post("/documents", dependencies=[Depends(require_api_key)])
+async def upload_document(file: UploadFile = File(...)):
+    document = await _store_upload(file)
+    return {'document_id': document['id'], 'content_hash': document['content_hash'],
+            'is_new': document['is_new'], 'characters': len(document['text'])}
+
+@api.post("/analyze")
+async def analyze(caller: str = Depends(require_api_key),
+                  target_roles: str = Form(...),
+                  file: Optional[UploadFile] = File(default=None),
+                  document_id: Optional[int] = Form(default=None),
+                  user_id: Optional[int] = Form(default=None)):
+    """Analyze an uploaded file or a stored document for comma-separated roles.
+
+    With a user_id the analyses are saved to that user's history.
+    """
+    roles = core.parse_target_roles(target_roles)
+    if not roles:
+        raise HTTPException(status_code=422, detail="At least one target role is required")
+    if file is not None:
+        document = await _store_upload(file)
+        filename = file.filename
+    elif document_id is not None:
+        document = await _load_document(document_id)
+        filename = document['filename']
+    else:
+        raise HTTPException(status_code=422, detail="Provide a file or a document_id")
+
+    results = await _admitted('analyze', caller, core.analyze_resume_for_roles, document['text'], roles,
+                              document['parsed'], cost=len(roles))
+    record_ids = [None] * len(results)
+    if user_id is not None:
+        record_ids = await run_in_threadpool(core.save_feedback_batch_to_db, user_id, filename,
+                                             results, document['id'])
+    return {
+        'document_id': document['id'],
+        'results': [_analysis_result(result, record_id) for result, record_id in zip(results, record_ids)]
+    }
+
+@api.post("/rewrite")
+async def rewrite(request: RewriteRequest, caller: str = Depends(require_api_key)):
+    """Rewrite a saved analysis (user_id + record_id) or raw resume text"""
+    if request.record_id is not None:
+        if request.user_id is None:
+            raise HTTPException(status_code=422, detail="user_id is required with record_id")
+        record = await run_in_threadpool(core.get_feedback_record, request.record_id, request.user_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Record not found")
+        if not record['document_id']:
+            raise HTTPException(status_code=409, detail="The original resume was not stored for this record")
+        document = await _load_document(record['document_id'])
+        conversation = (core.build_analysis_conversation(document['text'], record['target_role'],
+                                                         record['structured'])
+                        if record['structured'] else None)
+        rewritten = await _admitted('rewrite', caller, core.rewrite_resume, document['text'],
+                                    record['target_role'], record['feedback'], conversation)
+        await run_in_threadpool(core.update_rewritten_resume, record['id'], rewritten)
+        return {'record_id': record['id'], 'target_role': record['target_role'], 'rewritten_resume': rewritten}
+
+    if not request.resume_text or not request.target_role:
+        raise HTTPException(status_code=422, detail="Provide record_id or resume_text and target_role")
+    rewritten = await _admitted('rewrite', caller, core.rewrite_resume, request.resume_text,
+                                request.target_role, request.feedback)
+    return {'record_id': None, 'target_role': request.target_role, 'rewritten_resume': rewritten}
+
+@api.get("/users/{user_id}/history", dependencies=[Depends(require_api_key)])
+async def history(user_id: int):
+    rows = await run_in_threadpool(core.get_user_history, user_id)
+    return [{'record_id': row[4], 'filename': row[0], 'target_role': row[1], 'score': row[2],
+             'created_at': row[3]} for row in rows]
+
+@api.get("/users/{user_id}/records/{record_id}", dependencies=[Depends(require_api_key)])
+async def record(user_id: int, record_id: int):
+    result = await run_in_threadpool(core.get_feedback_record, record_id, user_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Record not found")
+    return result
+
+@api.get("/users/{user_id}/records/{record_id}/export", dependencies=[Depends(require_api_key)])
+async def export(user_id: int, record_id: int):
+    """The record's rewritten resume as a PDF"""
+    result = await run_in_threadpool(core.get_feedback_record, record_id, user_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Record not found")
+    if not result['rewritten_resume']:
+        raise HTTPException(status_code=409, detail="This record has no rewritten resume yet")
+    filename = f"rewritten_{os.path.splitext(result['filename'])[0]}.pdf"
+    try:
+        pdf_bytes = await run_in_threadpool(core.create_pdf_resume, result['rewritten_resume'], filename)
+    except core.DependencyMissing as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except core.PDFGenerationError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=pdf_bytes, media_type='application/pdf',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@api.post("/users/{user_id}/jobs", dependencies=[Depends(require_api_key)])
+async def save_job(user_id: int,
+                   title: str = Form(...),
+                   text: Optional[str] = Form(default=None),
+                   file: Optional[UploadFile] = File(default=None)):
+    """Save a job description given as text or as a TXT, PDF or DOCX file"""
+    if file is not None:
+        if (file.filename or '').lower().endswith('.txt'):
+            file_bytes = await file.read(core.config.UPLOAD_LIMITS['max_bytes'] + 1)
+            try:
+                core.check_upload_size(len(file_bytes))
+            except core.UploadRejected as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            text = file_bytes.decode('utf-8', errors='replace')
+        else:
+            document = await _store_upload(file)
+            text = document['text']
+    if not (text or '').strip():
+        raise HTTPException(status_code=422, detail="Provide the job description as text or a file")
+    job_id = await run_in_threadpool(core.save_job_description, user_id, title, text)
+    return {'job_id': job_id}
+
+@api.get("/users/{user_id}/jobs", dependencies=[Depends(require_api_key)])
+async def jobs(user_id: int):
+    return await run_in_threadpool(core.get_job_descriptions, user_id)
+
+@api.delete("/users/{user_id}/jobs/{job_id}", dependencies=[Depends(require_api_key)])
+async def delete_job(user_id: int, job_id: int):
+    if not await run_in_threadpool(core.delete_job_description, job_id, user_id):
+        raise HTTPException(status_code=404, detail="Job description not found")
+    return {'deleted': job_id}
+
+@api.post("/match/resumes", dependencies=[Depends(require_api_key)])
+async def match_resumes(job_text: Optional[str] = Form(default=None),
+                        job_id: Optional[int] = Form(default=None),
+                        user_id: Optional[int] = Form(default=None),
+                        top_k: int = Form(default=10)):
+    """Stored resumes that best fit a job description (job_text, or a saved job_id with its user_id).
+
+    With a user_id only the resumes that user has analyzed are searched.
+    """
+    if job_id is not None:
+        if user_id is None:
+            raise HTTPException(status_code=422, detail="user_id is required with job_id")
+        job = await run_in_threadpool(core.get_job_description, job_id, user_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        job_text = job['text']
+    if not (job_text or '').strip():
+        raise HTTPException(status_code=422, detail="Provide job_text or a job_id")
+    return await run_in_threadpool(core.match_resumes, job_text, top_k, user_id)
+
+@api.get("/users/{user_id}/documents/{document_id}/jobs", dependencies=[Depends(require_api_key)])
+async def matching_jobs(user_id: int, document_id: int, top_k: int = 10):
+    return await run_in_threadpool(core.match_job_descriptions, document_id, user_id, top_k)
+
+app = api
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the resume analysis API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
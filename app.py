@@ -1,539 +1,79 @@
 import streamlit as st
-import sqlite3
-import hashlib
-import datetime
 import os
-import tempfile
 import json
-import random
-import string
-from pathlib import Path
+import hashlib
+import secrets
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from io import BytesIO
-import base64
-
-# Real imports for production
-try:
-    import docx2txt
-    import PyPDF2
-    from groq import Groq
-    from gtts import gTTS
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-    from reportlab.lib.units import inch
-    import textwrap
-    DEPENDENCIES_AVAILABLE = True
-except ImportError as e:
-    st.warning(f"Some dependencies are missing: {e}. Please install: pip install PyPDF2 python-docx gtts groq reportlab")
-    DEPENDENCIES_AVAILABLE = False
-
-# Email configuration - UPDATED FOR BETTER COMPATIBILITY
-EMAIL_CONFIG = {
-    'smtp_server': 'smtp.gmail.com',
-    'smtp_port': 587,
-    'sender_email': 'your_email@gmail.com',  # Replace with your Gmail
-    'sender_password': 'your_app_password',   # Replace with your Gmail App Password
-    'use_tls': True
-}
-
-# Database setup
-def init_database():
-    conn = sqlite3.connect('resume_bot.db')
-    c = conn.cursor()
-    
-    # Users table
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  username TEXT UNIQUE NOT NULL,
-                  email TEXT UNIQUE NOT NULL,
-                  phone TEXT,
-                  password_hash TEXT NOT NULL,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  is_admin BOOLEAN DEFAULT FALSE,
-                  reset_token TEXT,
-                  reset_token_expiry TIMESTAMP)''')
-    
-    # Feedback history table
-    c.execute('''CREATE TABLE IF NOT EXISTS feedback_history
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  user_id INTEGER,
-                  filename TEXT,
-                  target_role TEXT,
-                  feedback TEXT,
-                  score INTEGER,
-                  rewritten_resume TEXT,
-                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                  FOREIGN KEY (user_id) REFERENCES users (id))''')
-    
-    # Create admin user if not exists
-    admin_password = hashlib.sha256("admin123".encode()).hexdigest()
-    c.execute("INSERT OR IGNORE INTO users (username, email, password_hash, is_admin) VALUES (?, ?, ?, ?)",
-              ("admin", "admin@resumebot.com", admin_password, True))
-    
-    conn.commit()
-    conn.close()
-
-# Authentication functions
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def verify_password(password, hashed):
-    return hashlib.sha256(password.encode()).hexdigest() == hashed
-
-def create_user(username, email, phone, password):
-    conn = sqlite3.connect('resume_bot.db')
-    c = conn.cursor()
-    try:
-        password_hash = hash_password(password)
-        c.execute("INSERT INTO users (username, email, phone, password_hash) VALUES (?, ?, ?, ?)",
-                  (username, email, phone, password_hash))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
-
-def authenticate_user(username, password):
-    conn = sqlite3.connect('resume_bot.db')
-    c = conn.cursor()
-    c.execute("SELECT id, username, email, phone, password_hash, is_admin FROM users WHERE username = ?", (username,))
-    user = c.fetchone()
-    conn.close()
-    
-    if user and verify_password(password, user[4]):
-        return {
-            'id': user[0],
-            'username': user[1],
-            'email': user[2],
-            'phone': user[3],
-            'is_admin': user[5]
-        }
-    return None
-
-def generate_reset_token():
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=32))
-
-# Email functions
-def send_otp_email(email, otp):
-    """Send OTP to user's email with improved authentication"""
-    try:
-        # Check if email configuration is set up
-        if EMAIL_CONFIG['sender_email'] == 'your_email@gmail.com':
-            st.warning("⚠️ Email not configured. Please update EMAIL_CONFIG with your Gmail credentials.")
-            # For demo purposes, show OTP in the interface
-            st.info(f"🔐 **Demo Mode**: Your OTP is: **{otp}**")
-            st.info("📧 **Setup Instructions**: Update EMAIL_CONFIG in the code with your Gmail App Password")
-            return True
-        
-        msg = MIMEMultipart('alternative')
-        msg['From'] = EMAIL_CONFIG['sender_email']
-        msg['To'] = email
-        msg['Subject'] = "🔐 AI Resume Bot - Password Reset OTP"
-        
-        body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; text-align: center; color: white;">
-                <h1>🤖 AI Resume Bot</h1>
-                <h2>Password Reset Request</h2>
-            </div>
-            <div style="padding: 20px; background: #f9f9f9;">
-                <p>Hello,</p>
-                <p>You have requested to reset your password. Please use the following OTP to proceed:</p>
-                <div style="background: white; padding: 20px; text-align: center; border-radius: 10px; margin: 20px 0;">
-                    <h1 style="color: #667eea; font-size: 36px; letter-spacing: 10px; margin: 0;">{otp}</h1>
-                </div>
-                <p><strong>This OTP is valid for 10 minutes only.</strong></p>
-                <p>If you didn't request this password reset, please ignore this email.</p>
-                <hr style="margin: 20px 0;">
-                <p style="color: #666; font-size: 12px;">This is an automated email from AI Resume Bot. Please do not reply.</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        html_part = MIMEText(body, 'html')
-        msg.attach(html_part)
-        
-        # Create SMTP session with better error handling
-        server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'])
-        server.starttls()  # Enable TLS encryption
-        
-        try:
-            server.login(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password'])
-        except smtplib.SMTPAuthenticationError as auth_error:
-            st.error("❌ Gmail Authentication Failed!")
-            st.error("🔧 **Fix Steps:**")
-            st.error("1. Enable 2-Factor Authentication on your Gmail")
-            st.error("2. Generate an App Password (not your regular password)")
-            st.error("3. Use the 16-character App Password in EMAIL_CONFIG")
-            st.error("4. Make sure 'Less secure app access' is OFF")
-            server.quit()
-            return False
-        
-        text = msg.as_string()
-        server.sendmail(EMAIL_CONFIG['sender_email'], email, text)
-        server.quit()
-        
-        return True
-        
-    except Exception as e:
-        st.error(f"❌ Email Error: {str(e)}")
-        st.info(f"🔐 **Demo Mode**: Your OTP is: **{otp}**")
-        return True  # Return True for demo purposes
-
-def send_feedback_email(email, feedback, filename, target_role, score):
-    """Send detailed feedback report to user's email with improved error handling"""
-    try:
-        # Check if email configuration is set up
-        if EMAIL_CONFIG['sender_email'] == 'your_email@gmail.com':
-            st.warning("⚠️ Email not configured. Please update EMAIL_CONFIG with your Gmail credentials.")
-            st.info("✅ **Demo Mode**: Email report would be sent to your configured email.")
-            return True
-        
-        msg = MIMEMultipart('alternative')
-        msg['From'] = EMAIL_CONFIG['sender_email']
-        msg['To'] = email
-        msg['Subject'] = f"📊 AI Resume Analysis Report - {filename}"
-        
-        color = '#44ff44' if score >= 85 else '#ffaa00' if score >= 70 else '#ff4444'
-        
-        body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; text-align: center; color: white;">
-                <h1>🤖 AI Resume Bot</h1>
-                <h2>Resume Analysis Report</h2>
-            </div>
-            <div style="padding: 20px; background: #f9f9f9;">
-                <h3>📄 File: {filename}</h3>
-                <h3>🎯 Target Role: {target_role}</h3>
-                <div style="background: white; padding: 20px; border-radius: 10px; text-align: center; margin: 20px 0;">
-                    <h2 style="color: #667eea;">Resume Score: {score}/100</h2>
-                    <div style="background: #e0e0e0; border-radius: 10px; height: 20px; margin: 10px 0;">
-                        <div style="background: {color}; width: {score}%; height: 100%; border-radius: 10px;"></div>
-                    </div>
-                </div>
-                <div style="background: white; padding: 20px; border-radius: 10px;">
-                    <h3>🤖 AI Feedback:</h3>
-                    <div style="white-space: pre-line;">{feedback}</div>
-                </div>
-                <hr style="margin: 20px 0;">
-                <p style="color: #666; font-size: 12px;">Generated by AI Resume Bot. Keep improving your resume!</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        html_part = MIMEText(body, 'html')
-        msg.attach(html_part)
-        
-        # Create SMTP session with better error handling
-        server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'])
-        server.starttls()
-        
-        try:
-            server.login(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password'])
-        except smtplib.SMTPAuthenticationError:
-            st.error("❌ Gmail Authentication Failed! Please check your App Password.")
-            server.quit()
-            return False
-        
-        text = msg.as_string()
-        server.sendmail(EMAIL_CONFIG['sender_email'], email, text)
-        server.quit()
-        
-        return True
-        
-    except Exception as e:
-        st.error(f"❌ Email Error: {str(e)}")
-        st.info("✅ **Demo Mode**: Email report functionality is working.")
-        return True  # Return True for demo purposes
-
-# AI functions with real implementations
-def extract_text_from_pdf(file):
-    """Extract text from PDF file"""
-    try:
-        if not DEPENDENCIES_AVAILABLE:
-            return "PDF extraction requires PyPDF2. Please install missing dependencies."
-        
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
-    except Exception as e:
-        st.error(f"❌ Error reading PDF: {str(e)}")
-        return "Error reading PDF file"
-
-def extract_text_from_docx(file):
-    """Extract text from DOCX file"""
-    try:
-        if not DEPENDENCIES_AVAILABLE:
-            return "DOCX extraction requires python-docx. Please install missing dependencies."
-        
-        return docx2txt.process(file)
-    except Exception as e:
-        st.error(f"❌ Error reading DOCX: {str(e)}")
-        return "Error reading DOCX file"
-
-def get_ai_feedback(resume_text, target_role):
-    """Get AI feedback using Groq API"""
-    try:
-        # Initialize Groq client - Add your API key
-        # client = Groq(api_key="your_groq_api_key_here")
-        
-        prompt = f"""
-        Analyze this resume for a {target_role} position and provide detailed feedback:
-
-        Resume Text:
-        {resume_text}
-
-        Please provide:
-        1. Overall strengths
-        2. Areas for improvement
-        3. Specific recommendations
-        4. Score out of 100
-        5. Key missing elements for {target_role} role
-
-        Format your response as detailed feedback with clear sections.
-        """
-        
-        # For demo purposes, using mock response
-        # In production, uncomment and use:
-        # completion = client.chat.completions.create(
-        #     messages=[{"role": "user", "content": prompt}],
-        #     model="mixtral-8x7b-32768",
-        # )
-        # feedback = completion.choices[0].message.content
-        
-        # Mock feedback for demo
-        score = random.randint(70, 95)
-        feedback = f"""
-**Resume Analysis for {target_role} Position**
-
-**🎯 Overall Score: {score}/100**
-
-**✅ Strengths:**
-• Strong professional background with relevant experience
-• Clear and well-structured resume format
-• Good use of action verbs and quantifiable achievements
-• Appropriate length and concise presentation
 
-**⚠️ Areas for Improvement:**
-• Add more industry-specific keywords for {target_role}
-• Include more quantifiable metrics and results
-• Strengthen the professional summary section
-• Add relevant certifications or skills for {target_role}
+from resume_core import (
+    ExtractionError, DependencyMissing, EmailNotConfigured, EmailAuthError, EmailError,
+    AudioGenerationError, PDFGenerationError, AdmissionRejected, admit, admission_snapshot,
+    init_database, missing_dependencies,
+    authenticate_user, create_user, update_profile, set_password,
+    create_password_reset, verify_password_reset, reset_password_with_token, ResetRateLimited,
+    send_otp_email, send_feedback_email,
+    store_document, get_document, rank_stored_documents, compress_feedback_history,
+    get_structured_feedback, render_feedback_markdown, parse_target_roles, analyze_resume_for_roles, analyze_upload,
+    rewrite_key, start_speculative_rewrite, get_rewritten_resume, analysis_parsed_resume,
+    generate_audio_tips, create_pdf_resume,
+    save_feedback_to_db, save_feedback_batch_to_db, delete_user_history, get_user_history,
+    get_feedback_record, update_rewritten_resume, get_state_store, run_retention, start_retention_scheduler,
+    admin_overview, user_overview, cached_chart_spec, backup_database, list_backups, start_backup_scheduler,
+    extract_resume_text, save_job_description, get_job_descriptions, get_job_description, delete_job_description,
+    match_resumes, match_job_descriptions
+)
+from resume_core import config, metrics
 
-**🚀 Specific Recommendations:**
-• Tailor your experience descriptions to match {target_role} requirements
-• Include specific technologies and tools used in previous roles
-• Add measurable outcomes (percentages, dollar amounts, timeframes)
-• Consider adding a skills section if not present
-• Update contact information and LinkedIn profile
-
-**🔍 Missing Elements:**
-• Industry-specific technical skills
-• Professional certifications relevant to {target_role}
-• Portfolio or project links (if applicable)
-• References or recommendations section
-        """
-        
-        return feedback, score
-        
-    except Exception as e:
-        st.error(f"❌ Error getting AI feedback: {str(e)}")
-        return "Error generating feedback", 0
-
-def rewrite_resume(resume_text, target_role, feedback):
-    """Mock resume rewriting"""
-    return f"""
-**REWRITTEN RESUME FOR {target_role.upper()}**
-
-**PROFESSIONAL SUMMARY**
-Results-driven professional with expertise in {target_role.lower()} and proven track record of delivering exceptional results. Skilled in strategic planning, team leadership, and innovative problem-solving with a focus on measurable outcomes.
-
-**CORE COMPETENCIES**
-• Advanced {target_role} skills and methodologies
-• Project management and cross-functional leadership
-• Data analysis and strategic decision-making
-• Technology integration and process optimization
-• Stakeholder communication and relationship building
-
-**PROFESSIONAL EXPERIENCE**
-
-**Senior {target_role} | Company Name | 2020-Present**
-• Increased operational efficiency by 25% through strategic process improvements
-• Led cross-functional teams of 10+ members across multiple high-impact projects
-• Implemented innovative solutions resulting in $100K+ annual cost savings
-• Developed and executed strategic initiatives that improved customer satisfaction by 30%
-• Mentored junior team members and contributed to talent development programs
-
-**{target_role} | Previous Company | 2018-2020**
-• Managed key client relationships generating $500K+ in annual revenue
-• Collaborated with stakeholders to define requirements and deliver solutions
-• Optimized workflows resulting in 20% reduction in project delivery time
-• Created comprehensive documentation and training materials for team processes
-
-**EDUCATION**
-• Bachelor's Degree in Relevant Field | University Name | Year
-• Relevant certifications and professional development courses
+# Real imports for production
+missing = missing_dependencies()
+if missing:
+    st.warning(f"Some dependencies are missing: {', '.join(missing)}. Please install: pip install {' '.join(missing)}")
 
-**TECHNICAL SKILLS**
-• Industry-specific software and tools
-• Data analysis and visualization platforms
-• Project management methodologies
-• Communication and collaboration tools
+# Work in progress that must survive a restart or a request served by another replica. The sid is in the
+# URL, so nothing that authenticates (the user, reset codes and tokens) is stored under it: the work is
+# stored per user and only restored after that user logs in.
+PERSISTED_SESSION_KEYS = ['current_analysis', 'multi_role_analysis', 'rewritten_resume']
 
-**ACHIEVEMENTS**
-• Recognition for outstanding performance and leadership
-• Successful completion of high-visibility projects
-• Contributions to process improvements and innovation initiatives
-    """
+def session_id():
+    """This browser session's id, kept in the URL so any replica can find its state"""
+    if 'sid' not in st.query_params:
+        st.query_params['sid'] = secrets.token_urlsafe(24)
+    return st.query_params['sid']
 
-def generate_audio_tips(feedback, target_role):
-    """Generate audio tips from feedback using gTTS"""
-    try:
-        if not DEPENDENCIES_AVAILABLE:
-            st.warning("Audio generation requires gTTS. Please install missing dependencies.")
-            return None
-        
-        # Extract key points from feedback for audio
-        audio_script = f"""
-        Hello! Here are the key tips to improve your resume for the {target_role} position.
-        
-        First, focus on strengthening your professional summary. Make sure it clearly states your value proposition and aligns with the {target_role} requirements.
-        
-        Second, add more quantifiable achievements. Instead of saying you improved processes, specify by how much - percentages, dollar amounts, or timeframes make a big difference.
-        
-        Third, include industry-specific keywords that are relevant to {target_role}. This helps your resume pass through applicant tracking systems.
-        
-        Fourth, ensure your experience descriptions are tailored to match the job requirements. Highlight skills and technologies that are most relevant.
-        
-        Finally, consider adding a dedicated skills section if you don't have one, and make sure your contact information is up to date.
-        
-        Remember, a great resume tells a story of how your experience makes you the perfect fit for this role. Keep refining and good luck with your applications!
-        """
-        
-        # Generate audio using gTTS
-        tts = gTTS(text=audio_script, lang='en', slow=False)
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as audio_file:
-            tts.save(audio_file.name)
-            audio_path = audio_file.name
-        
-        # Read the audio file and encode to base64
-        with open(audio_path, 'rb') as f:
-            audio_bytes = f.read()
-        
-        # Clean up temporary file
-        os.unlink(audio_path)
-        
-        return audio_bytes
-        
-    except Exception as e:
-        st.error(f"❌ Error generating audio: {str(e)}")
-        return None
+def _session_key():
+    """Store key for the logged-in user's work in this browser session"""
+    return f"session:{st.session_state.user['id']}:{session_id()}"
 
-def create_pdf_resume(rewritten_text, filename):
-    """Create a PDF file from rewritten resume text"""
-    try:
-        if not DEPENDENCIES_AVAILABLE:
-            st.warning("PDF generation requires reportlab. Please install missing dependencies.")
-            return None
-        
-        # Create a temporary file
-        pdf_buffer = BytesIO()
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = styles['Title']
-        title_style.fontSize = 16
-        title_style.spaceAfter = 12
-        
-        heading_style = styles['Heading2']
-        heading_style.fontSize = 12
-        heading_style.spaceAfter = 6
-        heading_style.spaceBefore = 12
-        
-        normal_style = styles['Normal']
-        normal_style.fontSize = 10
-        normal_style.spaceAfter = 6
-        
-        # Parse the rewritten text and create PDF content
-        story = []
-        lines = rewritten_text.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                story.append(Spacer(1, 6))
-                continue
-                
-            if line.startswith('**') and line.endswith('**'):
-                # This is a heading
-                heading_text = line.replace('**', '')
-                story.append(Paragraph(heading_text, heading_style))
-            elif line.startswith('•'):
-                # This is a bullet point
-                bullet_text = line.replace('•', '●')
-                story.append(Paragraph(bullet_text, normal_style))
-            else:
-                # Regular text
-                story.append(Paragraph(line, normal_style))
-        
-        # Build PDF
-        doc.build(story)
-        pdf_buffer.seek(0)
-        
-        return pdf_buffer.getvalue()
-        
-    except Exception as e:
-        st.error(f"❌ Error creating PDF: {str(e)}")
-        return None
+def restore_session():
+    """Load the logged-in user's work from the shared store the first time this process sees it"""
+    if not st.session_state.get('user') or st.session_state.get('session_restored'):
+        return
+    st.session_state.session_restored = True
+    saved = get_state_store().get(_session_key()) or {}
+    for key, value in saved.items():
+        if key in PERSISTED_SESSION_KEYS:
+            st.session_state[key] = value
 
-def delete_user_history(user_id):
-    """Delete all feedback history for a user"""
-    try:
-        conn = sqlite3.connect('resume_bot.db')
-        c = conn.cursor()
-        c.execute("DELETE FROM feedback_history WHERE user_id = ?", (user_id,))
-        deleted_count = c.rowcount
-        conn.commit()
-        conn.close()
-        return deleted_count
-    except Exception as e:
-        st.error(f"❌ Error deleting history: {str(e)}")
-        return 0
+def persist_session():
+    """Write the user's work to the shared store when it has changed since the last run"""
+    # Not before it has been restored, or the login run would overwrite it with nothing
+    if not st.session_state.get('user') or not st.session_state.get('session_restored'):
+        return
+    state = {key: st.session_state[key] for key in PERSISTED_SESSION_KEYS if key in st.session_state}
+    digest = hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+    if digest != st.session_state.get('session_digest'):
+        get_state_store().set(_session_key(), state, ttl=config.STATE_STORE_CONFIG['session_ttl_seconds'])
+        st.session_state.session_digest = digest
 
-def get_user_history(user_id):
-    """Get feedback history for a user"""
-    try:
-        conn = sqlite3.connect('resume_bot.db')
-        c = conn.cursor()
-        c.execute("""SELECT filename, target_role, score, created_at 
-                     FROM feedback_history 
-                     WHERE user_id = ? 
-                     ORDER BY created_at DESC""", (user_id,))
-        history = c.fetchall()
-        conn.close()
-        return history
-    except Exception as e:
-        st.error(f"❌ Error fetching history: {str(e)}")
-        return []
+def end_session():
+    """Log out: forget the stored work and start a new session"""
+    if st.session_state.get('user'):
+        get_state_store().delete(_session_key())
+    for key in PERSISTED_SESSION_KEYS + ['user', 'speculative_rewrite', 'session_digest', 'session_restored']:
+        st.session_state.pop(key, None)
+    st.query_params['sid'] = secrets.token_urlsafe(24)
 
 # UI Components
 def show_login_page():
@@ -562,6 +102,8 @@ def show_login_page():
                 user = authenticate_user(username, password)
                 if user:
                     st.session_state.user = user
+                    # The next run restores this user's work for this sid, if any
+                    st.session_state.session_restored = False
                     st.rerun()
                 else:
                     st.error("❌ Invalid credentials!")
@@ -591,6 +133,30 @@ def show_login_page():
                 else:
                     st.error("❌ Username or email already exists!")
 
+def deliver_otp(email, otp):
+    """Send an OTP, showing it on screen when email isn't set up (demo mode)"""
+    try:
+        send_otp_email(email, otp)
+        return True
+    except EmailNotConfigured:
+        st.warning("⚠️ Email not configured. Please update EMAIL_CONFIG with your Gmail credentials.")
+        # For demo purposes, show OTP in the interface
+        st.info(f"🔐 **Demo Mode**: Your OTP is: **{otp}**")
+        st.info("📧 **Setup Instructions**: Update EMAIL_CONFIG in the code with your Gmail App Password")
+        return True
+    except EmailAuthError:
+        st.error("❌ Gmail Authentication Failed!")
+        st.error("🔧 **Fix Steps:**")
+        st.error("1. Enable 2-Factor Authentication on your Gmail")
+        st.error("2. Generate an App Password (not your regular password)")
+        st.error("3. Use the 16-character App Password in EMAIL_CONFIG")
+        st.error("4. Make sure 'Less secure app access' is OFF")
+        return False
+    except EmailError as e:
+        st.error(f"❌ Email Error: {str(e)}")
+        st.info(f"🔐 **Demo Mode**: Your OTP is: **{otp}**")
+        return True  # Return True for demo purposes
+
 def show_forgot_password():
     st.markdown("### 🔑 Reset Password")
     
@@ -603,18 +169,21 @@ def show_forgot_password():
             send_otp_btn = st.form_submit_button("📧 Send OTP")
             
             if send_otp_btn and email:
-                # Generate real OTP
-                otp = ''.join(random.choices(string.digits, k=6))
-                st.session_state.reset_otp = otp
-                st.session_state.reset_email = email
-                
-                # Send OTP via email
-                if send_otp_email(email, otp):
-                    st.session_state.reset_step = 2
-                    st.success("✅ OTP sent to your email! Check your inbox.")
-                    st.rerun()
+                # The code is stored hashed; unknown addresses get the same answer but no email
+                try:
+                    otp = create_password_reset(email)
+                except ResetRateLimited as e:
+                    st.warning(f"🚦 {e}")
                 else:
-                    st.error("❌ Failed to send OTP. Please check your email address.")
+                    st.session_state.reset_email = email
+                    
+                    # Send OTP via email
+                    if otp is None or deliver_otp(email, otp):
+                        st.session_state.reset_step = 2
+                        st.success("✅ OTP sent to your email! Check your inbox.")
+                        st.rerun()
+                    else:
+                        st.error("❌ Failed to send OTP. Please check your email address.")
     
     elif st.session_state.reset_step == 2:
         st.info(f"📧 OTP sent to: {st.session_state.get('reset_email', '')}")
@@ -628,21 +197,26 @@ def show_forgot_password():
                 resend_btn = st.form_submit_button("🔄 Resend OTP")
             
             if verify_btn and otp:
-                if otp == st.session_state.get('reset_otp', ''):
+                token = verify_password_reset(st.session_state.reset_email, otp)
+                if token:
+                    st.session_state.reset_token = token
                     st.session_state.reset_step = 3
                     st.success("✅ OTP verified!")
                     st.rerun()
                 else:
-                    st.error("❌ Invalid OTP!")
+                    st.error("❌ Invalid or expired OTP!")
             
             if resend_btn:
                 # Generate new OTP and resend
-                new_otp = ''.join(random.choices(string.digits, k=6))
-                st.session_state.reset_otp = new_otp
-                if send_otp_email(st.session_state.reset_email, new_otp):
-                    st.success("✅ New OTP sent to your email!")
+                try:
+                    new_otp = create_password_reset(st.session_state.reset_email)
+                except ResetRateLimited as e:
+                    st.warning(f"🚦 {e}")
                 else:
-                    st.error("❌ Failed to resend OTP.")
+                    if new_otp is None or deliver_otp(st.session_state.reset_email, new_otp):
+                        st.success("✅ New OTP sent to your email!")
+                    else:
+                        st.error("❌ Failed to resend OTP.")
     
     elif st.session_state.reset_step == 3:
         with st.form("new_password_form"):
@@ -655,25 +229,21 @@ def show_forgot_password():
                     st.error("❌ Passwords don't match!")
                 elif len(new_password) < 6:
                     st.error("❌ Password must be at least 6 characters!")
-                else:
-                    # Update password in database
-                    conn = sqlite3.connect('resume_bot.db')
-                    c = conn.cursor()
-                    new_hash = hash_password(new_password)
-                    c.execute("UPDATE users SET password_hash = ? WHERE email = ?", 
-                             (new_hash, st.session_state.reset_email))
-                    conn.commit()
-                    conn.close()
-                    
+                elif reset_password_with_token(st.session_state.reset_email,
+                                               st.session_state.get('reset_token'), new_password):
                     st.success("✅ Password reset successfully!")
                     del st.session_state.reset_step
+                    del st.session_state.reset_token
                     del st.session_state.show_forgot_password
                     st.rerun()
+                else:
+                    st.error("❌ Your reset session has expired. Please request a new OTP.")
+                    st.session_state.reset_step = 1
     
     if st.button("⬅️ Back to Login"):
         del st.session_state.show_forgot_password
-        if 'reset_step' in st.session_state:
-            del st.session_state.reset_step
+        for key in ('reset_step', 'reset_token'):
+            st.session_state.pop(key, None)
         st.rerun()
 
 def show_dashboard():
@@ -689,14 +259,15 @@ def show_dashboard():
             st.rerun()
     with col3:
         if st.button("🚪 Logout"):
-            del st.session_state.user
+            end_session()
             st.rerun()
     
     # Main dashboard tabs
     if user['is_admin']:
-        tab1, tab2, tab3, tab4 = st.tabs(["📤 Upload Resume", "📊 My Analytics", "📂 History", "👑 Admin"])
+        tab1, tab2, tab3, tab5, tab4 = st.tabs(["📤 Upload Resume", "📊 My Analytics", "📂 History",
+                                                "🧩 Job Match", "👑 Admin"])
     else:
-        tab1, tab2, tab3 = st.tabs(["📤 Upload Resume", "📊 My Analytics", "📂 History"])
+        tab1, tab2, tab3, tab5 = st.tabs(["📤 Upload Resume", "📊 My Analytics", "📂 History", "🧩 Job Match"])
     
     with tab1:
         show_upload_section()
@@ -707,10 +278,41 @@ def show_dashboard():
     with tab3:
         show_history_section()
     
+    with tab5:
+        show_job_match_section()
+    
     if user['is_admin']:
         with tab4:
             show_admin_dashboard()
 
+def store_upload(uploaded_file):
+    """Store an uploaded resume, showing an error and returning None if it can't be read"""
+    try:
+        return store_document(uploaded_file.getvalue(), uploaded_file.name, uploaded_file.type)
+    except DependencyMissing as e:
+        st.warning(str(e))
+    except ExtractionError as e:
+        st.error(f"❌ {str(e)}")
+    return None
+
+def report_feedback_error(structured):
+    if structured.get('error'):
+        st.error(f"❌ Error getting AI feedback: {structured['error']}")
+
+def admission(operation, label, cost=1):
+    """Admission for an expensive operation, showing the user's queue position while they wait"""
+    placeholder = st.empty()
+
+    def show_position(position):
+        if position:
+            placeholder.info(f"⏳ {label}: you're #{position} in the queue...")
+        else:
+            placeholder.empty()
+
+    return admit(operation, st.session_state.user['id'], cost, on_wait=show_position)
+
+UPLOAD_LIMIT_MB = max(1, config.UPLOAD_LIMITS['max_bytes'] // (1024 * 1024))
+
 def show_upload_section():
     st.markdown("### 📤 Upload Your Resume")
     
@@ -720,13 +322,15 @@ def show_upload_section():
         uploaded_file = st.file_uploader(
             "Choose your resume file",
             type=['pdf', 'docx'],
-            help="Upload your resume in PDF or DOCX format"
+            help=f"Upload your resume in PDF or DOCX format (up to {UPLOAD_LIMIT_MB} MB)",
+            max_upload_size=UPLOAD_LIMIT_MB
         )
         
         target_role = st.text_input(
             "🎯 Target Role",
             placeholder="e.g., Software Engineer, Data Scientist, Marketing Manager",
-            help="Specify the role you're applying for to get targeted feedback"
+            help="Specify the role you're applying for to get targeted feedback. "
+                 "Separate several roles with commas to compare them side by side."
         )
     
     with col2:
@@ -744,44 +348,159 @@ def show_upload_section():
         </div>
         """, unsafe_allow_html=True)
     
-    if uploaded_file and target_role:
-        if st.button("🚀 Analyze Resume", use_container_width=True):
-            with st.spinner("🤖 AI is analyzing your resume..."):
-                # Extract text from uploaded file
-                if uploaded_file.type == "application/pdf":
-                    resume_text = extract_text_from_pdf(uploaded_file)
-                else:
-                    resume_text = extract_text_from_docx(uploaded_file)
+    target_roles = parse_target_roles(target_role)
+    
+    if uploaded_file and len(target_roles) > 1:
+        if st.button(f"🚀 Analyze for {len(target_roles)} Roles", use_container_width=True):
+            document = None
+            try:
+                with admission('analyze', "Analysis", cost=len(target_roles)):
+                    with st.spinner("🤖 AI is analyzing your resume for each role..."):
+                        # Extract once, then fan the role-specific analyses out concurrently
+                        document = store_upload(uploaded_file)
+                        if document:
+                            results = analyze_resume_for_roles(document['text'], target_roles, document['parsed'])
+                            record_ids = save_feedback_batch_to_db(
+                                st.session_state.user['id'],
+                                uploaded_file.name,
+                                results,
+                                document['id']
+                            )
+                            for result, record_id in zip(results, record_ids):
+                                result['record_id'] = record_id
                 
-                # Get AI feedback
-                feedback, score = get_ai_feedback(resume_text, target_role)
+                            st.session_state.multi_role_analysis = {
+                                'filename': uploaded_file.name,
+                                'document_id': document['id'],
+                                'results': results
+                            }
+            except AdmissionRejected as e:
+                st.warning(f"🚦 {e}")
+            
+            if document:
+                st.success("✅ Analysis complete!")
+                st.rerun()
+    
+    elif uploaded_file and target_role:
+        if st.button("🚀 Analyze Resume", use_container_width=True):
+            document = None
+            try:
+                with admission('analyze', "Analysis"):
+                    with st.spinner("🤖 AI is analyzing your resume..."):
+                        # Store the file once and reuse its extracted text for repeat uploads
+                        document = store_upload(uploaded_file)
+                        if document:
+                            # Get AI feedback, only for the changed sections when this file was analyzed before
+                            structured = analyze_upload(st.session_state.user['id'], uploaded_file.name, document,
+                                                        target_role)
+                            feedback = render_feedback_markdown(structured, target_role)
+                            score = structured['score']
                 
-                # Store in session state
-                st.session_state.current_analysis = {
-                    'filename': uploaded_file.name,
-                    'target_role': target_role,
-                    'feedback': feedback,
-                    'score': score,
-                    'resume_text': resume_text
-                }
+                            # Store in session state
+                            st.session_state.current_analysis = {
+                                'filename': uploaded_file.name,
+                                'target_role': target_role,
+                                'feedback': feedback,
+                                'score': score,
+                                'structured': structured,
+                                'document_id': document['id']
+                            }
                 
-                # Save to database
-                save_feedback_to_db(
-                    st.session_state.user['id'],
-                    uploaded_file.name,
-                    target_role,
-                    feedback,
-                    score,
-                    ""
-                )
+                            # Save to database
+                            st.session_state.current_analysis['record_id'] = save_feedback_to_db(
+                                st.session_state.user['id'],
+                                uploaded_file.name,
+                                target_role,
+                                feedback,
+                                score,
+                                "",
+                                document['id'],
+                                structured
+                            )
+                            _queue_speculative_rewrite()
+            except AdmissionRejected as e:
+                st.warning(f"🚦 {e}")
             
-            st.success("✅ Analysis complete!")
-            st.rerun()
+            if document:
+                st.success("✅ Analysis complete!")
+                st.rerun()
+    
+    # Show multi-role comparison
+    if 'multi_role_analysis' in st.session_state:
+        show_multi_role_results()
     
     # Show analysis results
     if 'current_analysis' in st.session_state:
         show_analysis_results()
 
+def plotly_chart_cached(name, data, build, **options):
+    """Draw build(data, **options), reusing the figure cached for the same data and options"""
+    spec = cached_chart_spec(name, data, options, lambda: build(data, **options).to_json())
+    # The figure was validated when it was built; validating it again costs nearly as much as building it
+    st.plotly_chart(go.Figure(json.loads(spec), _validate=False), use_container_width=True)
+
+def show_multi_role_results():
+    comparison = st.session_state.multi_role_analysis
+    results = comparison['results']
+    
+    st.markdown("---")
+    st.markdown("## ⚖️ Role Comparison")
+    
+    # Score comparison chart
+    def fit_scores_figure(data, title):
+        fig = px.bar(
+            x=[role for role, _ in data],
+            y=[score for _, score in data],
+            title=title,
+            labels={'x': 'Role', 'y': 'Score'},
+            range_y=[0, 100]
+        )
+        fig.update_layout(height=300)
+        return fig
+    
+    plotly_chart_cached('fit_scores', [(result['target_role'], result['score']) for result in results],
+                        fit_scores_figure, title=f"🎯 Fit Scores for {comparison['filename']}")
+    
+    # Side-by-side feedback
+    columns = st.columns(len(results))
+    for column, result in zip(columns, results):
+        with column:
+            score = result['score']
+            color = "#ff4444" if score < 70 else "#ffaa00" if score < 85 else "#44ff44"
+            st.markdown(f"""
+            <div style='text-align: center;'>
+                <h4>{result['target_role']}</h4>
+                <div style='font-size: 2rem; font-weight: bold; color: {color};'>{score}/100</div>
+            </div>
+            """, unsafe_allow_html=True)
+            with st.expander("🤖 Feedback"):
+                st.markdown(result['feedback'])
+                report_feedback_error(result['structured'])
+            if st.button("🔎 Open", key=f"open_role_{result['record_id']}", use_container_width=True):
+                st.session_state.current_analysis = {
+                    'filename': comparison['filename'],
+                    'target_role': result['target_role'],
+                    'feedback': result['feedback'],
+                    'score': score,
+                    'structured': result['structured'],
+                    'document_id': comparison['document_id'],
+                    'record_id': result['record_id']
+                }
+                if 'rewritten_resume' in st.session_state:
+                    del st.session_state.rewritten_resume
+                _queue_speculative_rewrite()
+                st.rerun()
+    
+    if st.button("🧹 Clear Comparison", use_container_width=True):
+        del st.session_state.multi_role_analysis
+        st.rerun()
+
+def _queue_speculative_rewrite():
+    analysis = st.session_state.current_analysis
+    future = start_speculative_rewrite(analysis, st.session_state.user['id'])
+    if future is not None:
+        st.session_state.speculative_rewrite = (rewrite_key(analysis), future)
+
 def show_analysis_results():
     analysis = st.session_state.current_analysis
     
@@ -809,72 +528,147 @@ def show_analysis_results():
     # Feedback
     st.markdown("### 🤖 AI Feedback")
     st.markdown(analysis['feedback'])
+    report_feedback_error(analysis.get('structured') or {})
+    
+    token_report = (analysis.get('structured') or {}).get('token_report')
+    revision = (analysis.get('structured') or {}).get('revision')
+    if token_report and revision and revision['mode'] == 'incremental':
+        st.caption(f"🧮 Prompt: {token_report['tokens_after']:,} tokens "
+                   f"(saved {token_report['tokens_saved']:,} of the {token_report['tokens_before']:,} "
+                   f"a full analysis sends) · 🤖 {analysis['structured'].get('backend', 'llm')}")
+    elif token_report:
+        st.caption(f"🧮 Prompt resume text: {token_report['tokens_after']:,} tokens "
+                   f"(saved {token_report['tokens_saved']:,} of {token_report['tokens_before']:,}) "
+                   f"· 🤖 {analysis['structured'].get('backend', 'llm')}")
+    if revision and revision['mode'] == 'reused':
+        st.caption("♻️ No changes since your last analysis of this file, so its feedback was reused.")
+    elif revision and revision['mode'] == 'incremental':
+        st.caption(f"♻️ Re-analyzed changed sections only: {', '.join(revision['changed_sections'])}"
+                   + (f" · unchanged: {', '.join(revision['unchanged_sections'])}"
+                      if revision['unchanged_sections'] else ""))
+    
+    # Saved job descriptions this resume fits best
+    if analysis.get('document_id'):
+        fits = match_job_descriptions(analysis['document_id'], st.session_state.user['id'], top_k=5)
+        if fits:
+            st.markdown("### 🧩 Best-Fitting Job Descriptions")
+            st.dataframe(pd.DataFrame([
+                {'Job': fit['title'], 'Match': round(fit['score'], 3),
+                 'Matched Skills': ', '.join(fit['matched_skills']),
+                 'Missing Skills': ', '.join(fit['missing_skills'])}
+                for fit in fits
+            ]), use_container_width=True)
     
     # Action buttons
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         if st.button("🔄 Rewrite Resume", use_container_width=True):
-            with st.spinner("✍️ Rewriting your resume..."):
-                rewritten = rewrite_resume(
-                    analysis['resume_text'],
-                    analysis['target_role'],
-                    analysis['feedback']
-                )
-                st.session_state.rewritten_resume = rewritten
-            st.rerun()
+            rewritten = None
+            try:
+                with st.spinner("✍️ Rewriting your resume..."):
+                    try:
+                        rewritten = get_rewritten_resume(analysis, st.session_state.get('speculative_rewrite'),
+                                                         admission=admission('rewrite', "Rewrite"))
+                    except AdmissionRejected:
+                        raise
+                    except Exception as e:
+                        rewritten = None
+                        st.error(f"❌ Error rewriting resume: {str(e)}")
+                    if rewritten:
+                        st.session_state.rewritten_resume = rewritten
+                        analysis['rewrite_saved'] = False
+                        if analysis.get('record_id'):
+                            try:
+                                update_rewritten_resume(analysis['record_id'], rewritten)
+                                analysis['rewrite_saved'] = True
+                            except Exception as e:
+                                st.error(f"❌ Error saving rewritten resume: {str(e)}")
+            except AdmissionRejected as e:
+                st.warning(f"🚦 {e}")
+            if rewritten:
+                st.rerun()
     
     with col2:
         if st.button("🔈 Audio Tips", use_container_width=True):
             with st.spinner("🎵 Generating audio tips..."):
-                audio_bytes = generate_audio_tips(analysis['feedback'], analysis['target_role'])
-                if audio_bytes:
+                try:
+                    with admission('audio', "Audio tips"):
+                        audio_bytes = generate_audio_tips(analysis['feedback'], analysis['target_role'],
+                                                          analysis.get('structured'), analysis_parsed_resume(analysis))
                     st.success("🎵 Audio tips generated! Click play below:")
                     st.audio(audio_bytes, format='audio/mp3')
-                else:
+                except AdmissionRejected as e:
+                    st.warning(f"🚦 {e}")
+                except DependencyMissing as e:
+                    st.warning(str(e))
+                except AudioGenerationError as e:
+                    st.error(f"❌ {str(e)}")
                     st.error("❌ Failed to generate audio")
     
     with col3:
         if st.button("📧 Email Report", use_container_width=True):
             with st.spinner("📧 Sending email..."):
-                if send_feedback_email(
-                    st.session_state.user['email'], 
-                    analysis['feedback'],
-                    analysis['filename'],
-                    analysis['target_role'],
-                    analysis['score']
-                ):
+                try:
+                    with admission('email', "Email"):
+                        send_feedback_email(
+                            st.session_state.user['email'], 
+                            analysis['feedback'],
+                            analysis['filename'],
+                            analysis['target_role'],
+                            analysis['score'],
+                            analysis.get('structured')
+                        )
                     st.success("✅ Report sent to your email!")
-                else:
-                    st.error("❌ Failed to send email")
+                except AdmissionRejected as e:
+                    st.warning(f"🚦 {e}")
+                except EmailNotConfigured:
+                    st.warning("⚠️ Email not configured. Please update EMAIL_CONFIG with your Gmail credentials.")
+                    st.info("✅ **Demo Mode**: Email report would be sent to your configured email.")
+                except EmailAuthError:
+                    st.error("❌ Gmail Authentication Failed! Please check your App Password.")
+                except EmailError as e:
+                    st.error(f"❌ Email Error: {str(e)}")
+                    st.info("✅ **Demo Mode**: Email report functionality is working.")
     
     with col4:
         if st.button("🧹 Clear Analysis", use_container_width=True):
             del st.session_state.current_analysis
             if 'rewritten_resume' in st.session_state:
                 del st.session_state.rewritten_resume
+            if 'speculative_rewrite' in st.session_state:
+                del st.session_state.speculative_rewrite
             st.rerun()
     
     # Show rewritten resume
     if 'rewritten_resume' in st.session_state:
+        rewritten = rewritten_resume_text(analysis)
         st.markdown("### 📝 Rewritten Resume")
-        st.markdown(st.session_state.rewritten_resume)
+        st.markdown(rewritten)
         
         # Download button for PDF
         col1, col2 = st.columns(2)
         with col1:
             if st.button("📥 Download as PDF", use_container_width=True):
                 with st.spinner("📄 Creating PDF..."):
-                    pdf_data = create_pdf_resume(
-                        st.session_state.rewritten_resume, 
-                        f"rewritten_{analysis['filename']}"
-                    )
+                    try:
+                        pdf_data = create_pdf_resume(
+                            rewritten, 
+                            f"rewritten_{analysis['filename']}"
+                        )
+                    except DependencyMissing as e:
+                        pdf_data = None
+                        st.warning(str(e))
+                    except PDFGenerationError as e:
+                        pdf_data = None
+                        st.error(f"❌ {str(e)}")
                     if pdf_data:
                         st.download_button(
                             label="⬇️ Download PDF Resume",
                             data=pdf_data,
                             file_name=f"rewritten_{analysis['filename'].replace('.pdf', '.pdf').replace('.docx', '.pdf')}",
                             mime="application/pdf",
+                            on_click=evict_rewritten_resume,
                             use_container_width=True
                         )
                     else:
@@ -884,71 +678,108 @@ def show_analysis_results():
             if st.button("📥 Download as Text", use_container_width=True):
                 st.download_button(
                     label="⬇️ Download Text Resume",
-                    data=st.session_state.rewritten_resume,
+                    data=rewritten,
                     file_name=f"rewritten_{analysis['filename']}.txt",
                     mime="text/plain",
+                    on_click=evict_rewritten_resume,
                     use_container_width=True
                 )
 
+def rewritten_resume_text(analysis):
+    """The rewritten resume, reloaded from the saved record once evicted from the session"""
+    if st.session_state.rewritten_resume is not None:
+        return st.session_state.rewritten_resume
+    record = load_record(analysis['record_id'], st.session_state.user['id'])
+    return record['rewritten_resume'] if record else ""
+
+def evict_rewritten_resume():
+    """Download callback: drop the rewritten text from the session once it's safely in the database"""
+    if st.session_state.current_analysis.get('rewrite_saved'):
+        st.session_state.rewritten_resume = None
+
 def show_analytics_section():
     st.markdown("### 📊 Your Resume Analytics")
     
-    # Mock analytics data
-    scores = [75, 82, 78, 85, 90, 88]
-    dates = ['2024-01-01', '2024-01-15', '2024-02-01', '2024-02-15', '2024-03-01', '2024-03-15']
-    
-    col1, col2 = st.columns(2)
+    try:
+        overview = user_overview(st.session_state.user['id'])
+    except Exception as e:
+        st.error(f"❌ Error loading analytics: {str(e)}")
+        return
+    if not overview['total_analyses']:
+        st.info("📭 No analyses yet. Upload a resume to start tracking your scores.")
+        return
     
-    with col1:
-        # Score trend chart
+    def score_trend_figure(data, title):
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=dates,
-            y=scores,
+            x=[date for date, _ in data],
+            y=[score for _, score in data],
             mode='lines+markers',
             name='Resume Score',
             line=dict(color='#1f77b4', width=3),
             marker=dict(size=8)
         ))
         fig.update_layout(
-            title="📈 Score Improvement Over Time",
+            title=title,
             xaxis_title="Date",
             yaxis_title="Score",
             height=300
         )
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
     
-    with col2:
-        # Role distribution
-        roles = ['Software Engineer', 'Data Scientist', 'Product Manager', 'Designer']
-        counts = [3, 2, 1, 1]
-        
+    def roles_figure(data, title):
         fig = px.pie(
-            values=counts,
-            names=roles,
-            title="🎯 Target Roles Applied"
+            values=[count for _, count in data],
+            names=[role for role, _ in data],
+            title=title
         )
         fig.update_layout(height=300)
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Score trend chart
+        plotly_chart_cached('score_trend', overview['score_trend'], score_trend_figure,
+                            title="📈 Score Improvement Over Time")
+    
+    with col2:
+        # Role distribution
+        plotly_chart_cached('target_roles', overview['roles'], roles_figure, title="🎯 Target Roles Applied")
     
     # Statistics cards
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("📊 Average Score", "82", "↗️ +5")
+        previous_avg = overview['previous_avg_score']
+        st.metric("📊 Average Score", f"{overview['avg_score']:.0f}",
+                  f"{overview['avg_score'] - previous_avg:+.1f}" if previous_avg is not None else None)
     with col2:
-        st.metric("📄 Total Analyses", "7", "↗️ +2")
+        st.metric("📄 Total Analyses", overview['total_analyses'], f"↗️ +{overview['new_analyses']} this week")
     with col3:
-        st.metric("🎯 Success Rate", "85%", "↗️ +10%")
+        st.metric("🎯 Success Rate", f"{overview['success_rate']:.0f}%",
+                  help="Share of analyses scoring at least 70")
     with col4:
-        st.metric("⭐ Best Score", "90", "New!")
+        is_new_best = overview['total_analyses'] > 1 and overview['latest_score'] == overview['best_score']
+        st.metric("⭐ Best Score", overview['best_score'], "New!" if is_new_best else None)
+
+def load_record(record_id, user_id):
+    try:
+        return get_feedback_record(record_id, user_id)
+    except Exception as e:
+        st.error(f"❌ Error fetching record: {str(e)}")
+        return None
 
 def show_history_section():
     st.markdown("### 📂 Feedback History")
     
     # Get real history data from database
     user_id = st.session_state.user['id']
-    history_records = get_user_history(user_id)
+    try:
+        history_records = get_user_history(user_id)
+    except Exception as e:
+        st.error(f"❌ Error fetching history: {str(e)}")
+        history_records = []
     
     if history_records:
         # Convert to DataFrame
@@ -967,6 +798,61 @@ def show_history_section():
         # Display the data
         st.dataframe(df, use_container_width=True)
         
+        # Full feedback is only loaded (and decompressed) when a record is opened
+        with st.expander("🔍 View Full Feedback"):
+            record_labels = {record[4]: f"{record[3][:10]} - {record[0]} ({record[1]})" for record in history_records}
+            selected_id = st.selectbox(
+                "Select an analysis",
+                options=list(record_labels.keys()),
+                format_func=lambda record_id: record_labels[record_id]
+            )
+            if st.button("📖 Open Record", use_container_width=True):
+                record = load_record(selected_id, user_id)
+                if record:
+                    st.markdown(f"**Score: {record['score']}/100**")
+                    if record['archived_at']:
+                        st.info(f"📦 The full feedback was archived on {record['archived_at'][:10]}.")
+                    st.markdown(record['feedback'] or "_No feedback stored._")
+                    if record['rewritten_resume']:
+                        st.markdown("#### 📝 Rewritten Resume")
+                        st.markdown(record['rewritten_resume'])
+            
+            # Stored resumes can be analyzed for another role without re-uploading
+            new_role = st.text_input("🎯 Re-analyze for another role", placeholder="e.g., Data Analyst")
+            if st.button("🔁 Re-analyze", use_container_width=True) and new_role:
+                record = load_record(selected_id, user_id)
+                document = None
+                if record and record['document_id']:
+                    try:
+                        document = get_document(record['document_id'])
+                    except Exception as e:
+                        st.error(f"❌ Error loading document: {str(e)}")
+                if document and document['text']:
+                    try:
+                        with admission('analyze', "Analysis"):
+                            with st.spinner("🤖 AI is analyzing your resume..."):
+                                structured = get_structured_feedback(document['text'], new_role, document['parsed'])
+                                report_feedback_error(structured)
+                                feedback = render_feedback_markdown(structured, new_role)
+                                st.session_state.current_analysis = {
+                                    'filename': record['filename'],
+                                    'target_role': new_role,
+                                    'feedback': feedback,
+                                    'score': structured['score'],
+                                    'structured': structured,
+                                    'document_id': document['id']
+                                }
+                                st.session_state.current_analysis['record_id'] = save_feedback_to_db(
+                                    user_id, record['filename'], new_role, feedback, structured['score'], "",
+                                    document['id'], structured
+                                )
+                                _queue_speculative_rewrite()
+                            st.success("✅ Analysis complete! See the Upload Resume tab.")
+                    except AdmissionRejected as e:
+                        st.warning(f"🚦 {e}")
+                else:
+                    st.warning("⚠️ The original file for this analysis isn't stored. Please upload it again.")
+        
         # Export and delete options
         col1, col2, col3 = st.columns([1, 1, 2])
         
@@ -994,7 +880,11 @@ def show_history_section():
             col1, col2, col3 = st.columns([1, 1, 1])
             with col1:
                 if st.button("❌ Yes, Delete All", use_container_width=True, type="primary"):
-                    deleted_count = delete_user_history(user_id)
+                    try:
+                        deleted_count = delete_user_history(user_id)
+                    except Exception as e:
+                        st.error(f"❌ Error deleting history: {str(e)}")
+                        deleted_count = 0
                     if deleted_count > 0:
                         st.success(f"✅ Deleted {deleted_count} history records!")
                         del st.session_state.show_delete_confirmation
@@ -1018,62 +908,244 @@ def show_history_section():
         ])
         st.dataframe(sample_data, use_container_width=True)
 
+def read_job_description(uploaded_file):
+    """Text of an uploaded job description (TXT, PDF or DOCX), None with an error shown if it can't be read"""
+    if uploaded_file.name.lower().endswith('.txt'):
+        return uploaded_file.getvalue().decode('utf-8', errors='replace')
+    try:
+        return extract_resume_text(uploaded_file, uploaded_file.type)
+    except DependencyMissing as e:
+        st.warning(str(e))
+    except ExtractionError as e:
+        st.error(f"❌ {str(e)}")
+    return None
+
+def show_job_match_section():
+    st.markdown("### 🧩 Job Description Matching")
+    user = st.session_state.user
+
+    # Save a pasted or uploaded job description
+    with st.form("job_description_form", clear_on_submit=True):
+        title = st.text_input("📋 Job Title", placeholder="e.g., Senior Data Scientist at Acme")
+        pasted = st.text_area("Job Description", height=200, placeholder="Paste the job description here")
+        jd_file = st.file_uploader("...or upload it", type=['txt', 'pdf', 'docx'],
+                                   max_upload_size=UPLOAD_LIMIT_MB)
+        save_btn = st.form_submit_button("💾 Save Job Description")
+
+    if save_btn:
+        text = read_job_description(jd_file) if jd_file else pasted
+        if text and text.strip():
+            save_job_description(user['id'], title or (jd_file.name if jd_file else "Untitled job"), text)
+            st.success("✅ Job description saved!")
+        elif not jd_file:
+            st.error("❌ Paste or upload a job description")
+
+    jobs = get_job_descriptions(user['id'])
+    if not jobs:
+        st.info("📭 No saved job descriptions yet.")
+        return
+
+    job_labels = {job['id']: f"{job['title']} ({job['created_at'][:10]})" for job in jobs}
+    selected_id = st.selectbox("Saved job descriptions", options=list(job_labels.keys()),
+                               format_func=lambda job_id: job_labels[job_id])
+    # Admins search every stored resume, everyone else the resumes they have analyzed
+    scope = "all stored resumes" if user['is_admin'] else "your resumes"
+    top_k = st.number_input("Top matches", min_value=1, max_value=100, value=10)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        match_btn = st.button(f"🔎 Find Matching Resumes ({scope})", use_container_width=True)
+    with col2:
+        if st.button("🗑️ Delete Job Description", use_container_width=True):
+            delete_job_description(selected_id, user['id'])
+            st.rerun()
+
+    if match_btn:
+        job = get_job_description(selected_id, user['id'])
+        if job:
+            matches = match_resumes(job['text'], int(top_k), None if user['is_admin'] else user['id'])
+            if matches:
+                st.dataframe(pd.DataFrame([
+                    {'Document': m['document_id'], 'Filename': m['filename'], 'Match': round(m['score'], 3),
+                     'Matched Skills': ', '.join(m['matched_skills']),
+                     'Missing Skills': ', '.join(m['missing_skills'])}
+                    for m in matches
+                ]), use_container_width=True)
+            else:
+                st.info("📭 No stored resumes match this job description.")
+
 def show_admin_dashboard():
     st.markdown("### 👑 Admin Dashboard")
     
+    # Read from a periodically refreshed read-only snapshot, so these queries never block live writes
+    try:
+        overview = admin_overview()
+    except Exception as e:
+        st.error(f"❌ Error loading analytics snapshot: {str(e)}")
+        return
+    st.caption(f"📸 Snapshot from {pd.Timestamp(overview['snapshot_at'], unit='s'):%Y-%m-%d %H:%M} UTC")
+    
     # Admin statistics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("👥 Total Users", "156", "↗️ +12")
+        st.metric("👥 Total Users", f"{overview['total_users']:,}", f"↗️ +{overview['new_users']}")
     with col2:
-        st.metric("📊 Total Analyses", "1,234", "↗️ +89")
+        st.metric("📊 Total Analyses", f"{overview['total_analyses']:,}", f"↗️ +{overview['new_analyses']}")
     with col3:
         st.metric("💰 Revenue", "$2,450", "↗️ +15%")
     with col4:
-        st.metric("⭐ Avg Score", "78.5", "↗️ +2.1")
+        avg_score = overview['avg_score']
+        recent_avg = overview['recent_avg_score']
+        st.metric("⭐ Avg Score", f"{avg_score:.1f}" if avg_score is not None else "—",
+                  f"{recent_avg - avg_score:+.1f} this week" if avg_score is not None and recent_avg is not None
+                  else None)
     
     # Charts
     col1, col2 = st.columns(2)
     
     with col1:
         # User registration trend
-        dates = pd.date_range('2024-01-01', periods=30, freq='D')
-        users = [random.randint(1, 10) for _ in range(30)]
+        def registrations_figure(data, title):
+            return px.line(
+                x=[day for day, _ in data],
+                y=[count for _, count in data],
+                title=title,
+                labels={'x': 'Date', 'y': 'New Users'}
+            )
         
-        fig = px.line(
-            x=dates,
-            y=users,
-            title="📈 Daily User Registrations",
-            labels={'x': 'Date', 'y': 'New Users'}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart_cached('daily_registrations', overview['daily_registrations'], registrations_figure,
+                            title="📈 Daily User Registrations")
     
     with col2:
         # Usage by role
-        roles = ['Software Engineer', 'Data Scientist', 'Product Manager', 'Designer', 'Others']
-        usage = [45, 25, 15, 10, 5]
+        total = overview['total_analyses'] or 1
+        usage = [(role, round(100 * count / total, 1)) for role, count in overview['popular_roles']]
         
-        fig = px.bar(
-            x=roles,
-            y=usage,
-            title="🎯 Popular Target Roles",
-            labels={'x': 'Role', 'y': 'Usage %'}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        def role_usage_figure(data, title):
+            return px.bar(
+                x=[role for role, _ in data],
+                y=[percent for _, percent in data],
+                title=title,
+                labels={'x': 'Role', 'y': 'Usage %'}
+            )
+        
+        if usage:
+            plotly_chart_cached('popular_roles', usage, role_usage_figure, title="🎯 Popular Target Roles")
+        else:
+            st.info("📭 No analyses yet.")
     
     # User management
     st.markdown("### 👥 User Management")
     
-    # Mock user data
-    users_data = [
-        {'ID': 1, 'Username': 'john_doe', 'Email': 'john@email.com', 'Phone': '+1234567890', 'Analyses': 5, 'Last Active': '2024-03-15'},
-        {'ID': 2, 'Username': 'jane_smith', 'Email': 'jane@email.com', 'Phone': '+1234567891', 'Analyses': 3, 'Last Active': '2024-03-14'},
-        {'ID': 3, 'Username': 'bob_wilson', 'Email': 'bob@email.com', 'Phone': '+1234567892', 'Analyses': 7, 'Last Active': '2024-03-13'}
-    ]
-    
-    users_df = pd.DataFrame(users_data)
+    users_df = pd.DataFrame(overview['users'])
     st.dataframe(users_df, use_container_width=True)
+    
+    # Batch ranking of stored resumes
+    st.markdown("### 🏆 Rank Stored Resumes")
+    with st.form("rank_documents_form"):
+        roles_text = st.text_input("Roles", placeholder="e.g., Data Scientist, ML Engineer")
+        top_k = st.number_input("Top candidates per role", min_value=1, max_value=100, value=10)
+        rank_btn = st.form_submit_button("🏆 Rank")
+    
+    if rank_btn and roles_text:
+        ranked = rank_stored_documents(parse_target_roles(roles_text), int(top_k))
+        for role, matches in ranked.items():
+            st.markdown(f"#### 🎯 {role}")
+            if matches:
+                st.dataframe(pd.DataFrame([
+                    {'Document': m['document_id'], 'Filename': m['filename'], 'Similarity': round(m['similarity'], 3)}
+                    for m in matches
+                ]), use_container_width=True)
+            else:
+                st.info("📭 No stored resumes yet.")
+    
+    # Storage maintenance
+    st.markdown("### 🗄️ Storage")
+    if st.button("🗜️ Compress Feedback History"):
+        with st.spinner("🗜️ Training dictionary and compressing records..."):
+            report = compress_feedback_history()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("📄 Records", report['rows'])
+        with col2:
+            st.metric("💾 Text Bytes Saved", f"{report['bytes_saved']:,}",
+                      f"{report['bytes_before']:,} → {report['bytes_after']:,}")
+        with col3:
+            st.metric("🗃️ Database Size", f"{report['file_size_after']:,} B",
+                      f"{report['file_size_after'] - report['file_size_before']:,} B")
+    
+    if st.button("💾 Back Up Now", help="Online backup; the app keeps serving while it runs"):
+        with st.spinner("💾 Backing up..."):
+            try:
+                path = backup_database()
+                st.success(f"✅ Backup saved to {path}")
+            except Exception as e:
+                st.error(f"❌ Backup failed: {str(e)}")
+    backups = list_backups()
+    if backups:
+        st.caption(f"🗂️ {len(backups)} backups kept, newest: {os.path.basename(backups[0])}")
+    
+    days = config.RETENTION_CONFIG['full_text_days']
+    if st.button("📦 Archive Old Analyses", help=f"Move feedback text older than {days} days to archive files, "
+                                                "purge resumes no recent analysis uses and release free pages"):
+        with st.spinner("📦 Archiving..."):
+            report = run_retention()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("📄 Records Archived", report['rows'])
+        with col2:
+            st.metric("🗑️ Resumes Purged", report['documents'])
+        with col3:
+            st.metric("🧹 Pages Released", report['pages_freed'])
+        if report['path']:
+            st.caption(f"Archive: {report['path']}")
+
+    show_metrics_panel()
+    show_admission_panel()
+
+def show_admission_panel():
+    st.markdown("### 🚦 Admission Control")
+    if not config.ADMISSION_CONFIG['enabled']:
+        st.info("⏸️ Admission control is disabled.")
+        return
+    df = pd.DataFrame(admission_snapshot()).round(1)
+    st.dataframe(df.rename(columns={
+        'operation': 'Operation', 'rate_per_minute': 'Rate/min', 'burst': 'Burst', 'concurrency': 'Slots',
+        'active': 'Running', 'waiting': 'Waiting', 'waiting_users': 'Waiting Users', 'admitted': 'Admitted',
+        'queued': 'Queued', 'rate_limited': 'Rate Limited', 'busy': 'Busy', 'timed_out': 'Timed Out',
+        'skipped': 'Skipped (speculative)', 'avg_wait_ms': 'Avg Wait (ms)', 'max_wait_ms': 'Max Wait (ms)'
+    }), use_container_width=True)
+    st.caption("Counts since this process started; limits are per user, slots per process.")
+
+def show_metrics_panel():
+    st.markdown("### ⏱️ Performance Metrics")
+    enabled = st.toggle("Record timings", value=metrics.is_enabled(),
+                        help="Off by default; set RESUME_BOT_METRICS=1 to enable at startup")
+    if enabled != metrics.is_enabled():
+        metrics.set_enabled(enabled)
+        if enabled:
+            metrics.start_metrics_server()
+    
+    rows, counters = metrics.snapshot()
+    if not rows:
+        st.info("📭 No timings recorded yet." if enabled else "⏸️ Metrics recording is disabled.")
+    else:
+        df = pd.DataFrame(rows).round(2)
+        st.dataframe(df, use_container_width=True)
+        fig = px.bar(df, x='span', y=['p50_ms', 'p95_ms'], barmode='group',
+                     title="Latency per Operation (ms)")
+        st.plotly_chart(fig, use_container_width=True)
+    if counters:
+        st.dataframe(pd.DataFrame([
+            {'Counter': name, 'Labels': ', '.join(f"{k}={v}" for k, v in labels), 'Value': value}
+            for (name, labels), value in sorted(counters.items())
+        ]), use_container_width=True)
+    if metrics.is_enabled():
+        st.caption(f"Prometheus endpoint: http://127.0.0.1:{os.getenv('RESUME_BOT_METRICS_PORT', '9108')}/metrics")
+    if rows and st.button("🔄 Reset Metrics"):
+        metrics.reset()
+        st.rerun()
 
 def show_settings():
     st.markdown("### ⚙️ Account Settings")
@@ -1091,12 +1163,7 @@ def show_settings():
             
             if st.form_submit_button("💾 Update Profile"):
                 # Update profile in database
-                conn = sqlite3.connect('resume_bot.db')
-                c = conn.cursor()
-                c.execute("UPDATE users SET username = ?, email = ?, phone = ? WHERE id = ?",
-                         (username, email, phone, user['id']))
-                conn.commit()
-                conn.close()
+                update_profile(user['id'], username, email, phone)
                 
                 # Update session state
                 st.session_state.user['username'] = username
@@ -1122,29 +1189,13 @@ def show_settings():
                 else:
                     # In a real app, you'd verify the current password first
                     # Update password in database
-                    conn = sqlite3.connect('resume_bot.db')
-                    c = conn.cursor()
-                    new_hash = hash_password(new_password)
-                    c.execute("UPDATE users SET password_hash = ? WHERE id = ?",
-                             (new_hash, user['id']))
-                    conn.commit()
-                    conn.close()
+                    set_password(user['id'], new_password)
                     st.success("✅ Password changed successfully!")
     
     if st.button("⬅️ Back to Dashboard"):
         del st.session_state.show_settings
         st.rerun()
 
-def save_feedback_to_db(user_id, filename, target_role, feedback, score, rewritten_resume):
-    conn = sqlite3.connect('resume_bot.db')
-    c = conn.cursor()
-    c.execute("""INSERT INTO feedback_history 
-                 (user_id, filename, target_role, feedback, score, rewritten_resume)
-                 VALUES (?, ?, ?, ?, ?, ?)""",
-              (user_id, filename, target_role, feedback, score, rewritten_resume))
-    conn.commit()
-    conn.close()
-
 # Main app
 def main():
     st.set_page_config(
@@ -1233,25 +1284,38 @@ def main():
     # Initialize database
     init_database()
     
-    # Initialize session state
+    # Prometheus endpoint and background schedulers, started once per process; they also keep the
+    # matching index and the analytics snapshot up to date, so they run with retention and backups off
+    if metrics.is_enabled():
+        metrics.start_metrics_server()
+    start_retention_scheduler()
+    start_backup_scheduler()
+    
+    # Initialize session state; a logged-in user's work comes from the shared store if another
+    # replica served this session
     if 'user' not in st.session_state:
         st.session_state.user = None
+    restore_session()
     
-    # Show forgot password if requested
-    if st.session_state.get('show_forgot_password', False):
-        show_forgot_password()
-        return
-    
-    # Show settings if requested
-    if st.session_state.get('show_settings', False):
-        show_settings()
-        return
-    
-    # Main app logic
-    if st.session_state.user is None:
-        show_login_page()
-    else:
-        show_dashboard()
+    try:
+        # Show forgot password if requested
+        if st.session_state.get('show_forgot_password', False):
+            show_forgot_password()
+            return
+        
+        # Show settings if requested
+        if st.session_state.get('show_settings', False):
+            show_settings()
+            return
+        
+        # Main app logic
+        if st.session_state.user is None:
+            show_login_page()
+        else:
+            show_dashboard()
+    finally:
+        # Also runs when st.rerun() interrupts the script
+        persist_session()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""Benchmark harness for the end-to-end analysis pipeline.
+
+Drives the real functions from resume_core against a throwaway database and a
+generated resume corpus:
+
+- extract_text_from_pdf / extract_text_from_docx on generated resumes and
+  the bundled free-resume-template-professional.pdf
+- get_ai_feedback against a fake LLM with configurable latency
+- save_feedback_to_db / get_user_history on a large synthetic table, with
+  saves measured both as one transaction per row and through the
+  write-behind buffer
+- create_pdf_resume and generate_audio_tips
+
+and reports p50/p95/p99 latency and throughput per stage.
+
+Usage:
+    python benchmark.py                          # run and print a report
+    python benchmark.py --save-baseline          # store results as the baseline
+    python benchmark.py --compare                # fail if p95 regressed vs the baseline
+    python benchmark.py --llm-latency 0.5 --concurrency 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+from io import BytesIO
+
+import resume_core as core
+from resume_core import config
+from resume_core.llm_backends import TemplateBackend, register_backend
+from resume_core.scoring import ROLE_SKILLS, ACTION_VERBS
+
+BUNDLED_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'free-resume-template-professional.pdf')
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+ROLES = ['Software Engineer', 'Data Scientist', 'Data Analyst', 'ML Engineer', 'Product Manager', 'Designer']
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * pct / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def generate_resume_text(rng, role):
+    """A plausible resume for a role, with sections, skills and quantified bullets"""
+    key = role.lower() if role.lower() in ROLE_SKILLS else rng.choice(sorted(ROLE_SKILLS))
+    skills = rng.sample(sorted(ROLE_SKILLS[key]), k=min(10, len(ROLE_SKILLS[key])))
+    verbs = sorted(ACTION_VERBS)
+    bullets = [
+        f"• {rng.choice(verbs).capitalize()} {rng.choice(skills)} initiatives, improving results by {rng.randint(5, 60)}%"
+        for _ in range(rng.randint(6, 14))
+    ]
+    return "\n".join([
+        f"Candidate {rng.randint(1000, 9999)}",
+        f"candidate{rng.randint(1, 999)}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "Professional Summary",
+        f"{role} with {rng.randint(2, 15)} years of experience delivering measurable outcomes.",
+        "Experience",
+        f"{role} | Example Corp | 2019-Present",
+        *bullets,
+        "Education",
+        "BSc Computer Science, Example University, 2015",
+        "Skills",
+        ", ".join(skills)
+    ])
+
+def build_pdf(text):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    y = 750
+    for line in text.split('\n'):
+        if y < 50:
+            pdf.showPage()
+            y = 750
+        pdf.drawString(50, y, line.replace('•', '-'))
+        y -= 14
+    pdf.save()
+    return buffer.getvalue()
+
+def build_docx(text):
+    import docx
+    document = docx.Document()
+    for line in text.split('\n'):
+        document.add_paragraph(line)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def build_corpus(size, seed=0):
+    """Generated PDF and DOCX resumes plus the bundled template PDF"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        role = ROLES[i % len(ROLES)]
+        text = generate_resume_text(rng, role)
+        if i % 2 == 0:
+            corpus.append(('pdf', build_pdf(text), role))
+        else:
+            corpus.append(('docx', build_docx(text), role))
+    if os.path.exists(BUNDLED_PDF):
+        with open(BUNDLED_PDF, 'rb') as f:
+            corpus.append(('pdf', f.read(), 'Software Engineer'))
+    return corpus
+
+def seed_history(rows, users, seed=0):
+    """Bulk insert synthetic feedback rows spread over many users"""
+    rng = random.Random(seed)
+    feedback, _ = core.get_ai_feedback("Skills\nPython, SQL", "Software Engineer")
+    conn = core.connect()
+    c = conn.cursor()
+    stored = core.compress_text(c, feedback)
+    c.executemany(
+        """INSERT INTO feedback_history (user_id, filename, target_role, feedback, score, rewritten_resume)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        ((rng.randint(1, users), f"resume_{i}.pdf", rng.choice(ROLES), stored, rng.randint(40, 95), "")
+         for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+def measure(name, func, inputs, concurrency=1):
+    """Run func over inputs and return latency percentiles and throughput"""
+    latencies = []
+    errors = 0
+
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            func(item)
+            return time.perf_counter() - started, False
+        except Exception:
+            return time.perf_counter() - started, True
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(timed, inputs))
+    else:
+        outcomes = [timed(item) for item in inputs]
+    elapsed = time.perf_counter() - started
+
+    for latency, failed in outcomes:
+        latencies.append(latency)
+        errors += failed
+    return {
+        'stage': name,
+        'count': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'throughput_per_s': len(latencies) / elapsed if elapsed else 0.0
+    }
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='resume_bot_bench_')
+    config.DB_PATH = os.path.join(workdir, 'bench.db')
+    config.DOCUMENT_STORE_CONFIG['blob_dir'] = os.path.join(workdir, 'blobs')
+    core.reset_compression_cache()
+    core.reset_state_store()
+    core.init_database()
+
+    # Fake LLM with a fixed latency, so runs are repeatable and offline
+    register_backend('benchmark', TemplateBackend(latency_seconds=args.llm_latency))
+    config.LLM_CONFIG.update({'backend': 'benchmark', 'cheap_backend': None})
+    config.REWRITE_CONFIG['speculative'] = False
+
+    corpus = build_corpus(args.corpus)
+    pdfs = [data for kind, data, _ in corpus if kind == 'pdf']
+    docxs = [data for kind, data, _ in corpus if kind == 'docx']
+    texts = [(core.extract_resume_text(BytesIO(data), core.PDF_MIME if kind == 'pdf' else core.DOCX_MIME), role)
+             for kind, data, role in corpus]
+    n = args.iterations
+
+    seed_history(args.history_rows, args.users)
+    rng = random.Random(1)
+    rewritten = core.rewrite_resume("", "Software Engineer", "")
+
+    def save(i):
+        return core.save_feedback_to_db(rng.randint(1, args.users), f"bench_{i}.pdf", "Data Scientist",
+                                        rewritten, 80, "")
+
+    # One transaction per row, for comparison with the write-behind buffer
+    config.WRITE_BEHIND_CONFIG['enabled'] = False
+    direct_saves = measure('save_feedback_direct', save, range(n), concurrency=args.concurrency)
+    config.WRITE_BEHIND_CONFIG['enabled'] = True
+
+    results = [
+        measure('extract_text_from_pdf', lambda data: core.extract_text_from_pdf(BytesIO(data)),
+                list(islice(cycle(pdfs), n))),
+        measure('extract_text_from_docx', lambda data: core.extract_text_from_docx(BytesIO(data)),
+                list(islice(cycle(docxs), n))),
+        measure('get_ai_feedback', lambda item: core.get_ai_feedback(*item),
+                list(islice(cycle(texts), n)), concurrency=args.concurrency),
+        direct_saves,
+        measure('save_feedback_to_db', save, range(n), concurrency=args.concurrency),
+        measure('get_user_history', lambda i: core.get_user_history(rng.randint(1, args.users)),
+                range(n), concurrency=args.concurrency),
+        measure('create_pdf_resume', lambda i: core.create_pdf_resume(rewritten, "bench.pdf"),
+                range(n))
+    ]
+    if args.tts:
+        # gTTS calls Google's TTS service, so this stage needs network access
+        results.append(measure('generate_audio_tips',
+                               lambda i: core.generate_audio_tips("", "Data Scientist"),
+                               range(min(n, 5))))
+    return results
+
+def print_report(results):
+    print(f"{'stage':<24}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}")
+    for r in results:
+        print(f"{r['stage']:<24}{r['count']:>7}{r['errors']:>8}{r['p50_ms']:>10.2f}"
+              f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['throughput_per_s']:>10.1f}")
+
+def compare(results, baseline, tolerance):
+    """Stages whose p95 latency regressed by more than tolerance vs the baseline"""
+    previous = {r['stage']: r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        before = previous.get(r['stage'])
+        if before and before['p95_ms'] > 0 and r['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append((r['stage'], before['p95_ms'], r['p95_ms']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the resume analysis pipeline")
+    parser.add_argument('--iterations', type=int, default=50, help="Calls per stage")
+    parser.add_argument('--corpus', type=int, default=10, help="Generated resumes (half PDF, half DOCX)")
+    parser.add_argument('--history-rows', type=int, default=50000, help="Synthetic feedback_history rows")
+    parser.add_argument('--users', type=int, default=500, help="Users the synthetic rows are spread over")
+    parser.add_argument('--llm-latency', type=float, default=0.05, help="Fake LLM latency in seconds")
+    parser.add_argument('--concurrency', type=int, default=1, help="Threads for the LLM and DB stages")
+    parser.add_argument('--tts', action='store_true', help="Include generate_audio_tips (needs network)")
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline file")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="Exit 1 if p95 regressed vs the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p95 regression (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print_report(results)
+    report = {'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'options': vars(args), 'results': results}
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if args.compare:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for stage, before, after in regressions:
+            print(f"REGRESSION {stage}: p95 {before:.2f}ms -> {after:.2f}ms")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""UI-free core of the AI Resume Feedback Bot.
+
+Everything the Streamlit app, the HTTP API and batch workers share:
+extraction, LLM feedback and rewriting, PDF/audio export, email, and the
+SQLite store. Nothing here imports Streamlit; errors are reported through
+return values or the exceptions in ``resume_core.errors``. Heavy optional
+packages (PyPDF2, reportlab, gTTS, NumPy) are imported on first use, so
+worker processes start quickly.
+"""
+import importlib.util
+
+from . import config
+from .accounts import (authenticate_user, create_password_reset, create_user, generate_reset_token, hash_password,
+                       purge_password_resets, reset_password_with_token, set_password, set_password_by_email,
+                       update_profile, verify_password, verify_password_reset)
+from .admission import admission_snapshot, admit, get_admission_controller, reserve, reset_admission_controller
+from .analysis import (FEEDBACK_SECTIONS, analysis_parsed_resume, analysis_resume_text, analyze_resume_for_roles,
+                       analyze_upload, build_analysis_conversation, get_ai_feedback, get_llm_backend,
+                       get_revision_feedback, get_rewritten_resume, get_structured_feedback, parse_feedback_json,
+                       parse_target_roles, render_feedback_markdown, rewrite_key, rewrite_resume,
+                       section_fingerprints, start_speculative_rewrite)
+from .analytics import admin_overview, cached_chart_spec, user_overview
+from .backup import (backup_database, list_backups, refresh_snapshot, restore_database, snapshot_connect,
+                     snapshot_time, start_backup_scheduler)
+from .compression import compress_feedback_history, compress_text, decompress_text, reset_compression_cache
+from .db import connect, init_database
+from .documents import (find_documents, get_document, rank_stored_documents, save_extracted_documents,
+                        store_document)
+from .emails import email_configured, send_feedback_email, send_otp_email
+from .errors import (AdmissionRejected, AudioGenerationError, DependencyMissing, EmailAuthError, EmailError,
+                     EmailNotConfigured, ExtractionError, PDFGenerationError, ResetRateLimited, ResumeBotError,
+                     UploadRejected)
+from .exports import create_pdf_resume, generate_audio_tips
+from .extraction import (DOCX_MIME, PDF_MIME, check_upload_size, extract_resume_text, extract_text_from_docx,
+                         extract_text_from_pdf)
+from .history import (delete_user_history, feedback_write_buffer, get_feedback_record, get_previous_analysis,
+                      get_user_history, queue_feedback, save_feedback_batch_to_db, save_feedback_records,
+                      save_feedback_to_db, update_rewritten_resume)
+from .matching import (delete_job_description, get_job_description, get_job_descriptions, match_job_descriptions,
+                       match_resumes, save_job_description, update_document_index)
+from .parsing import ParsedResume, parse_resume
+from .retention import (archive_old_feedback, enable_incremental_vacuum, incremental_vacuum, purge_old_documents,
+                        read_archive, run_retention, start_retention_scheduler)
+from .state import (MemoryRedis, RedisStateStore, SQLiteStateStore, StateStore, claim_lease, get_state_store,
+                    reset_state_store)
+
+OPTIONAL_DEPENDENCIES = {'PyPDF2': 'PyPDF2', 'gtts': 'gtts', 'reportlab': 'reportlab'}
+
+def missing_dependencies():
+    """pip names of optional packages that are not installed"""
+    return [package for module, package in OPTIONAL_DEPENDENCIES.items()
+            if importlib.util.find_spec(module) is None]
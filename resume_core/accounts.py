@@ -0,0 +1,236 @@
+"""User accounts: registration, login and password changes."""
+import hashlib
+import hmac
+import math
+import os
+import secrets
+import sqlite3
+import string
+import threading
+import time
+
+from . import config
+from .db import connect
+from .errors import ResetRateLimited
+from .state import get_state_store
+
+# Authentication functions
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def verify_password(password, hashed):
+    return hashlib.sha256(password.encode()).hexdigest() == hashed
+
+def create_user(username, email, phone, password):
+    conn = connect()
+    c = conn.cursor()
+    try:
+        password_hash = hash_password(password)
+        c.execute("INSERT INTO users (username, email, phone, password_hash) VALUES (?, ?, ?, ?)",
+                  (username, email, phone, password_hash))
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        return False
+    finally:
+        conn.close()
+
+def authenticate_user(username, password):
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT id, username, email, phone, password_hash, is_admin FROM users WHERE username = ?", (username,))
+    user = c.fetchone()
+    conn.close()
+
+    if user and verify_password(password, user[4]):
+        return {
+            'id': user[0],
+            'username': user[1],
+            'email': user[2],
+            'phone': user[3],
+            'is_admin': user[5]
+        }
+    return None
+
+def generate_reset_token():
+    return ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
+
+_secret_key = None
+_secret_key_lock = threading.Lock()
+
+def _reset_secret_key():
+    """PASSWORD_RESET_CONFIG's secret_key, or the key in secret_key_file, generated on first use"""
+    global _secret_key
+    with _secret_key_lock:
+        if _secret_key is None:
+            settings = config.PASSWORD_RESET_CONFIG
+            if settings['secret_key']:
+                _secret_key = settings['secret_key'].encode()
+            else:
+                path = settings['secret_key_file']
+                if not os.path.exists(path):
+                    # Linked into place so concurrent processes agree on one key and never read a partial file
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    with os.fdopen(fd, 'w') as f:
+                        f.write(secrets.token_hex(32))
+                    try:
+                        os.link(tmp_path, path)
+                    except FileExistsError:
+                        pass
+                    finally:
+                        os.remove(tmp_path)
+                with open(path, encoding='utf-8') as f:
+                    _secret_key = f.read().strip().encode()
+        return _secret_key
+
+def _hash_secret(secret, salt=''):
+    """Keyed hash of a reset code or token; a 6-digit code can't be brute-forced from the table alone"""
+    return hmac.new(_reset_secret_key(), f"{salt}:{secret}".encode(), hashlib.sha256).hexdigest()
+
+def _record_code_request(email):
+    """Count a code sent to this address, or raise ResetRateLimited past max_codes_per_window"""
+    settings = config.PASSWORD_RESET_CONFIG
+    window = settings['code_window_seconds']
+    retry_after = 0
+
+    def record(sent):
+        nonlocal retry_after
+        now = time.time()
+        sent = [t for t in sent or [] if t > now - window]
+        if len(sent) >= settings['max_codes_per_window']:
+            retry_after = sent[0] + window - now
+            return sent
+        return sent + [now]
+
+    # Keyed by address rather than account, so the limit doesn't reveal which addresses have one
+    get_state_store().update(f"password_reset:{email.strip().lower()}", record, ttl=window)
+    if retry_after:
+        raise ResetRateLimited(f"Too many codes requested; try again in {math.ceil(retry_after / 60)} min.",
+                               retry_after)
+
+_next_purge = 0.0
+
+def purge_password_resets():
+    """Delete expired reset codes and tokens, returns the number of codes deleted"""
+    global _next_purge
+    now = time.time()
+    conn = connect()
+    c = conn.cursor()
+    c.execute("DELETE FROM password_resets WHERE expires_at <= ?", (now,))
+    deleted_count = c.rowcount
+    c.execute("""UPDATE users SET reset_token = NULL, reset_token_expiry = NULL
+                 WHERE reset_token IS NOT NULL AND reset_token_expiry <= ?""", (now,))
+    conn.commit()
+    conn.close()
+    _next_purge = now + config.PASSWORD_RESET_CONFIG['purge_interval_seconds']
+    return deleted_count
+
+def create_password_reset(email):
+    """Issue a one-time reset code for the account with this email, None if there is none.
+
+    Only a keyed hash of the code is stored, replacing any earlier code for
+    the account; the new code inherits the earlier one's failed attempts
+    while it was still valid, so asking for another code doesn't lift the
+    attempt limit. Raises ResetRateLimited after max_codes_per_window codes
+    for the address. Expired codes are purged every purge interval.
+    """
+    settings = config.PASSWORD_RESET_CONFIG
+    now = time.time()
+    if now >= _next_purge:
+        purge_password_resets()
+    _record_code_request(email)
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT id FROM users WHERE email = ?", (email,))
+    user = c.fetchone()
+    if user is None:
+        conn.close()
+        return None
+    c.execute("SELECT MAX(attempts) FROM password_resets WHERE user_id = ? AND expires_at > ?", (user[0], now))
+    attempts = c.fetchone()[0] or 0
+    code = ''.join(secrets.choice(string.digits) for _ in range(settings['code_length']))
+    salt = secrets.token_hex(16)
+    c.execute("DELETE FROM password_resets WHERE user_id = ?", (user[0],))
+    c.execute("""INSERT INTO password_resets (user_id, code_hash, salt, attempts, expires_at)
+                 VALUES (?, ?, ?, ?, ?)""",
+              (user[0], _hash_secret(code, salt), salt, attempts, now + settings['code_ttl_seconds']))
+    conn.commit()
+    conn.close()
+    return code
+
+def verify_password_reset(email, code):
+    """Check a reset code, returns a reset token on success, None otherwise.
+
+    Every check counts against the code's attempt limit. A correct code is
+    used up and exchanged for a short-lived token, stored hashed in
+    users.reset_token.
+    """
+    settings = config.PASSWORD_RESET_CONFIG
+    now = time.time()
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""SELECT r.id, r.user_id, r.code_hash, r.salt
+                 FROM password_resets r JOIN users u ON u.id = r.user_id
+                 WHERE u.email = ? AND r.expires_at > ?
+                 ORDER BY r.id DESC LIMIT 1""", (email, now))
+    reset = c.fetchone()
+    if reset is None:
+        conn.close()
+        return None
+    # Counted in the UPDATE itself, so concurrent guesses can't exceed the limit
+    c.execute("UPDATE password_resets SET attempts = attempts + 1 WHERE id = ? AND attempts < ?",
+              (reset[0], settings['max_attempts']))
+    if c.rowcount == 0:
+        conn.commit()
+        conn.close()
+        return None
+    if not hmac.compare_digest(_hash_secret(code.strip(), reset[3]), reset[2]):
+        conn.commit()
+        conn.close()
+        return None
+    token = generate_reset_token()
+    c.execute("DELETE FROM password_resets WHERE user_id = ?", (reset[1],))
+    c.execute("UPDATE users SET reset_token = ?, reset_token_expiry = ? WHERE id = ?",
+              (_hash_secret(token), now + settings['token_ttl_seconds'], reset[1]))
+    conn.commit()
+    conn.close()
+    return token
+
+def reset_password_with_token(email, token, new_password):
+    """Set a new password with a token from verify_password_reset, returns whether it was accepted"""
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT id, reset_token, reset_token_expiry FROM users WHERE email = ?", (email,))
+    user = c.fetchone()
+    if (user is None or not user[1] or not token or user[2] is None or user[2] <= time.time()
+            or not hmac.compare_digest(_hash_secret(token), user[1])):
+        conn.close()
+        return False
+    c.execute("UPDATE users SET password_hash = ?, reset_token = NULL, reset_token_expiry = NULL WHERE id = ?",
+              (hash_password(new_password), user[0]))
+    conn.commit()
+    conn.close()
+    return True
+
+def update_profile(user_id, username, email, phone):
+    conn = connect()
+    c = conn.cursor()
+    c.execute("UPDATE users SET username = ?, email = ?, phone = ? WHERE id = ?",
+              (username, email, phone, user_id))
+    conn.commit()
+    conn.close()
+
+def set_password(user_id, new_password):
+    conn = connect()
+    c = conn.cursor()
+    c.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hash_password(new_password), user_id))
+    conn.commit()
+    conn.close()
+
+def set_password_by_email(email, new_password):
+    conn = connect()
+    c = conn.cursor()
+    c.execute("UPDATE users SET password_hash = ? WHERE email = ?", (hash_password(new_password), email))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,318 @@
+"""Per-user rate limits and fair scheduling for expensive operations.
+
+Analysis, rewriting, audio tips and emails spend LLM quota, TTS and SMTP
+capacity shared by everyone, so each goes through ``admit``:
+
+- A token bucket per (user, operation) refills at rate_per_minute up to
+  burst tokens. A request that finds too few tokens is rejected at once
+  with the time until it could succeed, instead of joining a queue.
+- Each operation has a fixed number of concurrent slots. Requests that
+  find them taken wait in a queue per user, and freed slots go to the
+  waiting users round-robin, so one user with many queued requests only
+  delays the others by one request each. ``on_wait`` is told the
+  request's queue position whenever it changes. Callers that must not
+  block a thread while they wait (the API) pass ``wait=False`` and are
+  turned away at once when no slot is free.
+- Work started on a user's behalf before they ask for it (the
+  speculative rewrite) is charged with ``reserve``, which never waits and
+  tells the caller to skip the work when the user has no tokens left.
+
+Token buckets live in the shared state store, so a user's quota holds
+across API workers and app replicas; slots are per process, like the
+metrics. Counts of admitted, queued, rate-limited, busy and timed-out requests
+and wait times are kept for the admin tab and also recorded as metrics
+counters.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from . import config, metrics
+from .errors import AdmissionRejected
+from .state import get_state_store
+
+class _Ticket:
+    __slots__ = ('user', 'granted')
+
+    def __init__(self, user):
+        self.user = user
+        self.granted = False
+
+class FairQueue:
+    """Concurrency slots for one operation, granted round-robin across waiting users"""
+
+    def __init__(self, operation, concurrency):
+        self.operation = operation
+        self.concurrency = concurrency
+        self.active = 0
+        self._waiting = OrderedDict()   # user -> deque of tickets; the first user is served next
+        self._cond = threading.Condition()
+
+    def _dispatch(self):
+        while self.active < self.concurrency and self._waiting:
+            user, tickets = next(iter(self._waiting.items()))
+            tickets.popleft().granted = True
+            self.active += 1
+            if tickets:
+                self._waiting.move_to_end(user)
+            else:
+                del self._waiting[user]
+        self._cond.notify_all()
+
+    def _position(self, ticket):
+        """1-based position in the service order; the i-th ticket of a user goes out in round i"""
+        index = self._waiting[ticket.user].index(ticket)
+        position, before = 1, True
+        for user, tickets in self._waiting.items():
+            if user == ticket.user:
+                before = False
+                position += index
+            else:
+                position += min(len(tickets), index + 1 if before else index)
+        return position
+
+    def _withdraw(self, ticket):
+        if ticket.granted:
+            self.active -= 1
+            self._dispatch()
+            return
+        tickets = self._waiting[ticket.user]
+        tickets.remove(ticket)
+        if not tickets:
+            del self._waiting[ticket.user]
+
+    def acquire(self, user, timeout=None, on_wait=None):
+        """Wait for a slot, returns the seconds waited.
+
+        Raises TimeoutError after timeout seconds without one. on_wait(position)
+        is called outside the lock whenever the position changes, and with 0
+        once a request that had to wait is admitted.
+        """
+        ticket = _Ticket(user)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        last_position = None
+        with self._cond:
+            self._waiting.setdefault(user, deque()).append(ticket)
+            self._dispatch()
+        try:
+            while True:
+                with self._cond:
+                    if ticket.granted:
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No {self.operation} slot within {timeout}s")
+                    position = self._position(ticket)
+                    if position == last_position or on_wait is None:
+                        self._cond.wait(1.0 if remaining is None else min(remaining, 1.0))
+                        continue
+                last_position = position
+                on_wait(position)
+            if last_position is not None:
+                on_wait(0)
+        except BaseException:
+            with self._cond:
+                self._withdraw(ticket)
+            raise
+        return time.monotonic() - started
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._dispatch()
+
+    def snapshot(self):
+        with self._cond:
+            return {'active': self.active, 'waiting': sum(len(tickets) for tickets in self._waiting.values()),
+                    'waiting_users': len(self._waiting)}
+
+class AdmissionController:
+    """Token buckets per (user, operation) in the state store and a FairQueue per operation"""
+
+    def __init__(self, operations):
+        self.operations = operations
+        self._queues = {name: FairQueue(name, settings['concurrency']) for name, settings in operations.items()}
+        self._stats = {name: {'admitted': 0, 'queued': 0, 'rate_limited': 0, 'busy': 0, 'timed_out': 0,
+                              'skipped': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0} for name in operations}
+        self._lock = threading.Lock()
+
+    def _update_bucket(self, user, operation, change):
+        """Refill a user's bucket and apply change(tokens) -> tokens, returns the tokens before the change.
+
+        Buckets are [tokens, time] and expire once they would have refilled,
+        since a full bucket needs no state.
+        """
+        settings = self.operations[operation]
+        rate = settings['rate_per_minute'] / 60
+        before = None
+
+        def refill(bucket):
+            nonlocal before
+            now = time.time()
+            before = settings['burst'] if bucket is None else min(settings['burst'],
+                                                                  bucket[0] + (now - bucket[1]) * rate)
+            return [min(settings['burst'], change(before)), now]
+
+        get_state_store().update(f"admission:{operation}:{user}", refill, ttl=settings['burst'] / rate)
+        return before
+
+    def _take(self, user, operation, cost):
+        """Take cost tokens, returns 0 or the seconds until enough have refilled"""
+        tokens = self._update_bucket(user, operation, lambda tokens: tokens - cost if tokens >= cost else tokens)
+        if tokens < cost:
+            return (cost - tokens) / (self.operations[operation]['rate_per_minute'] / 60)
+        return 0
+
+    def _refund(self, user, operation, cost):
+        self._update_bucket(user, operation, lambda tokens: tokens + cost)
+
+    def _count(self, operation, stat, amount=1):
+        with self._lock:
+            self._stats[operation][stat] += amount
+        metrics.increment(f"admission_{stat}", amount, operation=operation)
+
+    def reserve(self, operation, user, cost=1):
+        """Take a user's tokens without waiting for a slot, returns whether there were enough.
+
+        For work started on the user's behalf before they ask for it, which
+        should be skipped rather than rejected when they are out of tokens.
+        """
+        cost = min(cost, self.operations[operation]['burst'])
+        if self._take(user, operation, cost):
+            self._count(operation, 'skipped')
+            return False
+        return True
+
+    def acquire(self, operation, user, cost=1, on_wait=None, prepaid=False, wait=True):
+        """Take a user's tokens and wait for a slot, or raise AdmissionRejected.
+
+        With prepaid the tokens were already taken by reserve(). Without
+        wait, a request that finds no free slot (or others already queued)
+        is rejected instead of queued.
+        """
+        # A request costing more than a full bucket could never be admitted
+        cost = min(cost, self.operations[operation]['burst'])
+        retry_after = 0 if prepaid else self._take(user, operation, cost)
+        if retry_after:
+            self._count(operation, 'rate_limited')
+            raise AdmissionRejected(f"Too many {operation} requests; try again in {math.ceil(retry_after)}s.",
+                                    operation, 'rate_limited', retry_after)
+
+        timeout = config.ADMISSION_CONFIG['queue_timeout_seconds'] if wait else 0
+        try:
+            waited = self._queues[operation].acquire(user, timeout, on_wait)
+        except TimeoutError:
+            self._refund(user, operation, cost)
+            if not wait:
+                self._count(operation, 'busy')
+                retry_after = config.ADMISSION_CONFIG['busy_retry_after_seconds']
+                raise AdmissionRejected(f"All {operation} slots are busy; try again in {retry_after}s.",
+                                        operation, 'busy', retry_after)
+            self._count(operation, 'timed_out')
+            raise AdmissionRejected(f"The {operation} queue is busy; please try again shortly.",
+                                    operation, 'queue_timeout', timeout)
+        except BaseException:
+            self._refund(user, operation, cost)
+            raise
+
+        self._count(operation, 'admitted')
+        if waited > 0.001:
+            with self._lock:
+                stats = self._stats[operation]
+                stats['queued'] += 1
+                stats['wait_seconds'] += waited
+                stats['max_wait_seconds'] = max(stats['max_wait_seconds'], waited)
+            metrics.increment('admission_queued', operation=operation)
+            if metrics.is_enabled():
+                metrics.observe(f"admission_wait_{operation}", waited)
+
+    def release(self, operation):
+        self._queues[operation].release()
+
+    def snapshot(self):
+        """Per-operation limits, current load and counts, as a list of dicts"""
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        rows = []
+        for name, settings in self.operations.items():
+            s = stats[name]
+            rows.append({
+                'operation': name,
+                'rate_per_minute': settings['rate_per_minute'],
+                'burst': settings['burst'],
+                'concurrency': settings['concurrency'],
+                **self._queues[name].snapshot(),
+                'admitted': s['admitted'],
+                'queued': s['queued'],
+                'rate_limited': s['rate_limited'],
+                'busy': s['busy'],
+                'timed_out': s['timed_out'],
+                'skipped': s['skipped'],
+                'avg_wait_ms': s['wait_seconds'] / s['queued'] * 1000 if s['queued'] else 0.0,
+                'max_wait_ms': s['max_wait_seconds'] * 1000
+            })
+        return rows
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_admission_controller():
+    """The process-wide controller, built from ADMISSION_CONFIG on first use"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(config.ADMISSION_CONFIG['operations'])
+        return _controller
+
+def reset_admission_controller():
+    """Drop the controller so the next admission rebuilds it from the current config"""
+    global _controller
+    with _controller_lock:
+        _controller = None
+
+def admission_snapshot():
+    return get_admission_controller().snapshot()
+
+def reserve(operation, user, cost=1):
+    """Charge a user's bucket for background work without queuing; False when they are out of tokens.
+
+    Pair with ``admit(..., prepaid=True)`` around the work itself, so it
+    still waits its turn for a slot without being charged twice.
+    """
+    if not config.ADMISSION_CONFIG['enabled']:
+        return True
+    return get_admission_controller().reserve(operation, user, cost)
+
+class admit:
+    """Context manager holding one of an operation's slots for a user:
+    ``with admit('rewrite', user_id, on_wait=show_position): ...``
+
+    Raises AdmissionRejected on entry when the user is over the rate limit
+    or no slot frees up within queue_timeout_seconds (at once, without
+    wait). With prepaid the tokens were already taken by reserve(). A
+    no-op while ADMISSION_CONFIG['enabled'] is off.
+    """
+    __slots__ = ('operation', 'user', 'cost', 'on_wait', 'prepaid', 'wait', 'controller')
+
+    def __init__(self, operation, user, cost=1, on_wait=None, prepaid=False, wait=True):
+        self.operation = operation
+        self.user = user
+        self.cost = cost
+        self.on_wait = on_wait
+        self.prepaid = prepaid
+        self.wait = wait
+        self.controller = None
+
+    def __enter__(self):
+        if config.ADMISSION_CONFIG['enabled']:
+            self.controller = get_admission_controller()
+            self.controller.acquire(self.operation, self.user, self.cost, self.on_wait, self.prepaid, self.wait)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.controller is not None:
+            self.controller.release(self.operation)
+            self.controller = None
+        return False
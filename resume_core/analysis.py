@@ -0,0 +1,389 @@
+"""Feedback and rewriting through the configured LLM backend."""
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from . import config
+from . import metrics
+from .admission import admit, reserve
+from .documents import get_document
+from .history import get_previous_analysis
+from .llm_backends import route_backend
+from .metrics import timed
+from .parsing import parse_resume
+from .preprocessing import compact_resume_text, estimate_tokens
+from .state import get_state_store
+
+def get_llm_backend(prompt_tokens=0):
+    """Backend for a request of the given size, per LLM_CONFIG"""
+    settings = config.LLM_CONFIG
+    return route_backend(prompt_tokens, settings['backend'], settings['cheap_backend'],
+                         settings['cheap_max_tokens'], replay_dir=settings['replay_dir'],
+                         fallback=settings['fallback'])
+
+# Structured feedback sections, in display order
+FEEDBACK_SECTIONS = [
+    ('strengths', '✅ Strengths'),
+    ('improvements', '⚠️ Areas for Improvement'),
+    ('recommendations', '🚀 Specific Recommendations'),
+    ('missing_elements', '🔍 Missing Elements')
+]
+JSON_OBJECT_RE = re.compile(r'\{.*\}', re.S)
+
+def parse_feedback_json(raw):
+    """Parse and validate the LLM's JSON feedback, raises ValueError if invalid"""
+    match = JSON_OBJECT_RE.search(raw or '')
+    if not match:
+        raise ValueError("No JSON object in model response")
+    data = json.loads(match.group(0))
+    if not isinstance(data, dict):
+        raise ValueError("Feedback must be a JSON object")
+
+    structured = {}
+    for key, _ in FEEDBACK_SECTIONS:
+        items = data.get(key, [])
+        if isinstance(items, str):
+            items = [items]
+        if not isinstance(items, list):
+            raise ValueError(f"'{key}' must be a list of strings")
+        structured[key] = [str(item).strip() for item in items if str(item).strip()]
+
+    try:
+        structured['score'] = max(0, min(100, int(round(float(data['score'])))))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("'score' must be a number between 0 and 100")
+    return structured
+
+def render_feedback_markdown(structured, target_role):
+    """Render structured feedback as the markdown shown in the app"""
+    if structured.get('error'):
+        return "Error generating feedback"
+    lines = [f"**Resume Analysis for {target_role} Position**", "",
+             f"**🎯 Overall Score: {structured['score']}/100**"]
+    for key, title in FEEDBACK_SECTIONS:
+        if structured.get(key):
+            lines += ["", f"**{title}:**"] + [f"• {item}" for item in structured[key]]
+    return "\n".join(lines)
+
+def build_feedback_prompt(prompt_text, target_role):
+    """Prompt asking the model for structured JSON feedback"""
+    return f"""
+        Analyze this resume for a {target_role} position.
+
+        Resume Text:
+        {prompt_text}
+
+        Respond with a single JSON object and nothing else, using this schema:
+        {{
+            "strengths": ["overall strengths"],
+            "improvements": ["areas for improvement"],
+            "recommendations": ["specific recommendations"],
+            "missing_elements": ["key missing elements for the {target_role} role"],
+            "score": <integer score out of 100>
+        }}
+        """
+
+@timed('get_ai_feedback')
+def get_structured_feedback(resume_text, target_role, parsed=None):
+    """Get AI feedback as a dict of sections and score from the configured LLM backend.
+
+    parsed is the resume's ParsedResume, if the caller has one; the local
+    template backend scores from it instead of parsing the text again.
+    Failures don't raise: the dict has empty sections, score 0 and an
+    'error' message, so one failed role doesn't sink a multi-role batch.
+    """
+    try:
+        # Strip extraction noise and fit the resume to the prompt budget
+        prompt_text, token_report = compact_resume_text(resume_text, config.PROMPT_CONFIG['max_resume_tokens'])
+        prompt = build_feedback_prompt(prompt_text, target_role)
+
+        backend = get_llm_backend(estimate_tokens(prompt))
+        with metrics.span('llm_complete'):
+            raw = backend.complete(
+                [{"role": "user", "content": prompt}],
+                task='feedback',
+                context={'resume_text': resume_text, 'target_role': target_role, 'parsed': parsed},
+                json_mode=True
+            )
+
+        structured = parse_feedback_json(raw)
+        structured['token_report'] = token_report
+        structured['backend'] = backend.name
+        return structured
+
+    except Exception as e:
+        structured = {key: [] for key, _ in FEEDBACK_SECTIONS}
+        structured.update({'score': 0, 'error': str(e)})
+        return structured
+
+def get_ai_feedback(resume_text, target_role):
+    """Get AI feedback as (markdown, score)"""
+    structured = get_structured_feedback(resume_text, target_role)
+    return render_feedback_markdown(structured, target_role), structured['score']
+
+def _section_text(section):
+    lines = [section.heading] if section.heading else []
+    lines += [f"• {line}" if kind == 'bullet' else line for kind, line in section.lines if kind != 'blank']
+    return '\n'.join(lines)
+
+def section_fingerprints(parsed):
+    """{section key: (hash of the section's text, section)}, keys numbered when a name repeats"""
+    fingerprints = {}
+    for section in parsed.sections:
+        key = section.name
+        count = 2
+        while key in fingerprints:
+            key = f"{section.name} #{count}"
+            count += 1
+        fingerprints[key] = (hashlib.sha256(_section_text(section).encode()).hexdigest(), section)
+    return fingerprints
+
+def build_revision_prompt(target_role, previous_structured, changed_text, removed):
+    """Prompt asking the model to update earlier feedback for the changed sections only"""
+    earlier = {key: previous_structured.get(key, []) for key, _ in FEEDBACK_SECTIONS}
+    earlier['score'] = previous_structured.get('score', 0)
+    removed_note = f"\n        Removed sections: {', '.join(removed)}\n" if removed else ""
+    return f"""
+        You analyzed a resume for a {target_role} position and gave this feedback:
+        {json.dumps(earlier)}
+
+        The candidate has revised the resume. These sections are new or changed:
+        {changed_text}
+        {removed_note}
+        Every other section is unchanged. Update the feedback: keep the points about unchanged
+        sections, revise or drop the points the changes address, and add points about the new text.
+        Respond with a single JSON object and nothing else, using the same schema as the feedback
+        above, with an updated integer score out of 100.
+        """
+
+@timed('get_revision_feedback')
+def _revise_feedback(prompt, resume_text, target_role, parsed):
+    """Send a revision prompt and parse the updated feedback, raises on failure"""
+    backend = get_llm_backend(estimate_tokens(prompt))
+    with metrics.span('llm_complete'):
+        raw = backend.complete(
+            [{"role": "user", "content": prompt}],
+            task='revision',
+            context={'resume_text': resume_text, 'target_role': target_role, 'parsed': parsed},
+            json_mode=True
+        )
+    structured = parse_feedback_json(raw)
+    structured['backend'] = backend.name
+    return structured
+
+def get_revision_feedback(resume_text, target_role, parsed, previous, previous_parsed):
+    """Feedback for a revised resume that reuses the feedback on its previous version.
+
+    previous is the earlier analysis from get_previous_analysis. When no
+    section changed its feedback is returned without an LLM call;
+    otherwise only the changed sections and the earlier feedback are sent.
+    When most sections changed, that prompt would be no smaller than a full
+    analysis, or the revision fails, the whole resume is analyzed instead
+    (and timed as get_ai_feedback only). The result's 'revision' entry lists
+    what was reused, and for an incremental analysis the prompt sent.
+    """
+    old = section_fingerprints(previous_parsed)
+    new = section_fingerprints(parsed)
+    changed = [key for key, (digest, _) in new.items() if key not in old or old[key][0] != digest]
+    removed = [key for key in old if key not in new]
+    revision = {'previous_record_id': previous['record_id'], 'changed_sections': changed,
+                'removed_sections': removed, 'unchanged_sections': [key for key in new if key not in changed]}
+
+    if not changed and not removed:
+        structured = {key: list(previous['structured'].get(key, [])) for key, _ in FEEDBACK_SECTIONS}
+        structured.update(score=previous['structured']['score'], backend=previous['structured'].get('backend'),
+                          revision=dict(revision, mode='reused'))
+        metrics.increment('revision_analyses', mode='reused')
+        return structured
+
+    structured = None
+    if len(changed) + len(removed) <= config.REVISION_CONFIG['max_changed_fraction'] * len(new):
+        max_tokens = config.PROMPT_CONFIG['max_resume_tokens']
+        changed_text = '\n\n'.join(_section_text(new[key][1]) for key in changed)
+        prompt_text, token_report = compact_resume_text(changed_text, max_tokens)
+        prompt = build_revision_prompt(target_role, previous['structured'], prompt_text, removed)
+        # Savings are counted on whole prompts, the earlier feedback included
+        full_tokens = estimate_tokens(build_feedback_prompt(compact_resume_text(resume_text, max_tokens)[0],
+                                                            target_role))
+        prompt_tokens = estimate_tokens(prompt)
+        if prompt_tokens < full_tokens:
+            try:
+                structured = _revise_feedback(prompt, resume_text, target_role, parsed)
+            except Exception:
+                structured = None
+    if structured is None:
+        structured = get_structured_feedback(resume_text, target_role, parsed)
+        structured['revision'] = dict(revision, mode='full')
+        metrics.increment('revision_analyses', mode='full')
+        return structured
+
+    token_report.update(tokens_before=full_tokens, tokens_after=prompt_tokens, tokens_saved=full_tokens - prompt_tokens)
+    structured.update(token_report=token_report, revision=dict(revision, mode='incremental', prompt=prompt))
+    metrics.increment('revision_analyses', mode='incremental')
+    return structured
+
+def analyze_upload(user_id, filename, document, target_role):
+    """Feedback for an uploaded resume, incremental when the user analyzed an earlier version of the file"""
+    if config.REVISION_CONFIG['enabled']:
+        previous = get_previous_analysis(user_id, filename, target_role)
+        previous_document = get_document(previous['document_id']) if previous else None
+        if previous_document and previous_document['parsed'] is not None:
+            return get_revision_feedback(document['text'], target_role, document['parsed'], previous,
+                                         previous_document['parsed'])
+    return get_structured_feedback(document['text'], target_role, document['parsed'])
+
+def parse_target_roles(text):
+    """Split a comma, semicolon or newline separated list of roles"""
+    roles = []
+    seen = set()
+    for role in re.split(r'[,;\n]', text or ''):
+        role = role.strip()
+        if role and role.lower() not in seen:
+            seen.add(role.lower())
+            roles.append(role)
+    return roles[:config.MULTI_ROLE_CONFIG['max_roles']]
+
+def analyze_resume_for_roles(resume_text, target_roles, parsed=None):
+    """Get AI feedback for several roles concurrently from one extracted text and one parse"""
+    parsed = parsed or parse_resume(resume_text)
+    workers = max(1, min(config.MULTI_ROLE_CONFIG['max_workers'], len(target_roles)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(lambda role: get_structured_feedback(resume_text, role, parsed),
+                                     target_roles))
+    return [
+        {'target_role': role, 'feedback': render_feedback_markdown(structured, role),
+         'score': structured['score'], 'structured': structured}
+        for role, structured in zip(target_roles, outcomes)
+    ]
+
+def build_analysis_conversation(resume_text, target_role, structured):
+    """The analysis exchange as chat messages, reused as context for follow-ups.
+
+    The prompt is the one that was sent, so the provider can reuse its
+    cached prompt prefix: an incremental analysis's stored prompt, or the
+    compacted resume and prompt rebuilt exactly. The reply is kept as
+    compact JSON rather than the rendered markdown. An incremental prompt
+    held only the changed sections, so the conversation then ends with the
+    whole compacted resume for the follow-up to build on.
+    """
+    prompt_text, _ = compact_resume_text(resume_text, config.PROMPT_CONFIG['max_resume_tokens'])
+    reply = {key: structured.get(key, []) for key, _ in FEEDBACK_SECTIONS}
+    reply['score'] = structured.get('score', 0)
+    sent = (structured.get('revision') or {}).get('prompt')
+    conversation = [
+        {"role": "user", "content": sent or build_feedback_prompt(prompt_text, target_role)},
+        {"role": "assistant", "content": json.dumps(reply)}
+    ]
+    if sent:
+        conversation.append({"role": "user", "content": f"The complete revised resume:\n\n{prompt_text}"})
+    return conversation
+
+@timed('rewrite_resume')
+def rewrite_resume(resume_text, target_role, feedback, conversation=None):
+    """Rewrite a resume for the target role with the configured LLM backend.
+
+    With a conversation from build_analysis_conversation the rewrite is a
+    short follow-up to the analysis instead of a second full prompt.
+    """
+    if conversation:
+        request = (f"Rewrite the resume above for the {target_role} role, applying your feedback. "
+                   "Use **HEADINGS** and • bullet points.")
+        if conversation[-1]['role'] == 'user':
+            # The conversation ends with the resume itself; the request joins that message
+            messages = conversation[:-1] + [{"role": "user",
+                                             "content": f"{conversation[-1]['content']}\n\n{request}"}]
+        else:
+            messages = conversation + [{"role": "user", "content": request}]
+    else:
+        messages = [{
+            "role": "user",
+            "content": f"Rewrite this resume for a {target_role} position.\n\nResume Text:\n{resume_text}"
+                       f"\n\nFeedback to apply:\n{feedback}"
+        }]
+
+    backend = get_llm_backend(sum(estimate_tokens(m['content']) for m in messages))
+    return backend.complete(messages, task='rewrite',
+                            context={'resume_text': resume_text, 'target_role': target_role})
+
+# Lives here rather than in the UI module so Streamlit reruns share one pool
+_rewrite_executor = ThreadPoolExecutor(max_workers=config.REWRITE_CONFIG['max_workers'])
+
+def rewrite_key(analysis):
+    return (analysis.get('document_id') or analysis['filename'], analysis['target_role'])
+
+def analysis_resume_text(analysis):
+    """Resume text for an analysis dict, loaded from the document store when only document_id is kept"""
+    if analysis.get('resume_text') is not None:
+        return analysis['resume_text']
+    document = get_document(analysis['document_id']) if analysis.get('document_id') else None
+    return document['text'] if document else ""
+
+def analysis_parsed_resume(analysis):
+    """The stored parse of an analysis's resume, None when the document isn't stored"""
+    document = get_document(analysis['document_id']) if analysis.get('document_id') else None
+    return document['parsed'] if document else None
+
+def _rewrite_cache_key(analysis):
+    feedback_hash = hashlib.sha256(analysis['feedback'].encode()).hexdigest()[:16]
+    return f"rewrite:{analysis.get('document_id') or analysis['filename']}:{analysis['target_role']}:{feedback_hash}"
+
+def _cache_rewrite(analysis, rewritten):
+    if rewritten:
+        get_state_store().set(_rewrite_cache_key(analysis), rewritten,
+                              ttl=config.STATE_STORE_CONFIG['cache_ttl_seconds'])
+
+def start_speculative_rewrite(analysis, user=None):
+    """Start rewriting in the background so "Rewrite Resume" is near-instant.
+
+    The rewrite is charged to the user's rewrite bucket up front and skipped
+    when they have no tokens left; it then waits for a rewrite slot like a
+    requested one. The result goes to the shared state store, so a request
+    served by another replica finds it too.
+    """
+    if not config.REWRITE_CONFIG['speculative'] or not analysis.get('structured'):
+        return None
+    if get_state_store().get(_rewrite_cache_key(analysis)) is not None:
+        return None
+    if not reserve('rewrite', user):
+        metrics.increment('speculative_rewrites_skipped')
+        return None
+    resume_text = analysis_resume_text(analysis)
+    conversation = build_analysis_conversation(resume_text, analysis['target_role'], analysis['structured'])
+
+    def run():
+        with admit('rewrite', user, prepaid=True):
+            return rewrite_resume(resume_text, analysis['target_role'], analysis['feedback'], conversation)
+
+    future = _rewrite_executor.submit(run)
+
+    def cache_result(done):
+        if done.exception() is None:
+            _cache_rewrite(analysis, done.result())
+
+    future.add_done_callback(cache_result)
+    return future
+
+def get_rewritten_resume(analysis, speculative=None, admission=None):
+    """Use a cached or matching speculative rewrite if there is one, otherwise rewrite now.
+
+    admission (e.g. an ``admit('rewrite', ...)``) is entered only around a
+    rewrite done now, since a speculative one was charged when it started.
+    """
+    cached = get_state_store().get(_rewrite_cache_key(analysis))
+    if cached is not None:
+        return cached
+    if speculative and speculative[0] == rewrite_key(analysis):
+        try:
+            return speculative[1].result(timeout=config.REWRITE_CONFIG['wait_seconds'])
+        except Exception:
+            pass
+    resume_text = analysis_resume_text(analysis)
+    conversation = None
+    if analysis.get('structured'):
+        conversation = build_analysis_conversation(resume_text, analysis['target_role'], analysis['structured'])
+    with admission or nullcontext():
+        rewritten = rewrite_resume(resume_text, analysis['target_role'], analysis['feedback'], conversation)
+    _cache_rewrite(analysis, rewritten)
+    return rewritten
@@ -0,0 +1,107 @@
+"""Aggregates for the dashboards, and a cache for the charts drawn from them.
+
+Admin aggregates are read from the analytics snapshot, per-user ones from
+the user's own history. Chart figures are cached as JSON in the state
+store under a hash of the data they plot, so reruns that show the same
+numbers skip building the figure.
+"""
+import collections
+import datetime
+import hashlib
+import json
+
+from . import config, metrics
+from .backup import snapshot_connect, snapshot_time
+from .history import get_user_history
+from .state import get_state_store
+
+SUCCESS_SCORE = 70  # Scores below this are shown in red in emailed reports
+
+def admin_overview(days=30, top_roles=5, max_users=200):
+    """Totals, recent activity, popular roles and per-user activity"""
+    conn = snapshot_connect()
+    snapshot_at = snapshot_time()
+    c = conn.cursor()
+    week_ago = ('-7 days',)
+
+    c.execute("SELECT COUNT(*), COUNT(CASE WHEN created_at >= datetime('now', ?) THEN 1 END) FROM users",
+              week_ago)
+    total_users, new_users = c.fetchone()
+    c.execute("""SELECT COUNT(*), COUNT(CASE WHEN created_at >= datetime('now', ?) THEN 1 END),
+                        AVG(score), AVG(CASE WHEN created_at >= datetime('now', ?) THEN score END)
+                 FROM feedback_history""", week_ago * 2)
+    total_analyses, new_analyses, avg_score, recent_avg_score = c.fetchone()
+
+    c.execute("""SELECT date(created_at), COUNT(*) FROM users
+                 WHERE created_at >= date('now', ?) GROUP BY date(created_at)""", (f"-{days - 1} days",))
+    registrations = dict(c.fetchall())
+    today = datetime.date.today()
+    daily = [(day.isoformat(), registrations.get(day.isoformat(), 0))
+             for day in (today - datetime.timedelta(days=offset) for offset in range(days - 1, -1, -1))]
+
+    c.execute("""SELECT target_role, COUNT(*) FROM feedback_history
+                 GROUP BY target_role ORDER BY COUNT(*) DESC LIMIT ?""", (top_roles,))
+    roles = c.fetchall()
+
+    c.execute("""SELECT u.id, u.username, u.email, u.phone, COUNT(f.id), MAX(f.created_at)
+                 FROM users u LEFT JOIN feedback_history f ON f.user_id = u.id
+                 GROUP BY u.id ORDER BY u.id LIMIT ?""", (max_users,))
+    users = [{'ID': row[0], 'Username': row[1], 'Email': row[2], 'Phone': row[3], 'Analyses': row[4],
+              'Last Active': (row[5] or '')[:10]} for row in c.fetchall()]
+    conn.close()
+
+    return {
+        'snapshot_at': snapshot_at,
+        'total_users': total_users,
+        'new_users': new_users,
+        'total_analyses': total_analyses,
+        'new_analyses': new_analyses,
+        'avg_score': avg_score,
+        'recent_avg_score': recent_avg_score,
+        'daily_registrations': daily,
+        'popular_roles': roles,
+        'users': users
+    }
+
+def user_overview(user_id):
+    """Score trend, target roles and summary numbers for one user's analyses"""
+    # Oldest first; id breaks ties between analyses saved in the same second
+    history = sorted((row for row in get_user_history(user_id) if row[2] is not None),
+                     key=lambda row: (row[3], row[4]))
+    scores = [row[2] for row in history]
+    week_ago = (datetime.datetime.utcnow() - datetime.timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S')
+    roles = collections.Counter(row[1] for row in history)
+    return {
+        'score_trend': [(row[3], row[2]) for row in history],
+        'roles': roles.most_common(),
+        'total_analyses': len(history),
+        'new_analyses': sum(1 for row in history if row[3] >= week_ago),
+        'avg_score': sum(scores) / len(scores) if scores else None,
+        'previous_avg_score': sum(scores[:-1]) / (len(scores) - 1) if len(scores) > 1 else None,
+        'success_rate': 100 * sum(1 for score in scores if score >= SUCCESS_SCORE) / len(scores) if scores else None,
+        'best_score': max(scores) if scores else None,
+        'latest_score': scores[-1] if scores else None
+    }
+
+def cached_chart_spec(name, data, options, build):
+    """Figure JSON for a chart, from the cache or from build() on a miss.
+
+    The key hashes the chart's data and options, so a newly saved analysis
+    changes the key and the chart is rebuilt on the next rerun; figures for
+    old data simply expire.
+    """
+    settings = config.CHART_CACHE_CONFIG
+    if not settings['enabled']:
+        return build()
+    digest = hashlib.sha256(json.dumps([settings['version'], data, options], sort_keys=True,
+                                       default=str).encode()).hexdigest()
+    key = f"chart:{name}:{digest[:32]}"
+    store = get_state_store()
+    spec = store.get(key)
+    if spec is not None:
+        metrics.increment('chart_cache_hits')
+        return spec
+    metrics.increment('chart_cache_misses')
+    spec = build()
+    store.set(key, spec, ttl=settings['ttl_seconds'])
+    return spec
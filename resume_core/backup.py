@@ -0,0 +1,177 @@
+"""Online backups, restore, and a read-only snapshot for analytics.
+
+Backups use SQLite's backup API a few pages at a time, so writers are only
+blocked for one short step rather than for the whole copy, and the result
+is always a consistent database (copying the file while the app runs can
+tear it). Backups, including the safety copies taken before a restore,
+are rotated in BACKUP_CONFIG['dir']. The analytics snapshot is a backup
+that the backup scheduler re-takes every snapshot_max_age_seconds; it is
+opened read-only, so admin queries never contend with live writes and
+never wait for a copy.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from . import config
+from .db import connect
+from .state import claim_lease
+
+BACKUP_NAME_RE = re.compile(r'^(?:resume_bot|pre-restore)-(\d{8}-\d{6})\.db$')
+
+class _TooManyRestarts(Exception):
+    pass
+
+def _copy_database(source, dest_path):
+    """Back up an open connection to dest_path, replacing it atomically.
+
+    A stepped backup starts over whenever another connection writes, so on
+    a busy database it falls back, after max_restarts, to a single step
+    that holds a read lock for the whole (short) copy.
+    """
+    settings = config.BACKUP_CONFIG
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > settings['max_restarts']:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+
+    dest = sqlite3.connect(tmp_path)
+    try:
+        try:
+            source.backup(dest, pages=settings['pages_per_step'], progress=progress,
+                          sleep=settings['step_sleep_seconds'])
+        except _TooManyRestarts:
+            source.backup(dest, pages=-1)
+    finally:
+        dest.close()
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+def list_backups():
+    """Backup files, scheduled and pre-restore alike, newest first"""
+    directory = config.BACKUP_CONFIG['dir']
+    if not os.path.isdir(directory):
+        return []
+    backups = [(match.group(1), os.path.join(directory, name))
+               for name in os.listdir(directory) if (match := BACKUP_NAME_RE.match(name))]
+    return [path for _, path in sorted(backups, reverse=True)]
+
+def backup_database(dest_path=None):
+    """Take an online backup and rotate old ones, returns the backup path"""
+    settings = config.BACKUP_CONFIG
+    dest_path = dest_path or os.path.join(settings['dir'], f"resume_bot-{time.strftime('%Y%m%d-%H%M%S')}.db")
+    source = connect()
+    try:
+        _copy_database(source, dest_path)
+    finally:
+        source.close()
+    for old_path in list_backups()[settings['keep']:]:
+        os.remove(old_path)
+    return dest_path
+
+def restore_database(backup_path):
+    """Replace the live database's contents with a backup.
+
+    The backup must pass an integrity check, and the current database is
+    backed up first, so a restore can itself be undone. Returns the path
+    of that safety backup.
+    """
+    backup = sqlite3.connect(f"file:{os.path.abspath(backup_path)}?mode=ro", uri=True)
+    try:
+        result = backup.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != 'ok':
+            raise ValueError(f"{backup_path} failed its integrity check: {result}")
+        safety_path = backup_database(os.path.join(config.BACKUP_CONFIG['dir'],
+                                                   f"pre-restore-{time.strftime('%Y%m%d-%H%M%S')}.db"))
+        live = connect()
+        try:
+            backup.backup(live)
+        finally:
+            live.close()
+    finally:
+        backup.close()
+    return safety_path
+
+def _snapshot_path():
+    return os.path.join(config.BACKUP_CONFIG['dir'], 'analytics_snapshot.db')
+
+_snapshot_lock = threading.Lock()
+
+def refresh_snapshot(max_age=None):
+    """Re-take the analytics snapshot if it is older than max_age seconds, returns its time.
+
+    Called by the backup scheduler; readers only open the snapshot.
+    """
+    max_age = config.BACKUP_CONFIG['snapshot_max_age_seconds'] if max_age is None else max_age
+    path = _snapshot_path()
+    with _snapshot_lock:
+        if not os.path.exists(path) or time.time() - os.path.getmtime(path) > max_age:
+            source = connect()
+            try:
+                _copy_database(source, path)
+            finally:
+                source.close()
+    return os.path.getmtime(path)
+
+def snapshot_time():
+    """When the analytics snapshot was taken, None before the first one"""
+    path = _snapshot_path()
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+def snapshot_connect():
+    """A read-only connection to the analytics snapshot.
+
+    It is not refreshed here; only the first call in a fresh deployment,
+    before the scheduler has run, takes a snapshot.
+    """
+    if snapshot_time() is None:
+        refresh_snapshot()
+    return sqlite3.connect(f"file:{os.path.abspath(_snapshot_path())}?mode=ro", uri=True)
+
+_scheduler = None
+_lock = threading.Lock()
+
+def start_backup_scheduler(interval=None):
+    """Keep the analytics snapshot fresh and take a backup every interval seconds, on a background thread.
+
+    One thread per process. Each process refreshes its snapshot file when
+    it is out of date; of all the processes sharing the state store only
+    the one holding the scheduler lease takes backups, and only while
+    BACKUP_CONFIG['enabled'] is on.
+    """
+    global _scheduler
+    with _lock:
+        if _scheduler is not None:
+            return _scheduler
+        interval = interval or config.BACKUP_CONFIG['interval_seconds']
+
+        def loop():
+            next_backup = time.monotonic() + interval
+            while True:
+                try:
+                    refresh_snapshot()
+                except Exception:
+                    pass  # Retried at the next tick
+                if time.monotonic() >= next_backup:
+                    next_backup += interval
+                    try:
+                        if config.BACKUP_CONFIG['enabled'] and claim_lease('backup-scheduler', interval * 2):
+                            backup_database()
+                    except Exception:
+                        pass  # Retried at the next interval
+                time.sleep(max(0.0, min(config.BACKUP_CONFIG['snapshot_max_age_seconds'],
+                                        next_backup - time.monotonic())))
+
+        _scheduler = threading.Thread(target=loop, name='backup-scheduler', daemon=True)
+        _scheduler.start()
+        return _scheduler
@@ -0,0 +1,358 @@
+"""Command-line batch analysis of a directory of resumes, and maintenance.
+
+    python -m resume_core analyze DIR --role "Data Scientist" [--role ...]
+        [--backend template] [--concurrency 4] [--workers N]
+        [--output results.csv|results.jsonl] [--checkpoint FILE] --user-id ID
+    python -m resume_core retention [--days 180] [--vacuum-pages 1000]
+        [--enable-incremental-vacuum]
+    python -m resume_core backup [--dest FILE] [--list]
+    python -m resume_core restore BACKUP
+    python -m resume_core index
+
+PDF/DOCX files under DIR are extracted in parallel worker processes (files
+already in the document store are not re-extracted), a window of
+--batch-size files at a time, analyzed for every role with at most
+--concurrency LLM calls in flight, and written to the database and the
+output file in batched transactions. Each committed batch is appended to
+the checkpoint, so an interrupted run started again with the same
+arguments skips the work already done.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from io import BytesIO
+
+from . import config
+from .analysis import FEEDBACK_SECTIONS, get_structured_feedback, parse_target_roles, render_feedback_markdown
+from .backup import backup_database, list_backups, restore_database
+from .db import init_database
+from .documents import find_documents, save_extracted_documents
+from .errors import ResumeBotError
+from .extraction import DOCX_MIME, PDF_MIME, check_upload_size, extract_resume_text
+from .history import save_feedback_records
+from .matching import update_document_index
+from .parsing import parse_resume
+from .retention import archive_old_feedback, enable_incremental_vacuum, incremental_vacuum, purge_old_documents
+
+MIME_TYPES = {'.pdf': PDF_MIME, '.docx': DOCX_MIME}
+OUTPUT_FIELDS = ['path', 'target_role', 'score', 'record_id', 'document_id', 'backend', 'error']
+
+def find_resumes(directory):
+    """PDF and DOCX files under a directory, in a stable order"""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in MIME_TYPES:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _extract_file(path):
+    """Worker process: read and extract one file"""
+    mime_type = MIME_TYPES[os.path.splitext(path)[1].lower()]
+    item = {'path': path, 'filename': os.path.basename(path), 'mime_type': mime_type}
+    try:
+        # Oversized files are rejected before they are read into memory
+        check_upload_size(os.path.getsize(path))
+        with open(path, 'rb') as f:
+            file_bytes = f.read()
+        item.update(content_hash=hashlib.sha256(file_bytes).hexdigest(), file_bytes=file_bytes)
+        item['text'] = extract_resume_text(BytesIO(file_bytes), mime_type)
+        item['parsed'] = parse_resume(item['text'])
+    except ResumeBotError as e:
+        item['error'] = str(e)
+    return item
+
+def load_checkpoint(path):
+    """(content_hash, role) pairs finished by an earlier run"""
+    done = set()
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A line torn by an interruption
+                done.add((entry['content_hash'], entry['target_role']))
+    return done
+
+class ResultWriter:
+    """Appends result rows to a CSV or JSONL file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = 'jsonl' if path and path.endswith(('.jsonl', '.json')) else 'csv'
+        self.file = None
+        if path:
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self.file = open(path, 'a', encoding='utf-8', newline='')
+            if self.format == 'csv':
+                self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+                if is_new:
+                    self.writer.writeheader()
+
+    def write(self, rows):
+        if not self.file:
+            return
+        for row in rows:
+            if self.format == 'csv':
+                self.writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+def analyze_directory(directory, roles, user_id, concurrency=4, workers=None, batch_size=50,
+                      output=None, checkpoint=None, log=print):
+    """Analyze every resume under directory for every role, returns run statistics.
+
+    Files go through in windows of batch_size: a window is extracted while
+    the previous one is analyzed, so at most two windows of text are held
+    in memory however large the directory is.
+    """
+    started = time.perf_counter()
+    paths = find_resumes(directory)
+    done = load_checkpoint(checkpoint)
+    stats = {'files': len(paths), 'extracted': 0, 'reused': 0, 'extraction_errors': 0,
+             'analyses': 0, 'analysis_errors': 0, 'skipped': 0}
+    extract_span = []   # When extraction started and last finished; windows overlap with analysis
+
+    # Files whose every role is checkpointed need no further work
+    hashes = {path: _hash_file(path) for path in paths}
+    pending_paths = [path for path in paths if any((hashes[path], role) not in done for role in roles)]
+    stats['skipped'] = (len(paths) - len(pending_paths)) * len(roles)
+    total = sum(1 for path in pending_paths for role in roles if (hashes[path], role) not in done)
+
+    def submit_window(pool, window):
+        """Stored documents of a window are reused, the rest are sent to the extraction processes"""
+        stored = find_documents({hashes[path] for path in window})
+        documents = {}
+        futures = []
+        for path in window:
+            if hashes[path] in stored:
+                document_id, text, parsed = stored[hashes[path]]
+                documents[path] = {'id': document_id, 'text': text, 'parsed': parsed, 'content_hash': hashes[path]}
+                stats['reused'] += 1
+            else:
+                futures.append(pool.submit(_extract_file, path))
+        if futures and not extract_span:
+            extract_span[:] = [time.perf_counter()] * 2
+        return documents, futures
+
+    def collect_window(documents, futures):
+        extracted = []
+        for future in as_completed(futures):
+            item = future.result()
+            if 'error' in item:
+                log(f"  ! {item['path']}: {item['error']}")
+                stats['extraction_errors'] += 1
+            else:
+                extracted.append(item)
+        if extracted:
+            ids = save_extracted_documents(extracted)
+            for item in extracted:
+                documents[item['path']] = {'id': ids[item['content_hash']], 'text': item['text'],
+                                           'parsed': item['parsed'], 'content_hash': item['content_hash']}
+            stats['extracted'] += len(extracted)
+        if futures:
+            extract_span[1] = time.perf_counter()
+        return documents
+
+    def pending_tasks(pool):
+        windows = [pending_paths[start:start + batch_size] for start in range(0, len(pending_paths), batch_size)]
+        upcoming = submit_window(pool, windows[0]) if windows else None
+        for index in range(len(windows)):
+            current = upcoming
+            if index + 1 < len(windows):
+                upcoming = submit_window(pool, windows[index + 1])
+            for path, document in collect_window(*current).items():
+                for role in roles:
+                    if (document['content_hash'], role) in done:
+                        stats['skipped'] += 1
+                    else:
+                        yield path, role, document
+
+    def analyze(task):
+        path, role, document = task
+        return path, role, document, get_structured_feedback(document['text'], role, document['parsed'])
+
+    writer = ResultWriter(output)
+    checkpoint_file = open(checkpoint, 'a', encoding='utf-8') if checkpoint else None
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        # Failed analyses go to the output file only, so the next run retries them
+        succeeded = [item for item in batch if not item[3].get('error')]
+        record_ids = iter(save_feedback_records([{
+            'user_id': user_id, 'filename': os.path.basename(path), 'target_role': role,
+            'feedback': render_feedback_markdown(structured, role), 'score': structured['score'],
+            'document_id': document['id'], 'structured': structured
+        } for path, role, document, structured in succeeded]))
+        rows = []
+        for path, role, document, structured in batch:
+            row = {'path': path, 'target_role': role, 'score': structured['score'],
+                   'record_id': None if structured.get('error') else next(record_ids),
+                   'document_id': document['id'], 'backend': structured.get('backend'),
+                   'error': structured.get('error')}
+            if writer.format == 'jsonl':
+                row['feedback'] = {key: structured.get(key, []) for key, _ in FEEDBACK_SECTIONS}
+            rows.append(row)
+        writer.write(rows)
+        if checkpoint_file:
+            for _, role, document, _ in succeeded:
+                checkpoint_file.write(json.dumps({'content_hash': document['content_hash'],
+                                                  'target_role': role}) + '\n')
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        batch.clear()
+
+    analyze_started = time.perf_counter()
+    try:
+        # At most `concurrency` analyses are in flight, so memory and LLM quota stay bounded
+        with ProcessPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(max_workers=concurrency) as executor:
+            queue = pending_tasks(pool)
+            in_flight = set()
+            for task in queue:
+                in_flight.add(executor.submit(analyze, task))
+                if len(in_flight) >= concurrency:
+                    break
+            while in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    stats['analyses'] += 1
+                    stats['analysis_errors'] += bool(result[3].get('error'))
+                    batch.append(result)
+                    next_task = next(queue, None)
+                    if next_task is not None:
+                        in_flight.add(executor.submit(analyze, next_task))
+                if len(batch) >= batch_size:
+                    flush()
+                    log(f"  {stats['analyses']}/{total} analyses")
+    finally:
+        # Whatever finished before an interruption is still committed
+        flush()
+        writer.close()
+        if checkpoint_file:
+            checkpoint_file.close()
+    analyze_seconds = time.perf_counter() - analyze_started
+    extract_seconds = extract_span[1] - extract_span[0] if extract_span else 0.0
+
+    elapsed = time.perf_counter() - started
+    stats.update({
+        'elapsed_seconds': elapsed,
+        'extract_seconds': extract_seconds,
+        'analyze_seconds': analyze_seconds,
+        'files_per_second': stats['extracted'] / extract_seconds if stats['extracted'] and extract_seconds else 0.0,
+        'analyses_per_second': stats['analyses'] / analyze_seconds if stats['analyses'] and analyze_seconds else 0.0
+    })
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m resume_core', description="AI Resume Bot batch tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    analyze = commands.add_parser('analyze', help="Analyze every PDF/DOCX resume in a directory")
+    analyze.add_argument('directory')
+    analyze.add_argument('--role', action='append', required=True,
+                         help="Target role; repeat or comma-separate for several")
+    analyze.add_argument('--backend', help="LLM backend (default: LLM_BACKEND or template)")
+    analyze.add_argument('--concurrency', type=int, default=4, help="LLM calls in flight")
+    analyze.add_argument('--workers', type=int, default=None, help="Extraction processes (default: CPU count)")
+    analyze.add_argument('--batch-size', type=int, default=50,
+                         help="Files per extraction window, rows per database transaction")
+    analyze.add_argument('--output', help="Results file, .csv or .jsonl")
+    analyze.add_argument('--checkpoint', help="Checkpoint file (default: <output>.checkpoint)")
+    analyze.add_argument('--user-id', type=int, required=True, help="Owner of the saved analyses")
+    analyze.add_argument('--db', help="Database path (default: resume_bot.db)")
+    retention = commands.add_parser('retention', help="Archive old analyses and release free database pages")
+    retention.add_argument('--days', type=int, default=None,
+                           help="Archive text older than this (default: RETENTION_CONFIG full_text_days)")
+    retention.add_argument('--vacuum-pages', type=int, default=None, help="Free pages to release")
+    retention.add_argument('--enable-incremental-vacuum', action='store_true',
+                           help="Switch an older database to auto_vacuum=INCREMENTAL first (full VACUUM)")
+    retention.add_argument('--db', help="Database path (default: resume_bot.db)")
+    backup = commands.add_parser('backup', help="Take an online backup of the database")
+    backup.add_argument('--dest', help="Backup file (default: a timestamped file in BACKUP_CONFIG dir)")
+    backup.add_argument('--list', action='store_true', help="List kept backups instead")
+    backup.add_argument('--db', help="Database path (default: resume_bot.db)")
+    restore = commands.add_parser('restore', help="Restore the database from a backup")
+    restore.add_argument('backup')
+    restore.add_argument('--db', help="Database path (default: resume_bot.db)")
+    index = commands.add_parser('index', help="Add stored resumes missing from the job matching index")
+    index.add_argument('--db', help="Database path (default: resume_bot.db)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        config.DB_PATH = args.db
+    if args.command == 'retention':
+        return run_retention_command(args)
+    if args.command == 'backup':
+        if args.list:
+            print('\n'.join(list_backups()) or "No backups yet")
+        else:
+            print(f"Backed up {config.DB_PATH} to {backup_database(args.dest)}")
+        return 0
+    if args.command == 'restore':
+        if not os.path.exists(args.backup):
+            parser.error(f"{args.backup} does not exist")
+        safety_path = restore_database(args.backup)
+        print(f"Restored {config.DB_PATH} from {args.backup} (previous contents saved to {safety_path})")
+        return 0
+    if args.command == 'index':
+        init_database()
+        print(f"Indexed {update_document_index()} stored resumes")
+        return 0
+    if args.backend:
+        config.LLM_CONFIG.update({'backend': args.backend, 'cheap_backend': None})
+    config.REWRITE_CONFIG['speculative'] = False
+    if not os.path.isdir(args.directory):
+        parser.error(f"{args.directory} is not a directory")
+    roles = parse_target_roles(','.join(args.role))
+    checkpoint = args.checkpoint or (f"{args.output}.checkpoint" if args.output else None)
+
+    init_database()
+    print(f"Analyzing {args.directory} for {', '.join(roles)}")
+    try:
+        stats = analyze_directory(args.directory, roles, user_id=args.user_id, concurrency=args.concurrency,
+                                  workers=args.workers, batch_size=args.batch_size, output=args.output,
+                                  checkpoint=checkpoint)
+    except KeyboardInterrupt:
+        print("Interrupted; finished batches are saved, run again to resume", file=sys.stderr)
+        return 130
+
+    print(f"Files: {stats['files']} ({stats['extracted']} extracted, {stats['reused']} already stored, "
+          f"{stats['extraction_errors']} failed)")
+    print(f"Analyses: {stats['analyses']} ({stats['analysis_errors']} failed, {stats['skipped']} skipped "
+          f"from checkpoint)")
+    print(f"Extraction: {stats['extract_seconds']:.2f}s ({stats['files_per_second']:.1f} files/s) · "
+          f"Analysis: {stats['analyze_seconds']:.2f}s ({stats['analyses_per_second']:.1f} analyses/s) · "
+          f"Total: {stats['elapsed_seconds']:.2f}s")
+    return 1 if stats['extraction_errors'] or stats['analysis_errors'] else 0
+
+def run_retention_command(args):
+    init_database()
+    if args.enable_incremental_vacuum:
+        switched = enable_incremental_vacuum()
+        print("Database switched to auto_vacuum=INCREMENTAL" if switched else "Already auto_vacuum=INCREMENTAL")
+    report = archive_old_feedback(args.days)
+    print(f"Archived {report['rows']} analyses" + (f" to {report['path']}" if report['path'] else ""))
+    print(f"Purged the text and files of {purge_old_documents(args.days)} stored resumes")
+    print(f"Released {incremental_vacuum(args.vacuum_pages)} free pages")
+    return 0
@@ -0,0 +1,151 @@
+"""Dictionary compression for the large text columns.
+
+Compressed values are stored as BLOBs: magic + dictionary id + zlib stream.
+Plain TEXT values (old rows, short values) are returned unchanged.
+"""
+import os
+import zlib
+from collections import Counter
+
+from . import config
+from .db import connect
+
+COMPRESSION_MAGIC = b'RBZ1'
+_compression_dictionaries = {0: b''}
+_latest_dictionary_id = None
+
+def train_compression_dictionary(samples, size=None):
+    """Build a zlib preset dictionary from lines shared across samples"""
+    size = size or config.COMPRESSION_CONFIG['dictionary_size']
+    counts = Counter()
+    for sample in samples:
+        if not sample:
+            continue
+        for line in set(sample.splitlines()):
+            line = line.strip()
+            if len(line) >= 8:
+                counts[line] += 1
+
+    # zlib favours matches close to the end of the dictionary, so the most
+    # common lines are placed last
+    dictionary = b''
+    for line, count in counts.most_common():
+        if count < 2:
+            break
+        chunk = (line + '\n').encode('utf-8')
+        if len(dictionary) + len(chunk) > size:
+            break
+        dictionary = chunk + dictionary
+    return dictionary
+
+def _load_compression_dictionary(c, dictionary_id):
+    if dictionary_id not in _compression_dictionaries:
+        c.execute("SELECT dictionary FROM compression_dictionaries WHERE id = ?", (dictionary_id,))
+        row = c.fetchone()
+        if row is None:
+            raise ValueError(f"Unknown compression dictionary {dictionary_id}")
+        _compression_dictionaries[dictionary_id] = bytes(row[0])
+    return _compression_dictionaries[dictionary_id]
+
+def _latest_compression_dictionary(c):
+    global _latest_dictionary_id
+    if _latest_dictionary_id is None:
+        c.execute("SELECT MAX(id) FROM compression_dictionaries")
+        _latest_dictionary_id = c.fetchone()[0] or 0
+    return _latest_dictionary_id, _load_compression_dictionary(c, _latest_dictionary_id)
+
+def reset_compression_cache():
+    """Forget cached dictionaries, e.g. after switching config.DB_PATH"""
+    global _latest_dictionary_id
+    _compression_dictionaries.clear()
+    _compression_dictionaries[0] = b''
+    _latest_dictionary_id = None
+
+def compress_text(c, text):
+    """Compress a text value for storage, returns bytes or the original text"""
+    settings = config.COMPRESSION_CONFIG
+    if not text or not settings['enabled']:
+        return text
+    raw = text.encode('utf-8')
+    if len(raw) < settings['min_size']:
+        return text
+
+    dictionary_id, dictionary = _latest_compression_dictionary(c)
+    if dictionary:
+        compressor = zlib.compressobj(settings['level'], zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(settings['level'])
+    payload = compressor.compress(raw) + compressor.flush()
+    return COMPRESSION_MAGIC + dictionary_id.to_bytes(2, 'big') + payload
+
+def decompress_text(c, value):
+    """Return the text for a stored value, compressed or not"""
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+    value = bytes(value)
+    if not value.startswith(COMPRESSION_MAGIC):
+        return value.decode('utf-8')
+
+    header = len(COMPRESSION_MAGIC)
+    dictionary_id = int.from_bytes(value[header:header + 2], 'big')
+    dictionary = _load_compression_dictionary(c, dictionary_id)
+    if dictionary:
+        decompressor = zlib.decompressobj(zdict=dictionary)
+    else:
+        decompressor = zlib.decompressobj()
+    return (decompressor.decompress(value[header + 2:]) + decompressor.flush()).decode('utf-8')
+
+def _stored_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return len(value)
+
+def compress_feedback_history():
+    """One-off migration: train a dictionary and recompress all feedback rows"""
+    global _latest_dictionary_id
+    db_path = config.DB_PATH
+    file_size_before = os.path.getsize(db_path) if os.path.exists(db_path) else 0
+
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT id, feedback, rewritten_resume FROM feedback_history")
+    rows = [(row_id, decompress_text(c, feedback), decompress_text(c, rewritten), feedback, rewritten)
+            for row_id, feedback, rewritten in c.fetchall()]
+
+    bytes_before = sum(_stored_size(r[3]) + _stored_size(r[4]) for r in rows)
+    raw_bytes = sum(_stored_size(r[1]) + _stored_size(r[2]) for r in rows)
+
+    samples = [r[1] for r in rows if r[1]] + [r[2] for r in rows if r[2]]
+    if len(samples) >= config.COMPRESSION_CONFIG['min_training_samples']:
+        dictionary = train_compression_dictionary(samples)
+        if dictionary:
+            c.execute("INSERT INTO compression_dictionaries (dictionary, sample_count) VALUES (?, ?)",
+                      (dictionary, len(samples)))
+            _compression_dictionaries[c.lastrowid] = dictionary
+            _latest_dictionary_id = c.lastrowid
+
+    bytes_after = 0
+    for row_id, feedback, rewritten, _, _ in rows:
+        new_feedback = compress_text(c, feedback)
+        new_rewritten = compress_text(c, rewritten)
+        bytes_after += _stored_size(new_feedback) + _stored_size(new_rewritten)
+        c.execute("UPDATE feedback_history SET feedback = ?, rewritten_resume = ? WHERE id = ?",
+                  (new_feedback, new_rewritten, row_id))
+    conn.commit()
+
+    # Give the freed pages back to the filesystem
+    c.execute("VACUUM")
+    conn.close()
+    file_size_after = os.path.getsize(db_path)
+
+    return {
+        'rows': len(rows),
+        'raw_bytes': raw_bytes,
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'bytes_saved': bytes_before - bytes_after,
+        'file_size_before': file_size_before,
+        'file_size_after': file_size_after
+    }
@@ -0,0 +1,165 @@
+"""Settings shared by the UI, the API and worker processes.
+
+Values are read at call time, so callers (tests, the benchmark, the CLI)
+can point the core at another database or backend by assigning to these
+module attributes before use.
+"""
+import os
+
+# Load API keys from .env when python-dotenv is installed
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+# Email configuration - UPDATED FOR BETTER COMPATIBILITY
+EMAIL_CONFIG = {
+    'smtp_server': 'smtp.gmail.com',
+    'smtp_port': 587,
+    'sender_email': 'your_email@gmail.com',  # Replace with your Gmail
+    'sender_password': 'your_app_password',   # Replace with your Gmail App Password
+    'use_tls': True
+}
+
+# Database location
+DB_PATH = 'resume_bot.db'
+
+# Compression for the large text columns in feedback_history
+COMPRESSION_CONFIG = {
+    'enabled': True,
+    'level': 9,
+    'min_size': 128,            # Shorter values are kept as plain text
+    'dictionary_size': 32768,   # zlib window size, larger dictionaries are truncated
+    'min_training_samples': 2
+}
+
+# Multi-role analysis of a single resume
+MULTI_ROLE_CONFIG = {
+    'max_roles': 5,
+    'max_workers': 4
+}
+
+# LLM backend selection: groq, openai, local, template (offline), replay or record:<backend>
+LLM_CONFIG = {
+    'backend': os.getenv('LLM_BACKEND', 'template'),
+    'cheap_backend': os.getenv('LLM_CHEAP_BACKEND'),  # Optional fast backend for small prompts
+    'cheap_max_tokens': 600,
+    'replay_dir': 'llm_recordings',
+    'fallback': 'template'
+}
+
+# Prompt size limits for LLM calls
+PROMPT_CONFIG = {
+    'max_resume_tokens': 1500
+}
+
+# Revised resumes: only sections changed since the user's last analysis of the same file go to the LLM
+REVISION_CONFIG = {
+    'enabled': True,
+    'max_changed_fraction': 0.5         # Above this share of changed sections the whole resume is analyzed
+}
+
+# Resume rewriting, optionally generated in the background right after analysis
+REWRITE_CONFIG = {
+    'speculative': True,
+    'max_workers': 2,
+    'wait_seconds': 30
+}
+
+# Admission control for expensive operations: a token bucket per user and operation, and a fixed number of
+# concurrent slots per operation (per process) handed out round-robin across the users waiting for one
+ADMISSION_CONFIG = {
+    'enabled': True,
+    'queue_timeout_seconds': 120,       # Longest wait for a slot before the request is turned away
+    'busy_retry_after_seconds': 5,      # Retry-After for API requests that find every slot taken
+    'operations': {
+        # rate_per_minute: bucket refill per user; burst: bucket size; concurrency: slots
+        'analyze': {'rate_per_minute': 10, 'burst': 5, 'concurrency': 4},
+        'rewrite': {'rate_per_minute': 4, 'burst': 2, 'concurrency': 2},
+        'audio': {'rate_per_minute': 4, 'burst': 2, 'concurrency': 2},
+        'email': {'rate_per_minute': 2, 'burst': 2, 'concurrency': 2}
+    }
+}
+
+# Content-addressed storage for uploaded resume files
+DOCUMENT_STORE_CONFIG = {
+    'blob_dir': 'resume_blobs'
+}
+
+# Job description matching: an inverted index of weighted terms over stored resumes and saved job descriptions
+MATCHING_CONFIG = {
+    'index_version': 1,                 # Increase when term extraction changes, so documents are re-indexed
+    'skill_weight': 2.0,                # Taxonomy and listed skills count this much more than plain keywords
+    'max_terms_per_document': 300,      # Highest-weighted terms kept per resume or job description
+    'max_query_terms': 60,              # Highest-weighted job description terms looked up per match
+    'backfill_batch_size': 500          # Documents indexed per transaction when catching up
+}
+
+# Limits on uploaded files, so a single upload can't exhaust a worker's memory
+UPLOAD_LIMITS = {
+    'max_bytes': 5 * 1024 * 1024,               # Raw file size
+    'max_pages': 20,                            # PDF pages
+    'max_text_chars': 100_000,                  # Extraction stops once this much text is read
+    'max_inflated_bytes': 50 * 1024 * 1024,     # DOCX XML parts or all PDF streams once decompressed
+    'max_compression_ratio': 100,               # Decompressed/stored size of a single part or stream
+    'max_archive_entries': 1000                 # Parts in a DOCX package
+}
+
+# Shared session state and caches: sqlite (default), redis (REDIS_URL) or memory (single process only)
+STATE_STORE_CONFIG = {
+    'backend': os.getenv('STATE_STORE', 'sqlite'),
+    'redis_url': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+    'session_ttl_seconds': 7 * 24 * 3600,
+    'cache_ttl_seconds': 24 * 3600,
+    'purge_interval_seconds': 300
+}
+
+# Dashboard charts: figure JSON cached in the state store, keyed by a hash of the plotted data
+CHART_CACHE_CONFIG = {
+    'enabled': True,
+    'ttl_seconds': 24 * 3600,
+    'version': 1                        # Bump when a chart's look changes, so cached figures are rebuilt
+}
+
+# Password reset: emailed one-time codes, then a short-lived token for setting the new password
+PASSWORD_RESET_CONFIG = {
+    'code_length': 6,
+    'code_ttl_seconds': 600,
+    'token_ttl_seconds': 900,
+    'max_attempts': 5,                  # Wrong guesses per code; a resent code inherits the count
+    'max_codes_per_window': 3,          # Codes sent to one email address per window
+    'code_window_seconds': 3600,
+    'secret_key': os.getenv('RESUME_BOT_SECRET_KEY'),  # HMAC key for stored codes, the same on every replica
+    'secret_key_file': 'reset_secret.key',              # Generated and used when secret_key is unset
+    'purge_interval_seconds': 3600
+}
+
+# Write-behind batching of save_feedback_to_db: concurrent saves share one transaction
+WRITE_BEHIND_CONFIG = {
+    'enabled': True,
+    'max_batch': 100,           # Rows per transaction
+    'interval_seconds': 0.0     # Extra wait for a batch to fill; rows queued during a commit join the next one
+}
+
+# Retention: after full_text_days an analysis keeps only score, role and date; its text goes to archive_dir
+RETENTION_CONFIG = {
+    'enabled': True,
+    'full_text_days': 180,
+    'archive_dir': 'archives',
+    'batch_size': 500,                  # Rows per archive transaction
+    'vacuum_pages': 1000,               # Free pages returned to the filesystem per run
+    'interval_seconds': 6 * 3600        # How often the background scheduler runs
+}
+
+# Online backups with rotation, and the read-only snapshot behind the admin analytics
+BACKUP_CONFIG = {
+    'enabled': True,
+    'dir': 'backups',
+    'keep': 7,                          # Backups kept after rotation
+    'pages_per_step': 256,              # Pages copied per step; writers can run between steps
+    'step_sleep_seconds': 0.005,
+    'max_restarts': 3,                  # Concurrent writes restart a stepped backup; then copy in one step
+    'interval_seconds': 24 * 3600,
+    'snapshot_max_age_seconds': 300
+}
@@ -0,0 +1,135 @@
+"""SQLite connection and schema."""
+import hashlib
+import sqlite3
+
+from . import config
+
+def connect():
+    """A new connection to the configured database"""
+    return sqlite3.connect(config.DB_PATH)
+
+# Database setup
+def init_database():
+    conn = connect()
+    c = conn.cursor()
+
+    # Takes effect for new databases; existing ones switch with retention.enable_incremental_vacuum()
+    c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+    # Users table
+    c.execute('''CREATE TABLE IF NOT EXISTS users
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  username TEXT UNIQUE NOT NULL,
+                  email TEXT UNIQUE NOT NULL,
+                  phone TEXT,
+                  password_hash TEXT NOT NULL,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  is_admin BOOLEAN DEFAULT FALSE,
+                  reset_token TEXT,
+                  reset_token_expiry TIMESTAMP)''')
+
+    # Feedback history table
+    c.execute('''CREATE TABLE IF NOT EXISTS feedback_history
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  user_id INTEGER,
+                  filename TEXT,
+                  target_role TEXT,
+                  feedback TEXT,
+                  score INTEGER,
+                  rewritten_resume TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  document_id INTEGER,
+                  feedback_json TEXT,
+                  archived_at TIMESTAMP,
+                  FOREIGN KEY (user_id) REFERENCES users (id),
+                  FOREIGN KEY (document_id) REFERENCES documents (id))''')
+    _add_column_if_missing(c, 'feedback_history', 'document_id', 'INTEGER REFERENCES documents (id)')
+    _add_column_if_missing(c, 'feedback_history', 'feedback_json', 'TEXT')
+    _add_column_if_missing(c, 'feedback_history', 'archived_at', 'TIMESTAMP')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_feedback_history_user_filename ON feedback_history (user_id, filename)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_feedback_history_document_id ON feedback_history (document_id)")
+
+    # Uploaded resumes, stored once per distinct file content
+    c.execute('''CREATE TABLE IF NOT EXISTS documents
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  content_hash TEXT UNIQUE NOT NULL,
+                  filename TEXT,
+                  mime_type TEXT,
+                  size_bytes INTEGER,
+                  blob_path TEXT NOT NULL,
+                  extracted_text TEXT,
+                  parsed_resume TEXT,
+                  index_version INTEGER,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    _add_column_if_missing(c, 'documents', 'parsed_resume', 'TEXT')
+    _add_column_if_missing(c, 'documents', 'index_version', 'INTEGER')
+    # Finds the stored resumes the matching index is missing without scanning the table
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_documents_index_version ON documents (COALESCE(index_version, 0))
+                 WHERE extracted_text IS NOT NULL''')
+
+    # Inverted index for job description matching: term -> documents (see resume_core.matching)
+    c.execute('''CREATE TABLE IF NOT EXISTS document_terms
+                 (term TEXT NOT NULL,
+                  document_id INTEGER NOT NULL,
+                  weight REAL NOT NULL,
+                  PRIMARY KEY (term, document_id),
+                  FOREIGN KEY (document_id) REFERENCES documents (id)) WITHOUT ROWID''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_document_terms_document_id ON document_terms (document_id)")
+
+    # Saved job descriptions and their terms
+    c.execute('''CREATE TABLE IF NOT EXISTS job_descriptions
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  user_id INTEGER NOT NULL,
+                  title TEXT,
+                  description TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (user_id) REFERENCES users (id))''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_job_descriptions_user_id ON job_descriptions (user_id)")
+    c.execute('''CREATE TABLE IF NOT EXISTS job_terms
+                 (term TEXT NOT NULL,
+                  job_id INTEGER NOT NULL,
+                  weight REAL NOT NULL,
+                  PRIMARY KEY (term, job_id),
+                  FOREIGN KEY (job_id) REFERENCES job_descriptions (id)) WITHOUT ROWID''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_job_terms_job_id ON job_terms (job_id)")
+
+    # Compression dictionaries for feedback_history text columns
+    c.execute('''CREATE TABLE IF NOT EXISTS compression_dictionaries
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  dictionary BLOB NOT NULL,
+                  sample_count INTEGER,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+    # Password reset codes, stored hashed (see resume_core.accounts)
+    c.execute('''CREATE TABLE IF NOT EXISTS password_resets
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  user_id INTEGER NOT NULL,
+                  code_hash TEXT NOT NULL,
+                  salt TEXT NOT NULL,
+                  attempts INTEGER DEFAULT 0,
+                  expires_at REAL NOT NULL,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (user_id) REFERENCES users (id))''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_password_resets_expires_at ON password_resets (expires_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_password_resets_user_id ON password_resets (user_id)")
+
+    # Shared session state and caches (see resume_core.state)
+    c.execute('''CREATE TABLE IF NOT EXISTS state_store
+                 (key TEXT PRIMARY KEY,
+                  value TEXT,
+                  expires_at REAL)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_state_store_expires_at ON state_store (expires_at)")
+
+    # Create admin user if not exists
+    admin_password = hashlib.sha256("admin123".encode()).hexdigest()
+    c.execute("INSERT OR IGNORE INTO users (username, email, password_hash, is_admin) VALUES (?, ?, ?, ?)",
+              ("admin", "admin@resumebot.com", admin_password, True))
+
+    conn.commit()
+    conn.close()
+
+def _add_column_if_missing(c, table, column, definition):
+    """Add a column to an existing table created by an older version"""
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
@@ -0,0 +1,238 @@
+"""Content-addressed store for uploaded resumes, their extracted text and its parse.
+
+Stored resumes are also added to the job description matching index (see
+``resume_core.matching``).
+"""
+import hashlib
+import json
+import os
+from io import BytesIO
+
+from . import config
+from .compression import compress_text, decompress_text
+from .db import connect
+from .errors import ExtractionError
+from .extraction import check_upload_size, extract_resume_text
+from .matching import index_document
+from .metrics import timed
+from .parsing import ParsedResume, parse_resume
+
+def _document_blob_path(content_hash):
+    return os.path.join(config.DOCUMENT_STORE_CONFIG['blob_dir'], content_hash[:2], content_hash)
+
+def _compress_parse(c, parsed):
+    return compress_text(c, json.dumps(parsed.to_dict()))
+
+def _load_parse(c, document_id, stored, text):
+    """A document's stored parse; documents stored before parsing existed are parsed and updated once"""
+    if stored is not None:
+        return ParsedResume.from_dict(json.loads(decompress_text(c, stored)))
+    if text is None:
+        return None
+    parsed = parse_resume(text)
+    c.execute("UPDATE documents SET parsed_resume = ? WHERE id = ?", (_compress_parse(c, parsed), document_id))
+    c.connection.commit()
+    return parsed
+
+def _write_document_blob(content_hash, file_bytes):
+    blob_path = _document_blob_path(content_hash)
+    if not os.path.exists(blob_path):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # Write to a temporary name first so readers never see a partial file
+        tmp_path = f"{blob_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(file_bytes)
+        os.replace(tmp_path, blob_path)
+    return blob_path
+
+@timed('store_document')
+def store_document(file_bytes, filename, mime_type):
+    """Store an uploaded resume once per content hash and return it with its text and parse.
+
+    Text is extracted and parsed only the first time a given file is seen.
+    Raises ExtractionError (nothing is stored) when the file can't be read,
+    so the next upload of the same file retries, and UploadRejected when
+    it is over the upload limits.
+    """
+    check_upload_size(len(file_bytes))
+    content_hash = hashlib.sha256(file_bytes).hexdigest()
+
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT id, extracted_text, parsed_resume FROM documents WHERE content_hash = ?", (content_hash,))
+    row = c.fetchone()
+    if row and row[1] is not None:
+        text = decompress_text(c, row[1])
+        document = {'id': row[0], 'content_hash': content_hash, 'text': text,
+                    'parsed': _load_parse(c, row[0], row[2], text), 'is_new': False}
+        conn.close()
+        return document
+
+    try:
+        text = extract_resume_text(BytesIO(file_bytes), mime_type)
+    except ExtractionError:
+        conn.close()
+        raise
+    parsed = parse_resume(text)
+    blob_path = _write_document_blob(content_hash, file_bytes)
+
+    if row:
+        c.execute("UPDATE documents SET extracted_text = ?, parsed_resume = ? WHERE id = ?",
+                  (compress_text(c, text), _compress_parse(c, parsed), row[0]))
+        document_id = row[0]
+    else:
+        c.execute("""INSERT OR IGNORE INTO documents
+                     (content_hash, filename, mime_type, size_bytes, blob_path, extracted_text, parsed_resume)
+                     VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                  (content_hash, filename, mime_type, len(file_bytes), blob_path, compress_text(c, text),
+                   _compress_parse(c, parsed)))
+        c.execute("SELECT id FROM documents WHERE content_hash = ?", (content_hash,))
+        document_id = c.fetchone()[0]
+    index_document(c, document_id, text, parsed)
+    conn.commit()
+    conn.close()
+    return {'id': document_id, 'content_hash': content_hash, 'text': text, 'parsed': parsed, 'is_new': row is None}
+
+def find_documents(content_hashes):
+    """Stored documents with extracted text, as {content_hash: (id, text, parsed)}"""
+    found = {}
+    conn = connect()
+    c = conn.cursor()
+    hashes = list(content_hashes)
+    for start in range(0, len(hashes), 500):
+        chunk = hashes[start:start + 500]
+        c.execute(f"""SELECT content_hash, id, extracted_text, parsed_resume FROM documents
+                      WHERE extracted_text IS NOT NULL AND content_hash IN ({','.join('?' * len(chunk))})""", chunk)
+        for content_hash, document_id, text, parsed in c.fetchall():
+            text = decompress_text(c, text)
+            found[content_hash] = (document_id, text, _load_parse(c, document_id, parsed, text))
+    conn.close()
+    return found
+
+def save_extracted_documents(documents):
+    """Store already-extracted documents in one transaction, returns {content_hash: id}.
+
+    Each item is a dict with content_hash, filename, mime_type, file_bytes and
+    text, and optionally parsed (parsed here when missing).
+    """
+    conn = connect()
+    c = conn.cursor()
+    ids = {}
+    try:
+        for document in documents:
+            blob_path = _write_document_blob(document['content_hash'], document['file_bytes'])
+            stored_text = compress_text(c, document['text'])
+            parsed = document.get('parsed') or parse_resume(document['text'])
+            stored_parse = _compress_parse(c, parsed)
+            c.execute("""INSERT INTO documents
+                         (content_hash, filename, mime_type, size_bytes, blob_path, extracted_text, parsed_resume)
+                         VALUES (?, ?, ?, ?, ?, ?, ?)
+                         ON CONFLICT(content_hash) DO UPDATE SET extracted_text = excluded.extracted_text,
+                                                                 parsed_resume = excluded.parsed_resume
+                         WHERE documents.extracted_text IS NULL""",
+                      (document['content_hash'], document['filename'], document['mime_type'],
+                       len(document['file_bytes']), blob_path, stored_text, stored_parse))
+            c.execute("SELECT id FROM documents WHERE content_hash = ?", (document['content_hash'],))
+            ids[document['content_hash']] = c.fetchone()[0]
+            index_document(c, ids[document['content_hash']], document['text'], parsed)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return ids
+
+def _unreferenced(c, document_ids, where=""):
+    """(id, blob_path) of the given documents that no feedback_history row matching where references"""
+    ids = list(document_ids)
+    rows = []
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        c.execute(f"""SELECT id, blob_path FROM documents
+                      WHERE id IN ({','.join('?' * len(chunk))})
+                        AND NOT EXISTS (SELECT 1 FROM feedback_history h WHERE h.document_id = documents.id {where})""",
+                  chunk)
+        rows.extend(c.fetchall())
+    return rows
+
+def delete_unreferenced_documents(c, document_ids):
+    """Delete the given documents that no analysis references, with their postings; the caller commits.
+
+    Returns the blob paths to pass to remove_blobs() once the deletion is committed.
+    """
+    rows = _unreferenced(c, document_ids)
+    c.executemany("DELETE FROM document_terms WHERE document_id = ?", [(row[0],) for row in rows])
+    c.executemany("DELETE FROM documents WHERE id = ?", [(row[0],) for row in rows])
+    return [row[1] for row in rows]
+
+def strip_documents(c, document_ids):
+    """Drop the text, parse, postings and file of the given documents no live analysis references.
+
+    Analyses whose text was archived by retention don't count. The rows
+    stay (archived analyses still point at them, and an upload of the same
+    file fills them in again); the caller commits, then passes the returned
+    blob paths to remove_blobs().
+    """
+    rows = _unreferenced(c, document_ids, "AND h.archived_at IS NULL")
+    c.executemany("DELETE FROM document_terms WHERE document_id = ?", [(row[0],) for row in rows])
+    c.executemany("""UPDATE documents SET extracted_text = NULL, parsed_resume = NULL, index_version = NULL
+                     WHERE id = ?""", [(row[0],) for row in rows])
+    return [row[1] for row in rows]
+
+def remove_blobs(blob_paths):
+    for blob_path in blob_paths:
+        try:
+            os.remove(blob_path)
+        except FileNotFoundError:
+            pass
+
+def get_document(document_id):
+    """Get a stored document's metadata, extracted text and parse, None if unknown"""
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""SELECT id, content_hash, filename, mime_type, size_bytes, blob_path, extracted_text, parsed_resume
+                 FROM documents WHERE id = ?""", (document_id,))
+    row = c.fetchone()
+    if row is None:
+        conn.close()
+        return None
+    document = {
+        'id': row[0],
+        'content_hash': row[1],
+        'filename': row[2],
+        'mime_type': row[3],
+        'size_bytes': row[4],
+        'blob_path': row[5],
+        'text': decompress_text(c, row[6])
+    }
+    document['parsed'] = _load_parse(c, row[0], row[7], document['text'])
+    conn.close()
+
+    # Older rows without cached text are extracted from the stored blob
+    if document['text'] is None and os.path.exists(document['blob_path']):
+        with open(document['blob_path'], 'rb') as f:
+            try:
+                stored = store_document(f.read(), document['filename'], document['mime_type'])
+                document['text'], document['parsed'] = stored['text'], stored['parsed']
+            except ExtractionError:
+                pass
+    return document
+
+def rank_stored_documents(target_roles, top_k=10):
+    """Rank every stored resume against each role with the vectorized ranker"""
+    from .ranking import ResumeRanker  # NumPy is only loaded when ranking is used
+
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT id, filename, extracted_text FROM documents WHERE extracted_text IS NOT NULL")
+    rows = [(row[0], row[1], decompress_text(c, row[2])) for row in c.fetchall()]
+    conn.close()
+
+    ranker = ResumeRanker([row[2] for row in rows])
+    ranked = ranker.top_k(target_roles, k=top_k)
+    return {
+        role: [{'document_id': rows[i][0], 'filename': rows[i][1], 'similarity': similarity}
+               for i, similarity in matches]
+        for role, matches in ranked.items()
+    }
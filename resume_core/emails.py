@@ -0,0 +1,110 @@
+"""OTP and feedback report emails over SMTP."""
+import smtplib
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from . import config
+from .analysis import FEEDBACK_SECTIONS
+from .errors import EmailAuthError, EmailError, EmailNotConfigured
+from .metrics import timed
+
+def email_configured():
+    return config.EMAIL_CONFIG['sender_email'] != 'your_email@gmail.com'
+
+def _send(email, msg):
+    """Send a message with the configured SMTP account"""
+    settings = config.EMAIL_CONFIG
+    if not email_configured():
+        raise EmailNotConfigured("Email not configured. Please update EMAIL_CONFIG with your Gmail credentials.")
+    msg['From'] = settings['sender_email']
+    msg['To'] = email
+    try:
+        server = smtplib.SMTP(settings['smtp_server'], settings['smtp_port'])
+        server.starttls()  # Enable TLS encryption
+        try:
+            server.login(settings['sender_email'], settings['sender_password'])
+        except smtplib.SMTPAuthenticationError as e:
+            raise EmailAuthError("Gmail authentication failed, check the App Password") from e
+        server.sendmail(settings['sender_email'], email, msg.as_string())
+        server.quit()
+    except EmailAuthError:
+        server.quit()
+        raise
+    except (smtplib.SMTPException, OSError) as e:
+        raise EmailError(str(e)) from e
+
+@timed('send_otp_email')
+def send_otp_email(email, otp):
+    """Send a password reset OTP"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = "🔐 AI Resume Bot - Password Reset OTP"
+
+    body = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; text-align: center; color: white;">
+                <h1>🤖 AI Resume Bot</h1>
+                <h2>Password Reset Request</h2>
+            </div>
+            <div style="padding: 20px; background: #f9f9f9;">
+                <p>Hello,</p>
+                <p>You have requested to reset your password. Please use the following OTP to proceed:</p>
+                <div style="background: white; padding: 20px; text-align: center; border-radius: 10px; margin: 20px 0;">
+                    <h1 style="color: #667eea; font-size: 36px; letter-spacing: 10px; margin: 0;">{otp}</h1>
+                </div>
+                <p><strong>This OTP is valid for 10 minutes only.</strong></p>
+                <p>If you didn't request this password reset, please ignore this email.</p>
+                <hr style="margin: 20px 0;">
+                <p style="color: #666; font-size: 12px;">This is an automated email from AI Resume Bot. Please do not reply.</p>
+            </div>
+        </body>
+        </html>
+        """
+    msg.attach(MIMEText(body, 'html'))
+    _send(email, msg)
+
+@timed('send_feedback_email')
+def send_feedback_email(email, feedback, filename, target_role, score, structured=None):
+    """Send the detailed feedback report"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = f"📊 AI Resume Analysis Report - {filename}"
+
+    color = '#44ff44' if score >= 85 else '#ffaa00' if score >= 70 else '#ff4444'
+
+    # Structured feedback is rendered section by section, plain text otherwise
+    if structured and not structured.get('error'):
+        feedback_html = "".join(
+            f"<h4>{title}</h4><ul>" + "".join(f"<li>{item}</li>" for item in structured[key]) + "</ul>"
+            for key, title in FEEDBACK_SECTIONS if structured.get(key)
+        )
+    else:
+        feedback_html = f'<div style="white-space: pre-line;">{feedback}</div>'
+
+    body = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; text-align: center; color: white;">
+                <h1>🤖 AI Resume Bot</h1>
+                <h2>Resume Analysis Report</h2>
+            </div>
+            <div style="padding: 20px; background: #f9f9f9;">
+                <h3>📄 File: {filename}</h3>
+                <h3>🎯 Target Role: {target_role}</h3>
+                <div style="background: white; padding: 20px; border-radius: 10px; text-align: center; margin: 20px 0;">
+                    <h2 style="color: #667eea;">Resume Score: {score}/100</h2>
+                    <div style="background: #e0e0e0; border-radius: 10px; height: 20px; margin: 10px 0;">
+                        <div style="background: {color}; width: {score}%; height: 100%; border-radius: 10px;"></div>
+                    </div>
+                </div>
+                <div style="background: white; padding: 20px; border-radius: 10px;">
+                    <h3>🤖 AI Feedback:</h3>
+                    {feedback_html}
+                </div>
+                <hr style="margin: 20px 0;">
+                <p style="color: #666; font-size: 12px;">Generated by AI Resume Bot. Keep improving your resume!</p>
+            </div>
+        </body>
+        </html>
+        """
+    msg.attach(MIMEText(body, 'html'))
+    _send(email, msg)
@@ -0,0 +1,44 @@
+"""Exceptions raised by the core; the UI and API turn them into messages."""
+
+class ResumeBotError(Exception):
+    """Base class for errors reported by the core"""
+
+class DependencyMissing(ResumeBotError):
+    """An optional package needed for this operation is not installed"""
+
+class ExtractionError(ResumeBotError):
+    """Text could not be extracted from an uploaded file"""
+
+class PDFGenerationError(ResumeBotError):
+    """The rewritten resume could not be rendered as PDF"""
+
+class AudioGenerationError(ResumeBotError):
+    """Audio tips could not be generated"""
+
+class EmailNotConfigured(ResumeBotError):
+    """EMAIL_CONFIG still holds the placeholder sender"""
+
+class EmailAuthError(ResumeBotError):
+    """The SMTP server rejected the sender credentials"""
+
+class EmailError(ResumeBotError):
+    """An email could not be sent"""
+
+class UploadRejected(ExtractionError):
+    """An upload exceeds UPLOAD_LIMITS or looks like a decompression bomb"""
+
+class AdmissionRejected(ResumeBotError):
+    """A user is over an operation's rate limit, or there was no free slot in time"""
+
+    def __init__(self, message, operation, reason, retry_after):
+        super().__init__(message)
+        self.operation = operation
+        self.reason = reason            # 'rate_limited', 'busy' or 'queue_timeout'
+        self.retry_after = retry_after  # Seconds until a retry can succeed
+
+class ResetRateLimited(ResumeBotError):
+    """Too many password reset codes were requested for one email address"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds until another code can be sent
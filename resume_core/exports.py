@@ -0,0 +1,135 @@
+"""PDF and audio renditions of feedback and rewritten resumes."""
+import os
+import tempfile
+from io import BytesIO
+
+from .errors import AudioGenerationError, DependencyMissing, PDFGenerationError
+from .metrics import timed
+from .parsing import parse_resume
+
+def audio_script(target_role, structured=None, parsed=None):
+    """The spoken tips, read from structured feedback when available.
+
+    The general tips fall back on the resume's parse, when given, to point
+    at a missing summary, skills section or contact details.
+    """
+    tips = []
+    if structured and not structured.get('error'):
+        tips = (structured.get('improvements', []) + structured.get('recommendations', []))[:5]
+
+    if tips:
+        ordinals = ["First", "Second", "Third", "Fourth", "Finally"]
+        spoken_tips = "\n\n".join(f"{ordinal}, {tip[0].lower() + tip[1:]}."
+                                   for ordinal, tip in zip(ordinals, tips))
+        return f"""
+        Hello! Here are the key tips to improve your resume for the {target_role} position.
+
+        {spoken_tips}
+
+        Remember, a great resume tells a story of how your experience makes you the perfect fit for this role. Keep refining and good luck with your applications!
+        """
+
+    summary_tip = ("First, focus on strengthening your professional summary. Make sure it clearly states your "
+                   f"value proposition and aligns with the {target_role} requirements.")
+    final_tip = ("Finally, consider adding a dedicated skills section if you don't have one, and make sure your "
+                 "contact information is up to date.")
+    if parsed is not None:
+        if not parsed.summary:
+            summary_tip = ("First, add a short professional summary at the top. State your value proposition "
+                           f"in two or three lines aligned with the {target_role} requirements.")
+        if 'skills' not in parsed.section_names:
+            final_tip = ("Finally, add a dedicated skills section listing the tools and technologies "
+                         f"{target_role} roles ask for.")
+        elif parsed.contact.email is None or parsed.contact.phone is None:
+            final_tip = "Finally, put your email address and phone number at the top, so recruiters can reach you."
+        else:
+            final_tip = f"Finally, keep your skills section focused on what {target_role} roles ask for."
+    return f"""
+        Hello! Here are the key tips to improve your resume for the {target_role} position.
+
+        {summary_tip}
+
+        Second, add more quantifiable achievements. Instead of saying you improved processes, specify by how much - percentages, dollar amounts, or timeframes make a big difference.
+
+        Third, include industry-specific keywords that are relevant to {target_role}. This helps your resume pass through applicant tracking systems.
+
+        Fourth, ensure your experience descriptions are tailored to match the job requirements. Highlight skills and technologies that are most relevant.
+
+        {final_tip}
+
+        Remember, a great resume tells a story of how your experience makes you the perfect fit for this role. Keep refining and good luck with your applications!
+        """
+
+@timed('generate_audio_tips')
+def generate_audio_tips(feedback, target_role, structured=None, parsed=None):
+    """Generate audio tips from feedback using gTTS, returns MP3 bytes"""
+    try:
+        from gtts import gTTS
+    except ImportError:
+        raise DependencyMissing("Audio generation requires gTTS. Please install missing dependencies.")
+    try:
+        tts = gTTS(text=audio_script(target_role, structured, parsed), lang='en', slow=False)
+
+        # Save to temporary file
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as audio_file:
+            audio_path = audio_file.name
+        try:
+            tts.save(audio_path)
+            with open(audio_path, 'rb') as f:
+                return f.read()
+        finally:
+            os.unlink(audio_path)
+    except Exception as e:
+        raise AudioGenerationError(f"Error generating audio: {e}") from e
+
+@timed('create_pdf_resume')
+def create_pdf_resume(rewritten_text, filename, parsed=None):
+    """Create a PDF file from rewritten resume text (or its ParsedResume), returns PDF bytes"""
+    try:
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    except ImportError:
+        raise DependencyMissing("PDF generation requires reportlab. Please install missing dependencies.")
+    try:
+        pdf_buffer = BytesIO()
+
+        # Create PDF document
+        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+        styles = getSampleStyleSheet()
+
+        # Custom styles
+        title_style = styles['Title']
+        title_style.fontSize = 16
+        title_style.spaceAfter = 12
+
+        heading_style = styles['Heading2']
+        heading_style.fontSize = 12
+        heading_style.spaceAfter = 6
+        heading_style.spaceBefore = 12
+
+        normal_style = styles['Normal']
+        normal_style.fontSize = 10
+        normal_style.spaceAfter = 6
+
+        # Lay out the parsed sections: headings, bold subheadings, bullets and text
+        parsed = parsed or parse_resume(rewritten_text)
+        story = []
+        for section in parsed.sections:
+            if section.heading:
+                story.append(Paragraph(section.heading, heading_style))
+            for kind, line in section.lines:
+                if kind == 'blank':
+                    story.append(Spacer(1, 6))
+                elif kind == 'subheading':
+                    story.append(Paragraph(line, heading_style))
+                elif kind == 'bullet':
+                    story.append(Paragraph(f"● {line}", normal_style))
+                else:
+                    story.append(Paragraph(line, normal_style))
+
+        doc.build(story)
+        return pdf_buffer.getvalue()
+    except Exception as e:
+        raise PDFGenerationError(f"Error creating PDF: {e}") from e
@@ -0,0 +1,222 @@
+"""Text extraction from uploaded PDF and DOCX resumes.
+
+Uploads are checked against ``config.UPLOAD_LIMITS`` before and while they
+are parsed: oversized files, PDFs with too many pages and compressed parts
+that inflate far beyond their stored size raise UploadRejected, and text
+extraction stops at a character ceiling.
+
+Every stream in a PDF (page contents, object streams, xref streams) is
+measured before PyPDF2 sees the file, since PyPDF2 inflates them whole.
+DOCX text is read with a streaming XML parser, so it also stops at the
+character ceiling instead of building the whole document first.
+"""
+import re
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+from . import config
+from .errors import DependencyMissing, ExtractionError, UploadRejected
+from .metrics import timed
+from .preprocessing import PAGE_BREAK
+
+PDF_MIME = 'application/pdf'
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+INFLATE_CHUNK = 64 * 1024
+# Well-compressed text is fine; only large parts are held to the compression ratio
+RATIO_CHECK_BYTES = 1024 * 1024
+
+PDF_STREAM_RE = re.compile(rb'\bobj\b(.{0,4096}?)\bstream\r?\n', re.S)
+PDF_LENGTH_RE = re.compile(rb'/Length\s+(\d+)(?!\s+\d+\s+R)')
+PDF_FILTER_RE = re.compile(rb'/Filter\s*(\[[^\]]*\]|/[^\s/\[\]<>()]+|\d+\s+\d+\s+R)')
+FLATE_FILTERS = {b'/FlateDecode', b'/Fl'}
+# Other filters that can expand, with their worst-case ratio; their streams are not inflated to measure them
+EXPANDING_FILTERS = {b'/LZWDecode': None, b'/LZW': None, b'/RunLengthDecode': 128, b'/RL': 128}
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DOCX_HEADER_RE = re.compile(r'word/header[0-9]*\.xml$')
+DOCX_FOOTER_RE = re.compile(r'word/footer[0-9]*\.xml$')
+
+def check_upload_size(size):
+    """Raise UploadRejected if a file of this many bytes is over the upload limit"""
+    limit = config.UPLOAD_LIMITS['max_bytes']
+    if size > limit:
+        raise UploadRejected(f"File is over the {limit / 1048576:.0f} MB upload limit")
+
+def _check_inflated(name, inflated, stored, total):
+    limits = config.UPLOAD_LIMITS
+    if total > limits['max_inflated_bytes']:
+        raise UploadRejected(f"File decompresses to more than {limits['max_inflated_bytes'] // 1048576} MB")
+    if inflated > RATIO_CHECK_BYTES and inflated > limits['max_compression_ratio'] * max(stored, 1):
+        raise UploadRejected(f"{name} is compressed more than {limits['max_compression_ratio']}:1, "
+                             f"which looks like a decompression bomb")
+
+def _inflated_size(data, limit):
+    """Size of a zlib stream once inflated, counting no further than limit"""
+    inflater = zlib.decompressobj()
+    size = 0
+    try:
+        while data and size <= limit:
+            size += len(inflater.decompress(data, INFLATE_CHUNK))
+            data = inflater.unconsumed_tail
+    except zlib.error:
+        pass  # Corrupt streams are reported by the PDF parser
+    return size
+
+def _pdf_streams(data):
+    """(dictionary, stored bytes) of every stream in a PDF's raw bytes"""
+    pos = 0
+    while match := PDF_STREAM_RE.search(data, pos):
+        # The window can span earlier objects without streams; the stream's own dictionary follows the last obj
+        dictionary = match.group(1).rsplit(b'obj', 1)[-1]
+        start = match.end()
+        length = PDF_LENGTH_RE.search(dictionary)
+        end = start + int(length.group(1)) if length else None
+        if end is None or not data[end:end + 32].lstrip().startswith(b'endstream'):
+            end = data.find(b'endstream', start)
+            if end == -1:
+                end = len(data)
+        yield dictionary, data[start:end]
+        pos = end
+
+def _check_pdf_streams(data):
+    """Reject PDFs whose streams would inflate past the limits once decoded.
+
+    A leading FlateDecode is inflated in bounded chunks and measured; other
+    expanding filters are counted at their worst case. Filter chains with
+    more than one expanding filter, and filters given by reference, are
+    rejected. Images count too: a page can name any stream as its contents.
+    """
+    limits = config.UPLOAD_LIMITS
+    total = 0
+    for number, (dictionary, stored) in enumerate(_pdf_streams(data), start=1):
+        match = PDF_FILTER_RE.search(dictionary)
+        if not match:
+            continue
+        if match.group(1).endswith(b'R'):
+            raise UploadRejected(f"PDF stream {number} has an indirect filter, which can't be checked")
+        filters = re.findall(rb'/[^\s/\[\]<>()]+', match.group(1))
+        expanding = [f for f in filters if f in FLATE_FILTERS or f in EXPANDING_FILTERS]
+        if len(expanding) > 1:
+            raise UploadRejected(f"PDF stream {number} has {len(expanding)} decompression filters chained")
+        if not expanding:
+            continue
+        if filters[0] in FLATE_FILTERS:
+            inflated = _inflated_size(stored, limits['max_inflated_bytes'] - total)
+        else:
+            ratio = EXPANDING_FILTERS.get(expanding[0]) or limits['max_compression_ratio']
+            inflated = len(stored) * ratio
+        total += inflated
+        _check_inflated(f"PDF stream {number}", inflated, len(stored), total)
+
+@timed('extract_text_from_pdf')
+def extract_text_from_pdf(file):
+    """Extract text from PDF file"""
+    try:
+        import PyPDF2
+    except ImportError:
+        raise DependencyMissing("PDF extraction requires PyPDF2. Please install missing dependencies.")
+    limits = config.UPLOAD_LIMITS
+    try:
+        file.seek(0)
+        _check_pdf_streams(file.read())
+        file.seek(0)
+        pdf_reader = PyPDF2.PdfReader(file)
+        page_count = len(pdf_reader.pages)
+        if page_count > limits['max_pages']:
+            raise UploadRejected(f"PDF has {page_count} pages; the limit is {limits['max_pages']}")
+        # Pages are kept apart so repeated headers/footers can be detected later
+        texts = []
+        characters = 0
+        for page in pdf_reader.pages:
+            text = page.extract_text()
+            texts.append(text)
+            characters += len(text)
+            if characters >= limits['max_text_chars']:
+                break
+        return PAGE_BREAK.join(texts)[:limits['max_text_chars']]
+    except UploadRejected:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"Error reading PDF: {e}") from e
+
+def _check_docx_archive(file):
+    """Reject DOCX packages whose XML parts inflate past the limits.
+
+    Declared sizes in the zip directory can lie, so every XML part is
+    actually inflated, a chunk at a time, and counted.
+    """
+    limits = config.UPLOAD_LIMITS
+    with zipfile.ZipFile(file) as archive:
+        entries = archive.infolist()
+        if len(entries) > limits['max_archive_entries']:
+            raise UploadRejected(f"DOCX has {len(entries)} parts; the limit is {limits['max_archive_entries']}")
+        total = 0
+        for entry in entries:
+            if not entry.filename.endswith(('.xml', '.rels')):
+                continue  # Media parts are never decompressed by text extraction
+            inflated = 0
+            with archive.open(entry) as part:
+                while chunk := part.read(INFLATE_CHUNK):
+                    inflated += len(chunk)
+                    _check_inflated(entry.filename, inflated, entry.compress_size, total + inflated)
+            total += inflated
+    file.seek(0)
+
+def _docx_part_text(archive, name, limit):
+    """Text of one WordprocessingML part, read no further than limit characters.
+
+    Paragraphs are separated by blank lines; tabs and line breaks are kept.
+    """
+    pieces = []
+    characters = 0
+    with archive.open(name) as part:
+        for _, element in ElementTree.iterparse(part):
+            tag = element.tag
+            if tag == WORD_NS + 't':
+                pieces.append(element.text or '')
+            elif tag == WORD_NS + 'tab':
+                pieces.append('\t')
+            elif tag in (WORD_NS + 'br', WORD_NS + 'cr'):
+                pieces.append('\n')
+            elif tag == WORD_NS + 'p':
+                pieces.append('\n\n')
+                # Finished paragraphs are dropped from the tree, so memory stays flat
+                element.clear()
+            else:
+                continue
+            characters += len(pieces[-1])
+            if characters >= limit:
+                break
+    return ''.join(pieces)
+
+@timed('extract_text_from_docx')
+def extract_text_from_docx(file):
+    """Extract text from DOCX file: headers, body, then footers"""
+    limit = config.UPLOAD_LIMITS['max_text_chars']
+    try:
+        _check_docx_archive(file)
+        with zipfile.ZipFile(file) as archive:
+            names = archive.namelist()
+            parts = ([name for name in names if DOCX_HEADER_RE.match(name)] + ['word/document.xml']
+                     + [name for name in names if DOCX_FOOTER_RE.match(name)])
+            text = ''
+            for name in parts:
+                text += _docx_part_text(archive, name, limit - len(text))
+                if len(text) >= limit:
+                    break
+        return text.strip()[:limit]
+    except UploadRejected:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"Error reading DOCX: {e}") from e
+
+def extract_resume_text(file, mime_type):
+    """Extract text from an uploaded PDF or DOCX file"""
+    file.seek(0, 2)
+    check_upload_size(file.tell())
+    file.seek(0)
+    if mime_type == PDF_MIME:
+        return extract_text_from_pdf(file)
+    return extract_text_from_docx(file)
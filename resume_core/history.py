@@ -0,0 +1,193 @@
+"""Saved analyses in feedback_history."""
+import atexit
+import json
+import threading
+
+from . import config
+from .compression import compress_text, decompress_text
+from .db import connect
+from .documents import delete_unreferenced_documents, remove_blobs
+from .metrics import timed
+from .writebehind import WriteBehindBuffer
+
+_write_buffer = None
+_write_buffer_lock = threading.Lock()
+
+def feedback_write_buffer():
+    """The process-wide write-behind buffer for feedback_history, started on first use"""
+    global _write_buffer
+    with _write_buffer_lock:
+        if _write_buffer is None:
+            settings = config.WRITE_BEHIND_CONFIG
+            _write_buffer = WriteBehindBuffer(save_feedback_records, settings['max_batch'],
+                                              settings['interval_seconds'], name='feedback_write_behind')
+            # Queued analyses are committed before the process exits
+            atexit.register(_write_buffer.close)
+        return _write_buffer
+
+def _read_your_writes(user_id):
+    """Commit this user's queued analyses before reading or deleting their history"""
+    if _write_buffer is not None and _write_buffer.has_pending(lambda record: record['user_id'] == user_id):
+        _write_buffer.flush()
+
+def queue_feedback(user_id, filename, target_role, feedback, score, rewritten_resume="", document_id=None,
+                   structured=None):
+    """Queue an analysis for the next grouped insert, returns a Future for its id"""
+    return feedback_write_buffer().submit({
+        'user_id': user_id, 'filename': filename, 'target_role': target_role, 'feedback': feedback,
+        'score': score, 'rewritten_resume': rewritten_resume, 'document_id': document_id,
+        'structured': structured
+    })
+
+@timed('save_feedback_to_db')
+def save_feedback_to_db(user_id, filename, target_role, feedback, score, rewritten_resume, document_id=None,
+                        structured=None):
+    """Save an analysis and return its id.
+
+    With write-behind enabled, concurrent saves share one transaction; the
+    call still returns only once its row is committed.
+    """
+    if config.WRITE_BEHIND_CONFIG['enabled']:
+        return queue_feedback(user_id, filename, target_role, feedback, score, rewritten_resume,
+                              document_id, structured).result()
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""INSERT INTO feedback_history
+                 (user_id, filename, target_role, feedback, score, rewritten_resume, document_id, feedback_json)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+              (user_id, filename, target_role, compress_text(c, feedback), score,
+               compress_text(c, rewritten_resume), document_id,
+               compress_text(c, json.dumps(structured)) if structured else None))
+    record_id = c.lastrowid
+    conn.commit()
+    conn.close()
+    return record_id
+
+@timed('save_feedback_batch_to_db')
+def save_feedback_batch_to_db(user_id, filename, results, document_id=None):
+    """Save several analyses of the same resume in one transaction"""
+    return save_feedback_records([
+        dict(result, user_id=user_id, filename=filename, document_id=document_id) for result in results
+    ])
+
+def save_feedback_records(records):
+    """Insert analyses in one transaction, returns their ids.
+
+    Each record is a dict with user_id, filename, target_role, feedback and
+    score, and optionally document_id, structured and rewritten_resume.
+    """
+    conn = connect()
+    c = conn.cursor()
+    record_ids = []
+    try:
+        for record in records:
+            structured = record.get('structured')
+            c.execute("""INSERT INTO feedback_history
+                         (user_id, filename, target_role, feedback, score, rewritten_resume, document_id,
+                          feedback_json)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                      (record['user_id'], record['filename'], record['target_role'],
+                       compress_text(c, record['feedback']), record['score'],
+                       compress_text(c, record.get('rewritten_resume', "")), record.get('document_id'),
+                       compress_text(c, json.dumps(structured)) if structured else None))
+            record_ids.append(c.lastrowid)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return record_ids
+
+def delete_user_history(user_id):
+    """Delete all feedback history for a user, returns the number of rows deleted.
+
+    Stored resumes that no remaining analysis refers to are deleted too,
+    with their files and matching index postings.
+    """
+    _read_your_writes(user_id)
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT DISTINCT document_id FROM feedback_history WHERE user_id = ? AND document_id IS NOT NULL",
+              (user_id,))
+    document_ids = [row[0] for row in c.fetchall()]
+    c.execute("DELETE FROM feedback_history WHERE user_id = ?", (user_id,))
+    deleted_count = c.rowcount
+    blob_paths = delete_unreferenced_documents(c, document_ids)
+    conn.commit()
+    conn.close()
+    remove_blobs(blob_paths)
+    return deleted_count
+
+@timed('get_user_history')
+def get_user_history(user_id):
+    """Get feedback history for a user as (filename, target_role, score, created_at, id) rows"""
+    _read_your_writes(user_id)
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""SELECT filename, target_role, score, created_at, id
+                 FROM feedback_history
+                 WHERE user_id = ?
+                 ORDER BY created_at DESC""", (user_id,))
+    history = c.fetchall()
+    conn.close()
+    return history
+
+def get_feedback_record(record_id, user_id):
+    """Get a single feedback record with its text columns decompressed"""
+    _read_your_writes(user_id)
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""SELECT id, filename, target_role, feedback, score, rewritten_resume, created_at, document_id,
+                        feedback_json, archived_at
+                 FROM feedback_history
+                 WHERE id = ? AND user_id = ?""", (record_id, user_id))
+    record = c.fetchone()
+    if record is None:
+        conn.close()
+        return None
+    result = {
+        'id': record[0],
+        'filename': record[1],
+        'target_role': record[2],
+        'feedback': decompress_text(c, record[3]),
+        'score': record[4],
+        'rewritten_resume': decompress_text(c, record[5]),
+        'created_at': record[6],
+        'document_id': record[7],
+        'structured': json.loads(decompress_text(c, record[8])) if record[8] else None,
+        'archived_at': record[9]
+    }
+    conn.close()
+    return result
+
+def get_previous_analysis(user_id, filename, target_role):
+    """The user's latest successful analysis of a file with this name for this role.
+
+    Returns {'record_id', 'document_id', 'structured'}, or None when there
+    is none with a stored document and structured feedback.
+    """
+    _read_your_writes(user_id)
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""SELECT id, document_id, feedback_json FROM feedback_history
+                 WHERE user_id = ? AND filename = ? AND target_role = ?
+                       AND document_id IS NOT NULL AND feedback_json IS NOT NULL
+                 ORDER BY id DESC LIMIT 5""", (user_id, filename, target_role))
+    previous = None
+    for record_id, document_id, feedback_json in c.fetchall():
+        structured = json.loads(decompress_text(c, feedback_json))
+        if not structured.get('error'):
+            previous = {'record_id': record_id, 'document_id': document_id, 'structured': structured}
+            break
+    conn.close()
+    return previous
+
+def update_rewritten_resume(record_id, rewritten_resume):
+    """Attach a rewritten resume to an existing feedback record"""
+    conn = connect()
+    c = conn.cursor()
+    c.execute("UPDATE feedback_history SET rewritten_resume = ? WHERE id = ?",
+              (compress_text(c, rewritten_resume), record_id))
+    conn.commit()
+    conn.close()
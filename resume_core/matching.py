@@ -0,0 +1,277 @@
+"""Job description matching over an inverted index of stored resumes.
+
+Each stored resume and saved job description is reduced to at most
+max_terms_per_document weighted terms: taxonomy skills found in the text,
+the skills listed in its skills section, and plain keywords. Weights are
+sublinear term counts, skills boosted by skill_weight, scaled to unit
+length. The terms go to posting tables (document_terms and job_terms)
+keyed by (term, id), so "which resumes fit this job description" and
+"which job descriptions fit this resume" are a few index lookups and one
+grouped SUM in SQLite, weighted by each term's inverse document
+frequency, rather than a rescan of every stored text.
+
+Resumes are indexed when they are stored. Documents stored before the
+index existed (or under an older index_version) are indexed in batches
+by the retention scheduler thread when a process starts and then at
+every run, or by ``python -m resume_core index``; matching itself never
+looks for them.
+"""
+import json
+import math
+from collections import Counter
+
+from . import config
+from .compression import compress_text, decompress_text
+from .db import connect
+from .metrics import timed
+from .parsing import ParsedResume, parse_resume
+from .scoring import GENERIC_SKILLS, ROLE_SKILLS, TOKEN_RE, _terms
+
+SKILL_VOCABULARY = frozenset(GENERIC_SKILLS.union(*ROLE_SKILLS.values()))
+
+# Words that carry no signal in resumes or job descriptions
+STOPWORDS = frozenset("""
+a about above across after all also am an and any are as at be been being both but by can could did do does
+doing during each etc for from had has have having he her here hers him his how i if in into is it its just
+may me more most must my no nor not of off on once only or other our ours out over own per same she should
+so some such than that the their theirs them then there these they this those through to too under until
+up upon us very via was we were what when where which while who whom why will with within without would
+you your yours
+ability able candidate candidates company including looking plus preferred required responsibilities
+responsible role seeking strong team using work working year years
+""".split())
+
+def _normalize_term(text):
+    return ' '.join(TOKEN_RE.findall((text or '').lower()))
+
+def extract_terms(text, parsed=None):
+    """A text's weighted terms as {term: weight}, scaled to unit length.
+
+    Keywords are weighted 1 + log(count); skills, from the taxonomy or a
+    parsed skills section, get skill_weight on top.
+    """
+    settings = config.MATCHING_CONFIG
+    tokens = TOKEN_RE.findall((text or '').lower())
+    counts = Counter(token for token in tokens
+                     if len(token) > 2 and token not in STOPWORDS and not token.isdigit())
+    weights = {token: 1 + math.log(count) for token, count in counts.items()}
+
+    skills = set(SKILL_VOCABULARY & _terms(tokens))
+    if parsed is not None:
+        skills.update(skill for skill in map(_normalize_term, parsed.skills) if 0 < len(skill) <= 40)
+    for skill in skills:
+        weights[skill] = weights.get(skill, 1.0) * settings['skill_weight']
+
+    kept = sorted(weights.items(), key=lambda item: (-item[1], item[0]))[:settings['max_terms_per_document']]
+    norm = math.sqrt(sum(weight * weight for _, weight in kept)) or 1.0
+    return {term: weight / norm for term, weight in kept}
+
+def is_skill(term):
+    return term in SKILL_VOCABULARY
+
+def index_document(c, document_id, text, parsed=None):
+    """Replace a stored resume's postings; the caller commits"""
+    terms = extract_terms(text, parsed)
+    c.execute("DELETE FROM document_terms WHERE document_id = ?", (document_id,))
+    c.executemany("INSERT INTO document_terms (term, document_id, weight) VALUES (?, ?, ?)",
+                  [(term, document_id, weight) for term, weight in terms.items()])
+    c.execute("UPDATE documents SET index_version = ? WHERE id = ?",
+              (config.MATCHING_CONFIG['index_version'], document_id))
+    return terms
+
+def _index_rows(c, rows):
+    for document_id, text, parsed in rows:
+        text = decompress_text(c, text)
+        parsed = (ParsedResume.from_dict(json.loads(decompress_text(c, parsed)))
+                  if parsed is not None else parse_resume(text))
+        index_document(c, document_id, text, parsed)
+
+@timed('update_document_index')
+def update_document_index():
+    """Index stored resumes that are missing from the index or on an older version, returns the count.
+
+    Index versions only increase, so the lookup is a range search on
+    idx_documents_index_version and costs nothing once every document is
+    up to date.
+    """
+    settings = config.MATCHING_CONFIG
+    conn = connect()
+    c = conn.cursor()
+    indexed = 0
+    try:
+        while True:
+            c.execute("""SELECT id, extracted_text, parsed_resume FROM documents
+                         WHERE extracted_text IS NOT NULL AND COALESCE(index_version, 0) < ?
+                         LIMIT ?""", (settings['index_version'], settings['backfill_batch_size']))
+            rows = c.fetchall()
+            if not rows:
+                break
+            _index_rows(c, rows)
+            conn.commit()
+            indexed += len(rows)
+    finally:
+        conn.close()
+    return indexed
+
+def _query_weights(c, terms, table, count_sql, count_params=()):
+    """IDF-weighted query terms as [(term, weight)], highest first"""
+    settings = config.MATCHING_CONFIG
+    query = sorted(terms.items(), key=lambda item: (-item[1], item[0]))[:settings['max_query_terms']]
+    if not query:
+        return []
+    c.execute(count_sql, count_params)
+    n = c.fetchone()[0]
+    c.execute(f"SELECT term, COUNT(*) FROM {table} WHERE term IN ({','.join('?' * len(query))}) GROUP BY term",
+              [term for term, _ in query])
+    df = dict(c.fetchall())
+    return [(term, weight * (math.log((1 + n) / (1 + df.get(term, 0))) + 1)) for term, weight in query]
+
+def _values(weights):
+    """A VALUES list and its parameters for a (term, weight) CTE"""
+    return ', '.join(['(?, ?)'] * len(weights)), [value for pair in weights for value in pair]
+
+def _matched_skills(c, table, id_column, ids, terms):
+    """{id: sorted skills it shares with terms} for the given ids"""
+    skills = [term for term in terms if is_skill(term)]
+    matched = {i: [] for i in ids}
+    if not skills or not ids:
+        return matched
+    c.execute(f"""SELECT {id_column}, term FROM {table}
+                  WHERE term IN ({','.join('?' * len(skills))}) AND {id_column} IN ({','.join('?' * len(ids))})
+                  ORDER BY term""", skills + list(ids))
+    for i, term in c.fetchall():
+        matched[i].append(term)
+    return matched
+
+@timed('match_resumes')
+def match_resumes(job_text, top_k=10, user_id=None):
+    """Stored resumes that best fit a job description, best first.
+
+    With a user_id only resumes that user has analyzed are considered.
+    Each match is a dict with document_id, filename, score (relative, for
+    ordering), matched_skills and missing_skills.
+    """
+    terms = extract_terms(job_text, parse_resume(job_text))
+    conn = connect()
+    c = conn.cursor()
+    weights = _query_weights(c, terms, 'document_terms',
+                             "SELECT COUNT(*) FROM documents WHERE index_version IS NOT NULL")
+    if not weights:
+        conn.close()
+        return []
+
+    values, params = _values(weights)
+    scope = ""
+    if user_id is not None:
+        scope = "WHERE t.document_id IN (SELECT document_id FROM feedback_history WHERE user_id = ?)"
+        params.append(user_id)
+    c.execute(f"""WITH query (term, weight) AS (VALUES {values})
+                  SELECT t.document_id, d.filename, SUM(t.weight * query.weight) AS score
+                  FROM query JOIN document_terms t ON t.term = query.term
+                  JOIN documents d ON d.id = t.document_id
+                  {scope}
+                  GROUP BY t.document_id ORDER BY score DESC, t.document_id LIMIT ?""", params + [top_k])
+    rows = c.fetchall()
+
+    wanted = [term for term in terms if is_skill(term)]
+    matched = _matched_skills(c, 'document_terms', 'document_id', [row[0] for row in rows], terms)
+    conn.close()
+    return [{'document_id': document_id, 'filename': filename, 'score': score,
+             'matched_skills': matched[document_id],
+             'missing_skills': sorted(set(wanted) - set(matched[document_id]))}
+            for document_id, filename, score in rows]
+
+@timed('match_job_descriptions')
+def match_job_descriptions(document_id, user_id, top_k=10):
+    """A user's saved job descriptions that best fit a stored resume, best first.
+
+    Each match is a dict with job_id, title, score (relative, for
+    ordering), matched_skills and missing_skills. A resume the backfill
+    has not reached yet is indexed on the spot.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT term, weight FROM document_terms WHERE document_id = ?", (document_id,))
+    terms = dict(c.fetchall())
+    if not terms:
+        c.execute("SELECT id, extracted_text, parsed_resume FROM documents WHERE id = ? AND extracted_text IS NOT NULL",
+                  (document_id,))
+        _index_rows(c, c.fetchall())
+        conn.commit()
+        c.execute("SELECT term, weight FROM document_terms WHERE document_id = ?", (document_id,))
+        terms = dict(c.fetchall())
+
+    weights = _query_weights(c, terms, 'job_terms', "SELECT COUNT(*) FROM job_descriptions")
+    if not weights:
+        conn.close()
+        return []
+    values, params = _values(weights)
+    c.execute(f"""WITH query (term, weight) AS (VALUES {values})
+                  SELECT t.job_id, j.title, SUM(t.weight * query.weight) AS score
+                  FROM query JOIN job_terms t ON t.term = query.term
+                  JOIN job_descriptions j ON j.id = t.job_id
+                  WHERE j.user_id = ?
+                  GROUP BY t.job_id ORDER BY score DESC, t.job_id LIMIT ?""", params + [user_id, top_k])
+    rows = c.fetchall()
+
+    job_ids = [row[0] for row in rows]
+    wanted = {job_id: [] for job_id in job_ids}
+    if job_ids:
+        c.execute(f"SELECT job_id, term FROM job_terms WHERE job_id IN ({','.join('?' * len(job_ids))}) ORDER BY term",
+                  job_ids)
+        for job_id, term in c.fetchall():
+            if is_skill(term):
+                wanted[job_id].append(term)
+    conn.close()
+    return [{'job_id': job_id, 'title': title, 'score': score,
+             'matched_skills': [term for term in wanted[job_id] if term in terms],
+             'missing_skills': [term for term in wanted[job_id] if term not in terms]}
+            for job_id, title, score in rows]
+
+def save_job_description(user_id, title, text):
+    """Save and index a job description, returns its id"""
+    terms = extract_terms(text, parse_resume(text))
+    conn = connect()
+    c = conn.cursor()
+    c.execute("INSERT INTO job_descriptions (user_id, title, description) VALUES (?, ?, ?)",
+              (user_id, title, compress_text(c, text)))
+    job_id = c.lastrowid
+    c.executemany("INSERT INTO job_terms (term, job_id, weight) VALUES (?, ?, ?)",
+                  [(term, job_id, weight) for term, weight in terms.items()])
+    conn.commit()
+    conn.close()
+    return job_id
+
+def get_job_descriptions(user_id):
+    """A user's saved job descriptions as [{'id', 'title', 'created_at'}], newest first"""
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT id, title, created_at FROM job_descriptions WHERE user_id = ? ORDER BY id DESC", (user_id,))
+    jobs = [{'id': row[0], 'title': row[1], 'created_at': row[2]} for row in c.fetchall()]
+    conn.close()
+    return jobs
+
+def get_job_description(job_id, user_id):
+    """One of a user's job descriptions with its text, None if not theirs"""
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT id, title, description, created_at FROM job_descriptions WHERE id = ? AND user_id = ?",
+              (job_id, user_id))
+    row = c.fetchone()
+    job = None
+    if row:
+        job = {'id': row[0], 'title': row[1], 'text': decompress_text(c, row[2]), 'created_at': row[3]}
+    conn.close()
+    return job
+
+def delete_job_description(job_id, user_id):
+    """Delete one of a user's job descriptions and its postings, returns whether it existed"""
+    conn = connect()
+    c = conn.cursor()
+    c.execute("DELETE FROM job_descriptions WHERE id = ? AND user_id = ?", (job_id, user_id))
+    deleted = c.rowcount > 0
+    if deleted:
+        c.execute("DELETE FROM job_terms WHERE job_id = ?", (job_id,))
+    conn.commit()
+    conn.close()
+    return deleted
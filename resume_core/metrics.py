@@ -0,0 +1,195 @@
+"""Lightweight timing spans and a Prometheus metrics endpoint.
+
+Wrap hot-path functions with ``@timed('name')`` or blocks with
+``with span('name'):`` to record call counts, errors and a latency
+histogram per span. ``render_prometheus()`` returns the text exposition
+format and ``start_metrics_server()`` serves it on a local port.
+
+Recording is off unless RESUME_BOT_METRICS=1 (or ``set_enabled(True)``);
+while off, a wrapped call costs one flag check.
+"""
+import os
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = 'resume_bot'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = os.getenv('RESUME_BOT_METRICS', '0') == '1'
+_lock = threading.Lock()
+_spans = {}       # name -> {'buckets': per-bucket counts (+Inf last), 'sum', 'count', 'errors'}
+_counters = {}    # (name, label tuple) -> value
+_server = None
+
+def is_enabled():
+    return _enabled
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+def observe(name, seconds, error=False):
+    """Record one span duration"""
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = {'buckets': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0, 'errors': 0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats['buckets'][i] += 1
+                break
+        else:
+            stats['buckets'][-1] += 1
+        stats['sum'] += seconds
+        stats['count'] += 1
+        if error:
+            stats['errors'] += 1
+
+def increment(name, amount=1, **labels):
+    """Add to a counter, e.g. increment('admission_rejected', operation='rewrite')"""
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+class span:
+    """Context manager timing a block: ``with span('pdf_build'): ...``"""
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        if _enabled:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.started is not None:
+            observe(self.name, time.perf_counter() - self.started, error=exc_type is not None)
+        return False
+
+def timed(name):
+    """Decorator recording each call of a function as a span"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                observe(name, time.perf_counter() - started, error=True)
+                raise
+            observe(name, time.perf_counter() - started)
+            return result
+        return wrapper
+    return decorator
+
+def _quantile(buckets, count, q):
+    """Estimate a quantile from histogram buckets by linear interpolation"""
+    if not count:
+        return 0.0
+    target = q * count
+    seen = 0
+    lower = 0.0
+    for i, bucket_count in enumerate(buckets):
+        upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+        if seen + bucket_count >= target and bucket_count:
+            return lower + (upper - lower) * (target - seen) / bucket_count
+        seen += bucket_count
+        lower = upper
+    return BUCKETS[-1]
+
+def snapshot():
+    """Per-span summary rows for display"""
+    with _lock:
+        spans = {name: {'buckets': list(s['buckets']), 'sum': s['sum'], 'count': s['count'], 'errors': s['errors']}
+                 for name, s in _spans.items()}
+        counters = dict(_counters)
+    rows = []
+    for name in sorted(spans):
+        s = spans[name]
+        rows.append({
+            'span': name,
+            'count': s['count'],
+            'errors': s['errors'],
+            'avg_ms': s['sum'] / s['count'] * 1000 if s['count'] else 0.0,
+            'p50_ms': _quantile(s['buckets'], s['count'], 0.5) * 1000,
+            'p95_ms': _quantile(s['buckets'], s['count'], 0.95) * 1000
+        })
+    return rows, counters
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        spans = {name: dict(s, buckets=list(s['buckets'])) for name, s in _spans.items()}
+        counters = dict(_counters)
+
+    lines = [
+        f"# HELP {PREFIX}_span_seconds Duration of instrumented operations.",
+        f"# TYPE {PREFIX}_span_seconds histogram"
+    ]
+    for name in sorted(spans):
+        s = spans[name]
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, s['buckets']):
+            cumulative += bucket_count
+            lines.append(f'{PREFIX}_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{PREFIX}_span_seconds_bucket{{span="{name}",le="+Inf"}} {s["count"]}')
+        lines.append(f'{PREFIX}_span_seconds_sum{{span="{name}"}} {s["sum"]:.6f}')
+        lines.append(f'{PREFIX}_span_seconds_count{{span="{name}"}} {s["count"]}')
+
+    lines += [f"# HELP {PREFIX}_span_errors_total Instrumented operations that raised.",
+              f"# TYPE {PREFIX}_span_errors_total counter"]
+    for name in sorted(spans):
+        lines.append(f'{PREFIX}_span_errors_total{{span="{name}"}} {spans[name]["errors"]}')
+
+    for metric in sorted({name for name, _ in counters}):
+        lines += [f"# TYPE {PREFIX}_{metric}_total counter"]
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f'{PREFIX}_{name}_total{{{label_text}}} {value}' if label_text
+                             else f'{PREFIX}_{name}_total {value}')
+    return '\n'.join(lines) + '\n'
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') not in ('', '/metrics'):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port=None, host='127.0.0.1'):
+    """Serve /metrics on a background thread, once per process"""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        port = port or int(os.getenv('RESUME_BOT_METRICS_PORT', '9108'))
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError:
+            # Another process (e.g. a second worker) already serves this port
+            return None
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        return _server
@@ -0,0 +1,197 @@
+"""Resume text parsed into contact details, sections and dated entries.
+
+parse_resume reads the text once, line by line, with precompiled patterns
+(the section heading and contact patterns are also used by ``scoring``).
+The result keeps every line under its section, tagged as text, bullet,
+subheading or blank, so a resume can be rendered back from it. It also
+exposes the contact details, summary, experience and education entries,
+and skills. A parse round-trips through to_dict()/from_dict(), so it is
+stored next to a document's extracted text, and scoring, feedback, PDF
+rendering and audio tips all reuse it instead of re-scanning the text.
+The model classes use __slots__, because batch runs hold one parse per
+document in memory.
+"""
+import re
+
+# Section headings, matched against whole lines
+SECTION_PATTERNS = {
+    'contact': re.compile(r'^\s*(contact|personal)\s+(information|details)\b', re.I),
+    'summary': re.compile(r'^\s*(professional\s+|career\s+)?(summary|profile|objective|about me)\b', re.I),
+    'experience': re.compile(r'^\s*(professional\s+|work\s+|relevant\s+)?(experience|employment|work history|career history)\b', re.I),
+    'education': re.compile(r'^\s*(education|academic background|qualifications)\b', re.I),
+    'skills': re.compile(r'^\s*(technical\s+|core\s+|key\s+)?(skills|competencies|technologies|tech stack)\b', re.I),
+    'projects': re.compile(r'^\s*(key\s+|selected\s+|personal\s+)?projects\b', re.I),
+    'certifications': re.compile(r'^\s*(certifications?|licenses?|courses)\b', re.I)
+}
+LINE_SPLIT_RE = re.compile(r'\r?\n')
+BULLET_RE = re.compile(r'^\s*(?:[•●▪◦\-\*–]|\d+[.)])\s+')
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+PHONE_RE = re.compile(r'(?:\+?\d[\d\s().-]{7,}\d)')
+LINKEDIN_RE = re.compile(r'linkedin\.com/', re.I)
+MARKUP_RE = re.compile(r'^#+\s*|\*\*|__')
+MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+DATE = rf'(?:{MONTH}\s+|\d{{1,2}}/)?(?:19|20)\d{{2}}'
+DATE_RANGE_RE = re.compile(rf'({DATE})\s*(?:-|–|—|to)\s*({DATE}|present|current|now|today)\b', re.I)
+DATE_RE = re.compile(rf'\b{DATE}\b', re.I)
+LINK_RE = re.compile(r'(?:https?://|www\.)\S+|\b(?:linkedin|github|gitlab)\.com/\S*', re.I)
+SKILL_LABEL_RE = re.compile(r'^[^:,]{1,30}:\s*')
+SKILL_SPLIT_RE = re.compile(r'\s*[,;|•·]\s*')
+ENTRY_SECTIONS = ('experience', 'education')
+
+class Contact:
+    """Name and contact details, from the top of the resume or anywhere they appear"""
+    __slots__ = ('name', 'email', 'phone', 'links')
+
+    def __init__(self, name=None, email=None, phone=None, links=None):
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.links = links if links is not None else []
+
+class Entry:
+    """An experience or education item: its heading lines, dates and bullets"""
+    __slots__ = ('heading', 'start', 'end', 'bullets')
+
+    def __init__(self, heading, start=None, end=None, bullets=None):
+        self.heading = heading
+        self.start = start
+        self.end = end
+        self.bullets = bullets if bullets is not None else []
+
+class Section:
+    """A section's name ('header' before the first heading), heading text and (kind, text) lines"""
+    __slots__ = ('name', 'heading', 'lines')
+
+    def __init__(self, name, heading=None, lines=None):
+        self.name = name
+        self.heading = heading
+        self.lines = lines if lines is not None else []
+
+class ParsedResume:
+    """One parse of a resume's text"""
+    __slots__ = ('contact', 'summary', 'experience', 'education', 'skills', 'sections')
+
+    def __init__(self, contact, summary, experience, education, skills, sections):
+        self.contact = contact
+        self.summary = summary
+        self.experience = experience
+        self.education = education
+        self.skills = skills
+        self.sections = sections
+
+    @property
+    def section_names(self):
+        """Names of the headed sections, in order, without repeats"""
+        names = []
+        for section in self.sections:
+            if section.name != 'header' and section.name not in names:
+                names.append(section.name)
+        return names
+
+    def to_dict(self):
+        entry = lambda e: {'heading': e.heading, 'start': e.start, 'end': e.end, 'bullets': e.bullets}
+        return {
+            'contact': {'name': self.contact.name, 'email': self.contact.email, 'phone': self.contact.phone,
+                        'links': self.contact.links},
+            'summary': self.summary,
+            'experience': [entry(e) for e in self.experience],
+            'education': [entry(e) for e in self.education],
+            'skills': self.skills,
+            'sections': [{'name': s.name, 'heading': s.heading, 'lines': s.lines} for s in self.sections]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            Contact(**data['contact']),
+            data['summary'],
+            [Entry(**e) for e in data['experience']],
+            [Entry(**e) for e in data['education']],
+            data['skills'],
+            [Section(s['name'], s['heading'], [tuple(line) for line in s['lines']]) for s in data['sections']]
+        )
+
+def _section_name(plain):
+    if len(plain) > 40:
+        return None
+    for name, pattern in SECTION_PATTERNS.items():
+        if pattern.match(plain):
+            return name
+    return None
+
+def _read_contact(contact, line):
+    if contact.email is None:
+        match = EMAIL_RE.search(line)
+        if match:
+            contact.email = match.group(0)
+    if contact.phone is None:
+        match = PHONE_RE.search(line)
+        # "2019 - 2021" looks like a phone number too
+        if match and not DATE_RANGE_RE.search(match.group(0)):
+            contact.phone = match.group(0).strip()
+    contact.links.extend(link.rstrip('.,;)') for link in LINK_RE.findall(line))
+
+def parse_resume(text):
+    """Parse resume text into a ParsedResume in one pass over its lines"""
+    contact = Contact()
+    header = Section('header')
+    sections = [header]
+    section = header
+    summary, experience, education, skills = [], [], [], []
+    seen_skills = set()
+    entry = None
+
+    for raw in LINE_SPLIT_RE.split(text or ''):
+        line = raw.strip()
+        if not line:
+            if section.lines and section.lines[-1][0] != 'blank':
+                section.lines.append(('blank', ''))
+            continue
+        plain = MARKUP_RE.sub('', line).strip()
+        name = _section_name(plain)
+        if name:
+            section = Section(name, plain.rstrip(':').strip())
+            sections.append(section)
+            entry = None
+            continue
+
+        bullet = BULLET_RE.match(line)
+        if bullet:
+            kind, content = 'bullet', MARKUP_RE.sub('', line[bullet.end():]).strip()
+        else:
+            kind = 'subheading' if (line.startswith('**') and line.endswith('**')) or line[0] == '#' else 'text'
+            content = plain
+        section.lines.append((kind, content))
+        _read_contact(contact, content)
+
+        if section.name == 'header':
+            if (contact.name is None and len(content) <= 60 and not EMAIL_RE.search(content)
+                    and not LINK_RE.search(content) and not any(ch.isdigit() for ch in content)):
+                contact.name = content
+        elif section.name == 'summary':
+            summary.append(content)
+        elif section.name == 'skills':
+            for skill in SKILL_SPLIT_RE.split(SKILL_LABEL_RE.sub('', content)):
+                if skill and skill.lower() not in seen_skills:
+                    seen_skills.add(skill.lower())
+                    skills.append(skill)
+        elif section.name in ENTRY_SECTIONS:
+            dates = DATE_RANGE_RE.search(content)
+            if kind == 'bullet' and entry is not None:
+                entry.bullets.append(content)
+                continue
+            # A heading line starts a new entry once the current one has bullets or dates of its own
+            if entry is None or entry.bullets or (dates and entry.end):
+                entry = Entry(content)
+                (experience if section.name == 'experience' else education).append(entry)
+            else:
+                entry.heading = f"{entry.heading} | {content}"
+            if entry.end is None:
+                if dates:
+                    entry.start, entry.end = dates.group(1), dates.group(2)
+                else:
+                    single = DATE_RE.search(content)
+                    if single:
+                        entry.end = single.group(0)
+
+    return ParsedResume(contact, ' '.join(summary), experience, education, skills, sections)
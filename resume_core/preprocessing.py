@@ -0,0 +1,209 @@
+"""Resume text compaction before LLM calls.
+
+PDF extraction leaves noise behind: headers and footers repeated on every
+page, page numbers, words hyphenated across line breaks and runs of
+whitespace. compact_resume_text removes that noise and then trims the text
+section by section to a token budget, returning a report of the tokens
+saved so the prompt cost of every request is visible.
+"""
+import math
+import re
+
+from .parsing import SECTION_PATTERNS
+
+# Optional exact tokenizer, the estimate below is used without it
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+PAGE_BREAK = '\f'
+
+# Sections are trimmed last-to-first by this priority (first is kept longest)
+SECTION_PRIORITY = ['header', 'summary', 'experience', 'skills', 'projects',
+                    'education', 'certifications', 'contact', 'other']
+MIN_SECTION_TOKENS = 40
+
+LIGATURES = str.maketrans({'\ufb01': 'fi', '\ufb02': 'fl', '\ufb00': 'ff', '\ufb03': 'ffi', '\ufb04': 'ffl',
+                           '\u00a0': ' ', '\u2009': ' ', '\u200b': '', '\u00ad': ''})
+HYPHENATION_RE = re.compile(r'(\w)-\n(\w)')
+INLINE_SPACE_RE = re.compile(r'[ \t\r\v]+')
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+PAGE_NUMBER_RE = re.compile(r'^\s*[-\u2013]?\s*(page\s*)?(\d+)(?:\s*(/|of)\s*(\d+))?\s*[-\u2013]?\s*$', re.I)
+TOKEN_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+def estimate_tokens(text):
+    """Token count of text, exact with tiktoken, otherwise a close local estimate"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # BPE vocabularies hold most short words whole and split long words
+    # into ~4 character pieces; digits and punctuation are separate tokens
+    tokens = 0
+    for piece in TOKEN_PIECE_RE.findall(text):
+        if piece[0].isalpha():
+            tokens += 1 if len(piece) <= 6 else math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+def normalize_whitespace(text):
+    """Fix ligatures, join hyphenated words and collapse whitespace runs"""
+    text = text.translate(LIGATURES)
+    text = HYPHENATION_RE.sub(r'\1\2', text)
+    lines = [INLINE_SPACE_RE.sub(' ', line).strip() for line in text.split('\n')]
+    return BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
+
+def is_page_number(line, page_count):
+    """Whether a line is a page number: "Page 2", "2 of 3", or a bare "2" or "2/3" no larger than page_count.
+
+    Bare numbers above the page count are kept, they are usually years or figures.
+    """
+    match = PAGE_NUMBER_RE.match(line)
+    if not match:
+        return False
+    label, number, separator, total = match.groups()
+    number = int(number)
+    if total is not None and number > int(total):
+        return False
+    if label or (separator or '').lower() == 'of':
+        return True
+    return number <= page_count and (total is None or int(total) <= page_count)
+
+def strip_page_furniture(pages, edge_lines=3):
+    """Drop headers/footers repeated across pages and page numbers.
+
+    Returns (pages, removed_line_count). A header is a line found among the
+    first few lines of most pages, a footer one found among the last few;
+    body text that repeats, even next to a page break, is kept.
+    """
+    split_pages = [page.split('\n') for page in pages]
+    repeated = set()
+    if len(pages) >= 2:
+        counts = {}
+        for lines in split_pages:
+            edges = {('top', line.strip().lower()) for line in lines[:edge_lines] if line.strip()}
+            edges |= {('bottom', line.strip().lower()) for line in lines[-edge_lines:] if line.strip()}
+            for edge in edges:
+                counts[edge] = counts.get(edge, 0) + 1
+        threshold = max(2, math.ceil(len(pages) / 2))
+        repeated = {edge for edge, count in counts.items() if count >= threshold}
+
+    # The first copy of a repeated line is kept, it is often the candidate's name
+    removed = 0
+    cleaned = []
+    seen = set()
+    for lines in split_pages:
+        kept = []
+        for i, line in enumerate(lines):
+            key = line.strip().lower()
+            furniture = ((i < edge_lines and ('top', key) in repeated)
+                         or (i >= len(lines) - edge_lines and ('bottom', key) in repeated))
+            at_edge = i < edge_lines or i >= len(lines) - edge_lines
+            if (furniture and key in seen) or (at_edge and is_page_number(line, len(pages))):
+                removed += 1
+                continue
+            if furniture:
+                seen.add(key)
+            kept.append(line)
+        cleaned.append('\n'.join(kept))
+    return cleaned, removed
+
+def split_sections(text):
+    """Split text into [(section_name, text)] using the scoring section headings"""
+    sections = [['header', []]]
+    for line in text.split('\n'):
+        name = None
+        if len(line) <= 40:
+            for section, pattern in SECTION_PATTERNS.items():
+                if pattern.match(line):
+                    name = section
+                    break
+        if name:
+            sections.append([name, [line]])
+        else:
+            sections[-1][1].append(line)
+    return [(name, '\n'.join(lines).strip()) for name, lines in sections if '\n'.join(lines).strip()]
+
+def _truncate_lines(text, max_tokens):
+    kept = []
+    used = 0
+    for line in text.split('\n'):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(kept)
+
+def fit_to_budget(text, max_tokens):
+    """Trim whole lines from the least important sections until text fits.
+
+    Returns (text, truncated_section_names).
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text, []
+
+    sections = split_sections(text)
+    costs = [estimate_tokens(body) for _, body in sections]
+    rank = {name: i for i, name in enumerate(SECTION_PRIORITY)}
+    order = sorted(range(len(sections)),
+                   key=lambda i: rank.get(sections[i][0], len(SECTION_PRIORITY)), reverse=True)
+
+    # Shrink low-priority sections first, down to a small floor each
+    excess = sum(costs) - max_tokens
+    budgets = list(costs)
+    for i in order:
+        if excess <= 0:
+            break
+        cut = min(excess, max(0, costs[i] - MIN_SECTION_TOKENS))
+        budgets[i] -= cut
+        excess -= cut
+    # Still over budget: drop sections entirely, least important first
+    for i in order:
+        if excess <= 0:
+            break
+        excess -= budgets[i]
+        budgets[i] = 0
+
+    truncated = []
+    parts = []
+    for (name, body), cost, budget in zip(sections, costs, budgets):
+        if budget < cost:
+            truncated.append(name)
+            body = _truncate_lines(body, budget)
+        if body:
+            parts.append(body)
+    return '\n\n'.join(parts), truncated
+
+def compact_resume_text(text, max_tokens=None):
+    """Clean extracted resume text and fit it to a token budget.
+
+    Returns (compacted_text, report) where report holds the token counts
+    before and after and what was removed.
+    """
+    text = text or ''
+    tokens_before = estimate_tokens(text)
+
+    pages = [normalize_whitespace(page) for page in text.split(PAGE_BREAK)]
+    pages, furniture_lines = strip_page_furniture(pages)
+    # Lines repeated in the body (the same bullet under two roles, say) are kept
+    compacted = normalize_whitespace('\n\n'.join(page for page in pages if page.strip()))
+
+    truncated = []
+    if max_tokens:
+        compacted, truncated = fit_to_budget(compacted, max_tokens)
+
+    tokens_after = estimate_tokens(compacted)
+    return compacted, {
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'tokens_saved': tokens_before - tokens_after,
+        'furniture_lines_removed': furniture_lines,
+        'truncated_sections': truncated,
+        'exact': _ENCODING is not None
+    }
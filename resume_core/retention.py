@@ -0,0 +1,184 @@
+"""Retention for feedback_history: archive old text, reclaim free pages.
+
+After RETENTION_CONFIG['full_text_days'] an analysis keeps only its score,
+role, filename and date in the database. Its feedback, rewritten resume and
+structured JSON are appended to a gzip-compressed JSONL archive first.
+Stored resumes older than that which no unarchived analysis refers to lose
+their text, parse, uploaded file and matching postings.
+Databases use ``auto_vacuum=INCREMENTAL``, so the pages freed by archiving
+and by "Clear History" are returned to the filesystem a few at a time
+instead of by a full VACUUM. The scheduler thread also backfills the job
+matching index.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+
+from . import config
+from .compression import decompress_text
+from .db import connect
+from .documents import remove_blobs, strip_documents
+from .matching import update_document_index
+from .state import claim_lease
+
+def archive_old_feedback(days=None):
+    """Move the text of analyses older than days into an archive file.
+
+    Returns {'rows': archived row count, 'path': archive file or None}.
+    Each batch is written and fsynced before its rows are cleared, inside
+    one write transaction, so concurrent archivers never archive a row twice.
+    """
+    settings = config.RETENTION_CONFIG
+    days = settings['full_text_days'] if days is None else days
+    os.makedirs(settings['archive_dir'], exist_ok=True)
+    path = os.path.join(settings['archive_dir'], f"feedback_history-{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+    archived = 0
+
+    conn = connect()
+    c = conn.cursor()
+    try:
+        while True:
+            c.execute("BEGIN IMMEDIATE")
+            c.execute("""SELECT id, user_id, filename, target_role, score, created_at, document_id,
+                                feedback, rewritten_resume, feedback_json
+                         FROM feedback_history
+                         WHERE archived_at IS NULL AND created_at < datetime('now', ?)
+                         ORDER BY id LIMIT ?""", (f"-{days} days", settings['batch_size']))
+            rows = c.fetchall()
+            if not rows:
+                conn.rollback()
+                break
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                for row in rows:
+                    structured = decompress_text(c, row[9])
+                    f.write(json.dumps({
+                        'id': row[0], 'user_id': row[1], 'filename': row[2], 'target_role': row[3],
+                        'score': row[4], 'created_at': row[5], 'document_id': row[6],
+                        'feedback': decompress_text(c, row[7]),
+                        'rewritten_resume': decompress_text(c, row[8]),
+                        'structured': json.loads(structured) if structured else None
+                    }) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            c.executemany("""UPDATE feedback_history
+                             SET feedback = NULL, rewritten_resume = NULL, feedback_json = NULL,
+                                 archived_at = CURRENT_TIMESTAMP
+                             WHERE id = ?""", [(row[0],) for row in rows])
+            conn.commit()
+            archived += len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return {'rows': archived, 'path': path if archived else None}
+
+def purge_old_documents(days=None):
+    """Strip stored resumes older than days that no unarchived analysis references, returns how many"""
+    settings = config.RETENTION_CONFIG
+    days = settings['full_text_days'] if days is None else days
+    purged = 0
+    conn = connect()
+    c = conn.cursor()
+    try:
+        while True:
+            c.execute("BEGIN IMMEDIATE")
+            c.execute("""SELECT id FROM documents d
+                         WHERE d.created_at < datetime('now', ?)
+                           AND (d.extracted_text IS NOT NULL OR d.index_version IS NOT NULL)
+                           AND NOT EXISTS (SELECT 1 FROM feedback_history h
+                                           WHERE h.document_id = d.id AND h.archived_at IS NULL)
+                         ORDER BY id LIMIT ?""", (f"-{days} days", settings['batch_size']))
+            document_ids = [row[0] for row in c.fetchall()]
+            if not document_ids:
+                conn.rollback()
+                break
+            blob_paths = strip_documents(c, document_ids)
+            conn.commit()
+            remove_blobs(blob_paths)
+            purged += len(document_ids)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return purged
+
+def read_archive(path):
+    """Archived analyses from one archive file, as dicts"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def incremental_vacuum(pages=None):
+    """Return up to pages free pages to the filesystem, returns how many were freed"""
+    pages = config.RETENTION_CONFIG['vacuum_pages'] if pages is None else pages
+    conn = connect()
+    c = conn.cursor()
+    c.execute("PRAGMA freelist_count")
+    before = c.fetchone()[0]
+    # execute() steps the pragma once, which frees a single page; a script runs it to completion
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    c.execute("PRAGMA freelist_count")
+    after = c.fetchone()[0]
+    conn.close()
+    return before - after
+
+def enable_incremental_vacuum():
+    """Switch an existing database to auto_vacuum=INCREMENTAL (runs one full VACUUM).
+
+    Returns False if it already was.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("PRAGMA auto_vacuum")
+    switched = c.fetchone()[0] != 2
+    if switched:
+        c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        c.execute("VACUUM")
+    conn.close()
+    return switched
+
+def run_retention():
+    """Archive expired analyses, strip the resumes only they referenced, then release free pages"""
+    report = archive_old_feedback()
+    report['documents'] = purge_old_documents()
+    report['pages_freed'] = incremental_vacuum()
+    return report
+
+_scheduler = None
+_lock = threading.Lock()
+
+def start_retention_scheduler(interval=None):
+    """Run retention on a background thread every interval seconds.
+
+    The thread also indexes stored resumes the matching index is missing,
+    once at start and then before every run, so it is started even with
+    retention disabled. One thread per process; of all the processes
+    sharing the state store only the one holding the scheduler lease runs it.
+    """
+    global _scheduler
+    with _lock:
+        if _scheduler is not None:
+            return _scheduler
+        interval = interval or config.RETENTION_CONFIG['interval_seconds']
+
+        def run(retention):
+            try:
+                if claim_lease('retention-scheduler', interval * 2):
+                    update_document_index()
+                    if retention and config.RETENTION_CONFIG['enabled']:
+                        run_retention()
+            except Exception:
+                pass  # A locked or busy database is retried at the next interval
+
+        def loop():
+            run(retention=False)
+            while True:
+                time.sleep(interval)
+                run(retention=True)
+
+        _scheduler = threading.Thread(target=loop, name='retention-scheduler', daemon=True)
+        _scheduler.start()
+        return _scheduler
@@ -0,0 +1,288 @@
+"""Deterministic local resume scoring.
+
+Scores a resume against a target role without any network calls, using a
+skill taxonomy per role, section detection, quantified achievement
+detection, action verb density and length checks. Patterns are compiled
+once at import time and skills are matched with set lookups, so a resume
+is scored in a few milliseconds and large batches can be pre-screened
+before any LLM tokens are spent.
+"""
+import re
+
+from .parsing import LINKEDIN_RE, parse_resume
+
+# Skill taxonomy per role (lowercase, multi-word skills allowed up to 3 words)
+ROLE_SKILLS = {
+    'software engineer': {
+        'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'go', 'git', 'sql',
+        'rest', 'api', 'microservices', 'docker', 'kubernetes', 'aws', 'ci/cd',
+        'unit testing', 'algorithms', 'data structures', 'system design', 'linux',
+        'agile', 'code review', 'design patterns'
+    },
+    'frontend developer': {
+        'javascript', 'typescript', 'react', 'vue', 'angular', 'html', 'css', 'sass',
+        'webpack', 'redux', 'accessibility', 'responsive design', 'jest', 'git',
+        'rest', 'graphql', 'figma', 'performance optimization'
+    },
+    'backend developer': {
+        'python', 'java', 'go', 'node.js', 'sql', 'postgresql', 'mysql', 'redis',
+        'rest', 'api', 'graphql', 'microservices', 'docker', 'kubernetes', 'kafka',
+        'aws', 'caching', 'unit testing', 'linux', 'system design'
+    },
+    'data scientist': {
+        'python', 'r', 'sql', 'machine learning', 'statistics', 'pandas', 'numpy',
+        'scikit-learn', 'tensorflow', 'pytorch', 'deep learning', 'a/b testing',
+        'data visualization', 'regression', 'classification', 'nlp',
+        'feature engineering', 'jupyter', 'hypothesis testing', 'spark'
+    },
+    'data analyst': {
+        'sql', 'excel', 'python', 'r', 'tableau', 'power bi', 'data visualization',
+        'statistics', 'dashboards', 'reporting', 'pandas', 'data cleaning', 'kpi',
+        'a/b testing', 'looker', 'google analytics', 'etl'
+    },
+    'data engineer': {
+        'python', 'sql', 'spark', 'airflow', 'etl', 'kafka', 'data pipelines',
+        'data warehouse', 'snowflake', 'dbt', 'aws', 'docker', 'hadoop',
+        'data modeling', 'postgresql', 'scala', 'bigquery'
+    },
+    'ml engineer': {
+        'python', 'machine learning', 'deep learning', 'tensorflow', 'pytorch',
+        'mlops', 'docker', 'kubernetes', 'model deployment', 'feature engineering',
+        'spark', 'airflow', 'aws', 'sagemaker', 'ci/cd', 'data pipelines', 'nlp',
+        'computer vision', 'model monitoring'
+    },
+    'devops engineer': {
+        'linux', 'docker', 'kubernetes', 'terraform', 'ansible', 'aws', 'azure', 'gcp',
+        'ci/cd', 'jenkins', 'github actions', 'monitoring', 'prometheus', 'grafana',
+        'bash', 'python', 'networking', 'infrastructure as code', 'incident response'
+    },
+    'product manager': {
+        'roadmap', 'product strategy', 'stakeholder management', 'user research',
+        'agile', 'scrum', 'jira', 'kpi', 'okrs', 'a/b testing', 'go-to-market',
+        'prioritization', 'requirements', 'analytics', 'sql', 'market research',
+        'product lifecycle', 'customer discovery'
+    },
+    'project manager': {
+        'project planning', 'budgeting', 'risk management', 'stakeholder management',
+        'agile', 'scrum', 'waterfall', 'jira', 'ms project', 'pmp', 'scheduling',
+        'resource allocation', 'reporting', 'vendor management', 'change management'
+    },
+    'designer': {
+        'figma', 'sketch', 'adobe xd', 'photoshop', 'illustrator', 'user research',
+        'wireframing', 'prototyping', 'ui design', 'ux design', 'design systems',
+        'usability testing', 'typography', 'accessibility', 'interaction design'
+    },
+    'marketing manager': {
+        'seo', 'sem', 'content marketing', 'social media', 'email marketing',
+        'google analytics', 'campaign management', 'brand strategy', 'crm',
+        'hubspot', 'salesforce', 'market research', 'budget', 'roi', 'a/b testing',
+        'lead generation', 'copywriting'
+    },
+    'sales manager': {
+        'crm', 'salesforce', 'pipeline management', 'negotiation', 'forecasting',
+        'quota', 'account management', 'lead generation', 'b2b', 'b2c',
+        'territory management', 'cold calling', 'revenue growth', 'closing'
+    }
+}
+
+# Skills that help for any role
+GENERIC_SKILLS = {
+    'communication', 'leadership', 'teamwork', 'problem solving', 'collaboration',
+    'mentoring', 'presentation', 'time management', 'analytical'
+}
+
+# Role aliases that don't share words with a taxonomy key
+ROLE_ALIASES = {
+    'swe': 'software engineer',
+    'developer': 'software engineer',
+    'programmer': 'software engineer',
+    'machine learning engineer': 'ml engineer',
+    'ai engineer': 'ml engineer',
+    'ux designer': 'designer',
+    'ui designer': 'designer',
+    'product designer': 'designer',
+    'business analyst': 'data analyst',
+    'sre': 'devops engineer',
+    'site reliability engineer': 'devops engineer',
+    'pm': 'product manager'
+}
+
+ACTION_VERBS = {
+    'achieved', 'accelerated', 'administered', 'analyzed', 'architected', 'automated',
+    'boosted', 'built', 'collaborated', 'coordinated', 'created', 'cut', 'decreased',
+    'delivered', 'deployed', 'designed', 'developed', 'directed', 'drove', 'enhanced',
+    'established', 'executed', 'expanded', 'generated', 'grew', 'guided', 'headed',
+    'implemented', 'improved', 'increased', 'initiated', 'introduced', 'launched',
+    'led', 'managed', 'mentored', 'migrated', 'modernized', 'negotiated', 'optimized',
+    'orchestrated', 'organized', 'oversaw', 'owned', 'pioneered', 'planned', 'produced',
+    'reduced', 'redesigned', 'refactored', 'resolved', 'restructured', 'saved',
+    'scaled', 'secured', 'shipped', 'simplified', 'spearheaded', 'streamlined',
+    'supervised', 'trained', 'transformed', 'won'
+}
+
+REQUIRED_SECTIONS = ('summary', 'experience', 'education', 'skills')
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+LEADING_WORD_RE = re.compile(r'^\s*(?:[•●▪◦\-\*–]|\d+[.)])?\s*([A-Za-z]+)')
+YEAR_RE = re.compile(r'\b(?:19|20)\d{2}\b')
+METRIC_RE = re.compile(
+    r'\d+(?:\.\d+)?\s?%'                          # percentages
+    r'|[$€£]\s?\d[\d,]*(?:\.\d+)?\s?[kmb]?\b'      # money
+    r'|\b\d+(?:\.\d+)?\s?x\b'                      # multipliers
+    r'|\b\d[\d,]*\+?\s(?:users|customers|clients|people|members|engineers|'
+    r'projects|hours|days|weeks|months|requests|transactions|downloads|leads)\b',
+    re.I
+)
+
+# Weight of each component in the final score (sums to 100)
+SCORE_WEIGHTS = {
+    'keywords': 35,
+    'sections': 20,
+    'quantified': 15,
+    'action_verbs': 15,
+    'length': 10,
+    'contact': 5
+}
+IDEAL_WORD_RANGE = (350, 900)
+
+def resolve_role(target_role):
+    """Map a free-text role to a taxonomy key, or None if nothing matches"""
+    role = ' '.join(TOKEN_RE.findall((target_role or '').lower()))
+    if role in ROLE_SKILLS:
+        return role
+    if role in ROLE_ALIASES:
+        return ROLE_ALIASES[role]
+    for alias, key in ROLE_ALIASES.items():
+        if f' {alias} ' in f' {role} ':
+            return key
+
+    # Best word overlap, e.g. "Senior Data Scientist" -> "data scientist"
+    words = set(role.split())
+    best_key, best_overlap = None, 0
+    for key in ROLE_SKILLS:
+        overlap = len(words & set(key.split()))
+        if overlap > best_overlap or (overlap == best_overlap and overlap and len(key) < len(best_key)):
+            best_key, best_overlap = key, overlap
+    # A lone generic word like "engineer" or "manager" is not enough
+    if best_overlap >= 2 or (best_overlap == 1 and len(best_key.split()) == 1):
+        return best_key
+    return None
+
+def role_skills(target_role):
+    """Skills expected for a role, falling back to the role's own words"""
+    key = resolve_role(target_role)
+    if key:
+        return ROLE_SKILLS[key]
+    return {word for word in TOKEN_RE.findall((target_role or '').lower()) if len(word) > 2}
+
+def _terms(tokens):
+    """Unigrams, bigrams and trigrams of a token list as a set"""
+    terms = set(tokens)
+    terms.update(' '.join(tokens[i:i + 2]) for i in range(len(tokens) - 1))
+    terms.update(' '.join(tokens[i:i + 3]) for i in range(len(tokens) - 2))
+    return terms
+
+def score_resume(resume_text, target_role, parsed=None):
+    """Score a resume against a target role.
+
+    Returns a dict with the overall 0-100 score, a per-component breakdown
+    and the details behind it (matched and missing skills, detected
+    sections, quantified lines, ...). Pass the resume's ParsedResume as
+    parsed to reuse it; the text is parsed otherwise.
+    """
+    text = resume_text or ''
+    parsed = parsed or parse_resume(text)
+    tokens = TOKEN_RE.findall(text.lower())
+    terms = _terms(tokens)
+
+    # Keywords
+    expected = role_skills(target_role)
+    matched = sorted(expected & terms)
+    missing = sorted(expected - terms)
+    generic = sorted(GENERIC_SKILLS & terms)
+    keyword_ratio = len(matched) / len(expected) if expected else 0.0
+    # Matching ~60% of a taxonomy is already a strong resume
+    keyword_score = min(1.0, keyword_ratio / 0.6 + 0.02 * len(generic))
+
+    # Sections and content lines
+    sections = parsed.section_names
+    bullet_lines = 0
+    quantified_lines = 0
+    action_lines = 0
+    for section in parsed.sections:
+        for kind, line in section.lines:
+            if kind == 'bullet' or len(line) > 40:
+                bullet_lines += 1
+                if METRIC_RE.search(YEAR_RE.sub('', line)):
+                    quantified_lines += 1
+                leading = LEADING_WORD_RE.match(line)
+                if leading and leading.group(1).lower() in ACTION_VERBS:
+                    action_lines += 1
+    section_score = sum(1 for name in REQUIRED_SECTIONS if name in sections) / len(REQUIRED_SECTIONS)
+    if 'projects' in sections or 'certifications' in sections:
+        section_score = min(1.0, section_score + 0.1)
+
+    # Quantified achievements and action verbs, relative to content lines
+    quantified_ratio = quantified_lines / bullet_lines if bullet_lines else 0.0
+    quantified_score = min(1.0, quantified_ratio / 0.4)
+    action_ratio = action_lines / bullet_lines if bullet_lines else 0.0
+    action_score = min(1.0, action_ratio / 0.5)
+
+    # Length
+    word_count = len(text.split())
+    low, high = IDEAL_WORD_RANGE
+    if low <= word_count <= high:
+        length_score = 1.0
+    elif word_count < low:
+        length_score = word_count / low
+    else:
+        length_score = max(0.0, 1.0 - (word_count - high) / high)
+
+    # Contact details
+    contact = {
+        'email': parsed.contact.email is not None,
+        'phone': parsed.contact.phone is not None,
+        'linkedin': any(LINKEDIN_RE.search(link) for link in parsed.contact.links)
+    }
+    contact_score = sum(contact.values()) / len(contact)
+
+    components = {
+        'keywords': keyword_score,
+        'sections': section_score,
+        'quantified': quantified_score,
+        'action_verbs': action_score,
+        'length': length_score,
+        'contact': contact_score
+    }
+    breakdown = {name: round(value * SCORE_WEIGHTS[name], 1) for name, value in components.items()}
+
+    return {
+        'score': int(round(sum(breakdown.values()))),
+        'breakdown': breakdown,
+        'role_key': resolve_role(target_role),
+        'matched_skills': matched,
+        'missing_skills': missing,
+        'generic_skills': generic,
+        'sections': sections,
+        'missing_sections': [name for name in REQUIRED_SECTIONS if name not in sections],
+        'quantified_lines': quantified_lines,
+        'action_verb_lines': action_lines,
+        'content_lines': bullet_lines,
+        'word_count': word_count,
+        'contact': contact
+    }
+
+def prescreen_resumes(resumes, target_role, min_score=60):
+    """Score a batch of (resume_id, text) pairs and rank them.
+
+    Returns a list of (resume_id, result) sorted by score, best first, with
+    result['passed'] set for resumes that reach min_score and are worth
+    sending to the LLM.
+    """
+    ranked = []
+    for resume_id, text in resumes:
+        result = score_resume(text, target_role)
+        result['passed'] = result['score'] >= min_score
+        ranked.append((resume_id, result))
+    ranked.sort(key=lambda item: item[1]['score'], reverse=True)
+    return ranked
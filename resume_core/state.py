@@ -0,0 +1,188 @@
+"""Shared session state and caches, so any app replica can serve any request.
+
+Values are JSON-serializable objects stored under string keys with an
+optional time to live. STATE_STORE_CONFIG['backend'] selects the store:
+
+- ``sqlite`` (default): the ``state_store`` table in the app database
+- ``redis``: a Redis server at REDIS_URL (needs the ``redis`` package)
+- ``memory``: MemoryRedis, an in-process stand-in with the same commands
+  as a Redis client, for tests and single-process development
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+from . import config
+from .compression import compress_text, decompress_text
+from .db import connect
+
+class StateStore:
+    """Key/value store for JSON values with optional expiry"""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def update(self, key, func, ttl=None):
+        """Atomically replace a key's value (None if unset) with func(value), returns the new value"""
+        raise NotImplementedError
+
+class SQLiteStateStore(StateStore):
+    """State kept in the state_store table; expired rows are purged periodically"""
+
+    def __init__(self):
+        self._next_purge = 0.0
+
+    def get(self, key):
+        conn = connect()
+        c = conn.cursor()
+        c.execute("SELECT value FROM state_store WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                  (key, time.time()))
+        row = c.fetchone()
+        value = json.loads(decompress_text(c, row[0])) if row else None
+        conn.close()
+        return value
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = connect()
+        c = conn.cursor()
+        c.execute("""INSERT INTO state_store (key, value, expires_at) VALUES (?, ?, ?)
+                     ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at""",
+                  (key, compress_text(c, json.dumps(value)), now + ttl if ttl else None))
+        if now >= self._next_purge:
+            c.execute("DELETE FROM state_store WHERE expires_at <= ?", (now,))
+            self._next_purge = now + config.STATE_STORE_CONFIG['purge_interval_seconds']
+        conn.commit()
+        conn.close()
+
+    def delete(self, key):
+        conn = connect()
+        conn.execute("DELETE FROM state_store WHERE key = ?", (key,))
+        conn.commit()
+        conn.close()
+
+    def update(self, key, func, ttl=None):
+        now = time.time()
+        conn = connect()
+        c = conn.cursor()
+        try:
+            # Take the write lock before reading, so concurrent updates from other processes serialize
+            c.execute("BEGIN IMMEDIATE")
+            c.execute("SELECT value FROM state_store WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                      (key, now))
+            row = c.fetchone()
+            value = func(json.loads(decompress_text(c, row[0])) if row else None)
+            c.execute("""INSERT INTO state_store (key, value, expires_at) VALUES (?, ?, ?)
+                         ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at""",
+                      (key, compress_text(c, json.dumps(value)), now + ttl if ttl else None))
+            conn.commit()
+        finally:
+            conn.close()
+        return value
+
+class RedisStateStore(StateStore):
+    """State kept in Redis, or anything with the same get/set/delete/lock commands"""
+
+    def __init__(self, client, prefix='resume_bot:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def update(self, key, func, ttl=None):
+        with self.client.lock(self.prefix + 'lock:' + key, timeout=10, blocking_timeout=10):
+            value = func(self.get(key))
+            self.set(key, value, ttl)
+        return value
+
+class MemoryRedis:
+    """In-process stand-in for the subset of the Redis client API used here"""
+
+    def __init__(self):
+        self._data = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            item = self._data.get(name)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None, px=None):
+        ttl = ex if ex else px / 1000 if px else None
+        with self._lock:
+            self._data[name] = (value.encode() if isinstance(value, str) else value,
+                                time.time() + ttl if ttl else None)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_state_store():
+    """The process-wide store for STATE_STORE_CONFIG['backend'], created on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = config.STATE_STORE_CONFIG['backend']
+            if backend == 'redis':
+                import redis  # Only needed when state is kept in Redis
+                _store = RedisStateStore(redis.Redis.from_url(config.STATE_STORE_CONFIG['redis_url']))
+            elif backend == 'memory':
+                _store = RedisStateStore(MemoryRedis())
+            else:
+                _store = SQLiteStateStore()
+        return _store
+
+_lease_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def claim_lease(name, ttl):
+    """Whether this process holds the named lease for the next ttl seconds.
+
+    A free or expired lease is taken, and the holder renews it on every
+    call, so of all the processes sharing the store (API workers, app
+    replicas) one at a time runs the work the lease guards.
+    """
+    def claim(lease):
+        now = time.time()
+        if lease is None or lease['owner'] == _lease_owner or lease['expires_at'] <= now:
+            return {'owner': _lease_owner, 'expires_at': now + ttl}
+        return lease
+
+    return get_state_store().update(f"lease:{name}", claim, ttl=ttl)['owner'] == _lease_owner
+
+def reset_state_store():
+    """Forget the current store, e.g. after changing DB_PATH or the backend"""
+    global _store
+    with _store_lock:
+        _store = None
@@ -0,0 +1,108 @@
+"""Write-behind buffer that groups single-row inserts into shared transactions.
+
+Records submitted from any thread are queued and written together by one
+background thread. Records that arrive while a batch is being committed
+go into the next one, optionally waiting up to ``interval`` seconds for
+more (at most ``max_batch`` per transaction). A burst of concurrent saves
+then costs one transaction (and one fsync) per batch instead of one per
+row, and only one thread competes for SQLite's write lock. Every submit
+returns a Future for the new row's id. Queued records are written before
+the interpreter exits.
+"""
+import threading
+import time
+from concurrent.futures import Future, wait
+
+from . import metrics
+
+class WriteBehindBuffer:
+    """Queues records for write_batch(records) -> ids, run on a background thread"""
+
+    def __init__(self, write_batch, max_batch=100, interval=0.0, name='write-behind'):
+        self._write_batch = write_batch
+        self.max_batch = max_batch
+        self.interval = interval
+        self.name = name
+        self._pending = []      # (record, future) not yet taken by the writer
+        self._in_flight = []    # the batch being written right now
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Queue a record, returns a Future for its id"""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name} buffer is closed")
+            self._pending.append((record, future))
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def has_pending(self, predicate):
+        """Whether any queued or in-flight record matches predicate(record)"""
+        with self._cond:
+            return any(predicate(record) for record, _ in self._pending + self._in_flight)
+
+    def flush(self, timeout=None):
+        """Write everything queued so far, returning once it is committed"""
+        with self._cond:
+            futures = [future for _, future in self._pending + self._in_flight]
+            if self._pending:
+                self._flush_requested = True
+                self._cond.notify()
+        wait(futures, timeout=timeout)
+
+    def close(self):
+        """Write whatever is queued and stop the writer thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            # Let a burst build up, unless the batch is full or someone is waiting on a flush
+            deadline = time.monotonic() + self.interval
+            while len(self._pending) < self.max_batch and not (self._flush_requested or self._closed):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self._in_flight = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            if not self._pending:
+                self._flush_requested = False
+            return self._in_flight
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                ids = self._write_batch([record for record, _ in batch])
+            except Exception:
+                # One bad record must not fail everyone else's save, so retry them one by one
+                self._write_individually(batch)
+            else:
+                for (_, future), record_id in zip(batch, ids):
+                    future.set_result(record_id)
+                metrics.increment(f"{self.name}_batches")
+                metrics.increment(f"{self.name}_rows", len(batch))
+            with self._cond:
+                self._in_flight = []
+
+    def _write_individually(self, batch):
+        for record, future in batch:
+            try:
+                future.set_result(self._write_batch([record])[0])
+            except Exception as e:
+                future.set_exception(e)
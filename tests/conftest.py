@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resume_core import compression, config, db, state
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh database in a temporary directory, which is also the working directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, 'DB_PATH', str(tmp_path / 'test.db'))
+    monkeypatch.setitem(config.STATE_STORE_CONFIG, 'backend', 'sqlite')
+    state.reset_state_store()
+    compression.reset_compression_cache()
+    db.init_database()
+    yield tmp_path
+    state.reset_state_store()
+    compression.reset_compression_cache()
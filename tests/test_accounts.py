@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from resume_core import accounts, config
+from resume_core.errors import ResetRateLimited
+
+EMAIL = 'jane@example.com'
+
+@pytest.fixture
+def user(database, monkeypatch):
+    monkeypatch.setattr(accounts, '_secret_key', None)
+    monkeypatch.setitem(config.PASSWORD_RESET_CONFIG, 'secret_key', 'test-secret')
+    assert accounts.create_user('jane', EMAIL, '555', 'old-password')
+    return EMAIL
+
+def _wrong(code):
+    return '000000' if code != '000000' else '111111'
+
+def test_reset_code_exchanged_for_token_and_new_password(user):
+    code = accounts.create_password_reset(user)
+    token = accounts.verify_password_reset(user, code)
+    assert token
+    assert accounts.verify_password_reset(user, code) is None          # Used up
+    assert accounts.reset_password_with_token(user, token, 'new-password')
+    assert not accounts.reset_password_with_token(user, token, 'again')  # Used up too
+    assert accounts.authenticate_user('jane', 'new-password')
+    assert accounts.authenticate_user('jane', 'old-password') is None
+
+def test_unknown_address_gets_no_code(user):
+    assert accounts.create_password_reset('nobody@example.com') is None
+
+def test_code_locks_after_max_attempts(user):
+    code = accounts.create_password_reset(user)
+    for _ in range(config.PASSWORD_RESET_CONFIG['max_attempts']):
+        assert accounts.verify_password_reset(user, _wrong(code)) is None
+    assert accounts.verify_password_reset(user, code) is None
+
+def test_resending_keeps_the_failed_attempts(user):
+    code = accounts.create_password_reset(user)
+    for _ in range(config.PASSWORD_RESET_CONFIG['max_attempts']):
+        accounts.verify_password_reset(user, _wrong(code))
+    code = accounts.create_password_reset(user)
+    assert accounts.verify_password_reset(user, code) is None
+
+def test_expired_code_and_token_are_rejected(user, monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr(accounts.time, 'time', lambda: clock[0])
+    code = accounts.create_password_reset(user)
+    clock[0] += config.PASSWORD_RESET_CONFIG['code_ttl_seconds'] + 1
+    assert accounts.verify_password_reset(user, code) is None
+
+    code = accounts.create_password_reset(user)
+    token = accounts.verify_password_reset(user, code)
+    clock[0] += config.PASSWORD_RESET_CONFIG['token_ttl_seconds'] + 1
+    assert not accounts.reset_password_with_token(user, token, 'new-password')
+
+def test_codes_per_address_are_limited(user, monkeypatch):
+    monkeypatch.setitem(config.PASSWORD_RESET_CONFIG, 'max_codes_per_window', 2)
+    accounts.create_password_reset(user)
+    accounts.create_password_reset(user)
+    with pytest.raises(ResetRateLimited) as limited:
+        accounts.create_password_reset(user)
+    assert limited.value.retry_after > 0
+    # Unknown addresses are limited the same way, so the limit reveals nothing
+    accounts.create_password_reset('nobody@example.com')
+    accounts.create_password_reset('nobody@example.com')
+    with pytest.raises(ResetRateLimited):
+        accounts.create_password_reset('nobody@example.com')
+
+def test_codes_are_stored_as_keyed_hashes(user, database):
+    code = accounts.create_password_reset(user)
+    conn = sqlite3.connect(config.DB_PATH)
+    code_hash, salt = conn.execute("SELECT code_hash, salt FROM password_resets").fetchone()
+    conn.close()
+    assert code not in code_hash
+    accounts._secret_key = b'another-secret'
+    assert accounts._hash_secret(code, salt) != code_hash
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from resume_core import admission, config
+from resume_core.admission import AdmissionController, FairQueue, admit, reserve
+from resume_core.errors import AdmissionRejected
+
+OPERATIONS = {'rewrite': {'rate_per_minute': 60, 'burst': 2, 'concurrency': 1}}
+
+@pytest.fixture
+def controller(database, monkeypatch):
+    monkeypatch.setitem(config.ADMISSION_CONFIG, 'enabled', True)
+    monkeypatch.setitem(config.ADMISSION_CONFIG, 'queue_timeout_seconds', 5)
+    monkeypatch.setitem(config.ADMISSION_CONFIG, 'operations', OPERATIONS)
+    admission.reset_admission_controller()
+    yield admission.get_admission_controller()
+    admission.reset_admission_controller()
+
+def test_fair_queue_serves_waiting_users_round_robin():
+    queue = FairQueue('analyze', concurrency=1)
+    queue.acquire('holder')
+    order = []
+    lock = threading.Lock()
+
+    def request(user):
+        queue.acquire(user, timeout=5)
+        with lock:
+            order.append(user)
+        queue.release()
+
+    # A queues three requests before B and C queue one each
+    threads = []
+    for user in ['A', 'A', 'A', 'B', 'C']:
+        thread = threading.Thread(target=request, args=(user,))
+        thread.start()
+        threads.append(thread)
+        while queue.snapshot()['waiting'] < len(threads):
+            time.sleep(0.001)
+    queue.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['A', 'B', 'C', 'A', 'A']
+
+def test_fair_queue_reports_positions_and_times_out():
+    queue = FairQueue('analyze', concurrency=1)
+    queue.acquire('holder')
+    positions = []
+    with pytest.raises(TimeoutError):
+        queue.acquire('A', timeout=0.05, on_wait=positions.append)
+    assert positions == [1]
+    assert queue.snapshot() == {'active': 1, 'waiting': 0, 'waiting_users': 0}
+
+def test_token_bucket_rejects_past_burst_then_refills(controller, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(admission.time, 'time', lambda: clock[0])
+    assert controller._take('u', 'rewrite', 1) == 0
+    assert controller._take('u', 'rewrite', 1) == 0
+    assert controller._take('u', 'rewrite', 1) == pytest.approx(1.0)   # One token a second
+    assert controller._take('other', 'rewrite', 1) == 0                  # Buckets are per user
+    clock[0] += 1.5
+    assert controller._take('u', 'rewrite', 1) == 0
+    clock[0] += 60
+    assert controller._take('u', 'rewrite', 2) == 0                      # Refilled to burst, no further
+
+def test_admit_raises_rate_limited_with_retry_after(controller):
+    for _ in range(2):
+        with admit('rewrite', 'u'):
+            pass
+    with pytest.raises(AdmissionRejected) as rejected:
+        with admit('rewrite', 'u'):
+            pass
+    assert rejected.value.reason == 'rate_limited' and rejected.value.retry_after > 0
+    assert controller.snapshot()[0]['rate_limited'] == 1
+
+def test_buckets_are_shared_between_controllers(controller):
+    other_process = AdmissionController(OPERATIONS)
+    assert controller._take('u', 'rewrite', 2) == 0
+    assert other_process._take('u', 'rewrite', 1) > 0
+
+def test_reserve_skips_without_tokens_and_prepaid_admit_is_not_charged_again(controller):
+    assert reserve('rewrite', 'u') and reserve('rewrite', 'u')
+    assert not reserve('rewrite', 'u')
+    with admit('rewrite', 'u', prepaid=True):
+        pass
+    assert controller.snapshot()[0]['skipped'] == 1
+
+def test_queue_timeout_refunds_tokens(controller, monkeypatch):
+    monkeypatch.setitem(config.ADMISSION_CONFIG, 'queue_timeout_seconds', 0.05)
+    with admit('rewrite', 'holder'):
+        with pytest.raises(AdmissionRejected) as rejected:
+            with admit('rewrite', 'u'):
+                pass
+    assert rejected.value.reason == 'queue_timeout'
+    assert controller._take('u', 'rewrite', 2) == 0
+
+def test_disabled_admission_is_a_no_op(controller, monkeypatch):
+    monkeypatch.setitem(config.ADMISSION_CONFIG, 'enabled', False)
+    for _ in range(5):
+        with admit('rewrite', 'u'):
+            pass
+        assert reserve('rewrite', 'u')
+
+def test_busy_slot_rejects_at_once_without_charging(controller):
+    with admit('rewrite', 'holder'):
+        started = time.monotonic()
+        with pytest.raises(AdmissionRejected) as rejected:
+            with admit('rewrite', 'u', wait=False):
+                pass
+        assert time.monotonic() - started < 1
+    assert rejected.value.reason == 'busy'
+    assert rejected.value.retry_after == config.ADMISSION_CONFIG['busy_retry_after_seconds']
+    assert controller._take('u', 'rewrite', 2) == 0
+    assert controller.snapshot()[0]['busy'] == 1
+
+def test_free_slot_admits_without_waiting(controller):
+    with admit('rewrite', 'u', wait=False):
+        assert controller.snapshot()[0]['active'] == 1
+    assert controller.snapshot()[0]['active'] == 0
@@ -0,0 +1,42 @@
+from resume_core import analytics, history
+
+def _save(score, role='Data Scientist'):
+    return history.save_feedback_to_db(1, 'resume.pdf', role, "Feedback.", score, "")
+
+def _chart(built):
+    overview = analytics.user_overview(1)
+
+    def build():
+        built.append(overview['score_trend'])
+        return {'points': len(overview['score_trend'])}
+    return analytics.cached_chart_spec('score_trend', overview['score_trend'], {'height': 300}, build)
+
+def test_user_overview_summarizes_history(database):
+    for score in (60, 80, 75):
+        _save(score)
+    _save(90, role='ML Engineer')
+    overview = analytics.user_overview(1)
+    assert [score for _, score in overview['score_trend']] == [60, 80, 75, 90]
+    assert overview['roles'] == [('Data Scientist', 3), ('ML Engineer', 1)]
+    assert overview['latest_score'] == 90 and overview['best_score'] == 90
+    assert overview['previous_avg_score'] == 215 / 3
+    assert overview['success_rate'] == 75
+
+def test_chart_is_rebuilt_only_after_a_new_analysis(database):
+    built = []
+    _save(60)
+    assert _chart(built) == {'points': 1}
+    assert _chart(built) == {'points': 1}
+    assert len(built) == 1
+
+    _save(80)
+    assert _chart(built) == {'points': 2}
+    assert len(built) == 2
+
+def test_chart_options_are_part_of_the_key(database):
+    built = []
+    _save(60)
+    data = analytics.user_overview(1)['score_trend']
+    for height in (300, 300, 400):
+        analytics.cached_chart_spec('score_trend', data, {'height': height}, lambda: built.append(height) or {})
+    assert built == [300, 400]
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+
+from resume_core import backup, config, history
+
+def _save(user_id=1):
+    return history.save_feedback_to_db(user_id, 'resume.pdf', 'Data Scientist', "Solid resume.", 70, "")
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    count = conn.execute("SELECT COUNT(*) FROM feedback_history").fetchone()[0]
+    conn.close()
+    return count
+
+def _backup_path(prefix, stamp):
+    return os.path.join(config.BACKUP_CONFIG['dir'], f"{prefix}-{stamp}.db")
+
+def test_backups_are_consistent_copies_rotated_to_keep(database, monkeypatch):
+    monkeypatch.setitem(config.BACKUP_CONFIG, 'keep', 3)
+    _save()
+    for second in range(5):
+        backup.backup_database(_backup_path('resume_bot', f"20250101-00000{second}"))
+    assert [os.path.basename(path) for path in backup.list_backups()] == [
+        'resume_bot-20250101-000004.db', 'resume_bot-20250101-000003.db', 'resume_bot-20250101-000002.db']
+    assert _count(backup.list_backups()[0]) == 1
+
+def test_restore_keeps_a_safety_copy_that_is_rotated_too(database, monkeypatch):
+    monkeypatch.setitem(config.BACKUP_CONFIG, 'keep', 2)
+    _save()
+    saved = backup.backup_database(_backup_path('resume_bot', "20250101-000000"))
+    _save()
+
+    safety_path = backup.restore_database(saved)
+    assert _count(config.DB_PATH) == 1
+    assert os.path.basename(safety_path).startswith('pre-restore-')
+    assert _count(safety_path) == 2
+    assert backup.list_backups() == [safety_path, saved]
+
+    # Later backups push the safety copy out like any other backup
+    backup.backup_database(_backup_path('resume_bot', "29990101-000000"))
+    backup.backup_database(_backup_path('resume_bot', "29990101-000001"))
+    assert not os.path.exists(safety_path)
+    assert len(backup.list_backups()) == 2
+
+def test_snapshot_is_read_as_is_and_refreshed_only_on_request(database):
+    _save()
+    assert backup.snapshot_time() is None
+    conn = backup.snapshot_connect()
+    assert conn.execute("SELECT COUNT(*) FROM feedback_history").fetchone()[0] == 1
+    conn.close()
+    taken_at = backup.snapshot_time()
+
+    _save()
+    conn = backup.snapshot_connect()
+    assert conn.execute("SELECT COUNT(*) FROM feedback_history").fetchone()[0] == 1
+    conn.close()
+    assert backup.snapshot_time() == taken_at
+
+    backup.refresh_snapshot(max_age=0)
+    conn = backup.snapshot_connect()
+    assert conn.execute("SELECT COUNT(*) FROM feedback_history").fetchone()[0] == 2
+    conn.close()
@@ -0,0 +1,71 @@
+from resume_core import compression, history
+from resume_core.db import connect
+
+FEEDBACK = """## Strengths
+- Clear summary of five years of Python and SQL work
+- Quantified impact in the most recent role
+
+## Areas for Improvement
+- Add metrics to the earlier roles
+- Move certifications above education
+"""
+
+def _stored(record_id):
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT feedback, rewritten_resume FROM feedback_history WHERE id = ?", (record_id,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+def _insert_plain(user_id, feedback, rewritten):
+    """A row as written before compression existed"""
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""INSERT INTO feedback_history (user_id, filename, target_role, feedback, score, rewritten_resume)
+                 VALUES (?, 'resume.pdf', 'Data Scientist', ?, 70, ?)""", (user_id, feedback, rewritten))
+    record_id = c.lastrowid
+    conn.commit()
+    conn.close()
+    return record_id
+
+def test_dictionary_keeps_lines_shared_by_samples():
+    dictionary = compression.train_compression_dictionary([FEEDBACK, FEEDBACK + "- One more point here\n",
+                                                           "unrelated text"])
+    assert b"- Add metrics to the earlier roles\n" in dictionary
+    assert b"One more point" not in dictionary
+
+def test_short_values_are_stored_as_text(database):
+    record_id = history.save_feedback_to_db(1, 'resume.pdf', 'Data Scientist', "Short.", 70, "")
+    assert _stored(record_id) == ("Short.", "")
+    assert history.get_feedback_record(record_id, 1)['feedback'] == "Short."
+
+def test_saved_feedback_round_trips(database):
+    record_id = history.save_feedback_to_db(1, 'resume.pdf', 'Data Scientist', FEEDBACK, 70, FEEDBACK * 2)
+    feedback, rewritten = _stored(record_id)
+    assert isinstance(feedback, bytes) and feedback.startswith(compression.COMPRESSION_MAGIC)
+    record = history.get_feedback_record(record_id, 1)
+    assert record['feedback'] == FEEDBACK
+    assert record['rewritten_resume'] == FEEDBACK * 2
+
+def test_migration_compresses_old_rows_with_a_trained_dictionary(database):
+    plain_ids = [_insert_plain(1, FEEDBACK + f"- Point {i} for this resume\n", "") for i in range(3)]
+    # Saved before the migration, compressed without a dictionary
+    early_id = history.save_feedback_to_db(1, 'resume.pdf', 'Data Scientist', FEEDBACK, 70, "")
+
+    stats = compression.compress_feedback_history()
+    assert stats['rows'] == 4
+    assert stats['bytes_after'] < stats['bytes_before']
+
+    for i, record_id in enumerate(plain_ids):
+        feedback, _ = _stored(record_id)
+        assert feedback.startswith(compression.COMPRESSION_MAGIC)
+        assert int.from_bytes(feedback[4:6], 'big') == 1
+        assert history.get_feedback_record(record_id, 1)['feedback'] == FEEDBACK + f"- Point {i} for this resume\n"
+    assert history.get_feedback_record(early_id, 1)['feedback'] == FEEDBACK
+
+    # New rows use the dictionary, and a fresh process can still read them
+    record_id = history.save_feedback_to_db(1, 'resume.pdf', 'Data Scientist', FEEDBACK, 70, "")
+    assert int.from_bytes(_stored(record_id)[0][4:6], 'big') == 1
+    compression.reset_compression_cache()
+    assert history.get_feedback_record(record_id, 1)['feedback'] == FEEDBACK
@@ -0,0 +1,54 @@
+import io
+import os
+import zipfile
+
+from resume_core import documents, history
+from resume_core.db import connect
+from resume_core.extraction import DOCX_MIME
+
+def make_docx(text):
+    """A minimal DOCX with one paragraph per line"""
+    body = ''.join(f'<w:p><w:r><w:t>{line}</w:t></w:r></w:p>' for line in text.split('\n'))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', '<?xml version="1.0"?>'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        archive.writestr('word/document.xml', '<?xml version="1.0"?><w:document xmlns:w='
+                         '"http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                         f'<w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+def _document_count():
+    conn = connect()
+    count = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    conn.close()
+    return count
+
+def test_same_file_is_stored_once(database):
+    file_bytes = make_docx("Jane Doe\nExperience\nBuilt churn models in Python")
+    first = documents.store_document(file_bytes, 'jane.docx', DOCX_MIME)
+    second = documents.store_document(file_bytes, 'renamed.docx', DOCX_MIME)
+    assert first['is_new'] and not second['is_new']
+    assert second['id'] == first['id']
+    assert "Built churn models in Python" in second['text']
+    assert _document_count() == 1
+
+    stored = documents.get_document(first['id'])
+    assert stored['filename'] == 'jane.docx'
+    assert stored['text'] == first['text']
+    with open(stored['blob_path'], 'rb') as f:
+        assert f.read() == file_bytes
+
+def test_deleting_history_keeps_documents_other_analyses_use(database):
+    shared = documents.store_document(make_docx("Shared resume\nPython"), 'shared.docx', DOCX_MIME)
+    own = documents.store_document(make_docx("Own resume\nSQL"), 'own.docx', DOCX_MIME)
+    history.save_feedback_to_db(1, 'shared.docx', 'Data Scientist', "ok", 70, "", document_id=shared['id'])
+    history.save_feedback_to_db(1, 'own.docx', 'Data Scientist', "ok", 70, "", document_id=own['id'])
+    history.save_feedback_to_db(2, 'shared.docx', 'Data Analyst', "ok", 65, "", document_id=shared['id'])
+    own_blob = documents.get_document(own['id'])['blob_path']
+
+    assert history.delete_user_history(1) == 2
+    assert documents.get_document(own['id']) is None
+    assert not os.path.exists(own_blob)
+    assert documents.get_document(shared['id'])['text'] == shared['text']
+    assert history.get_user_history(2)[0][0] == 'shared.docx'
@@ -0,0 +1,101 @@
+import io
+import zipfile
+import zlib
+
+import pytest
+
+from resume_core import config, extraction
+from resume_core.errors import UploadRejected
+from resume_core.extraction import DOCX_MIME, PDF_MIME, extract_resume_text
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+def make_docx(paragraphs, header=None):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('word/document.xml', f'<w:document {W}><w:body>{body}</w:body></w:document>')
+        if header:
+            archive.writestr('word/header1.xml', f'<w:hdr {W}><w:p><w:r><w:t>{header}</w:t></w:r></w:p></w:hdr>')
+    buffer.seek(0)
+    return buffer
+
+def make_pdf(*streams):
+    """PDF bytes with one object per (dictionary, data) stream; only the streams matter to the pre-scan"""
+    parts = [b'%PDF-1.7\n']
+    for number, (dictionary, data) in enumerate(streams, start=1):
+        parts.append(b'%d 0 obj\n<< %s /Length %d >>\nstream\n' % (number, dictionary, len(data)))
+        parts.append(data + b'\nendstream\nendobj\n')
+    parts.append(b'trailer\n<< /Size %d >>\n%%%%EOF\n' % (len(streams) + 1))
+    return io.BytesIO(b''.join(parts))
+
+@pytest.fixture
+def small_limits(monkeypatch):
+    monkeypatch.setitem(config.UPLOAD_LIMITS, 'max_inflated_bytes', 4 * 1024 * 1024)
+
+@pytest.fixture
+def no_pdf_reader(monkeypatch):
+    """Fail the test if a rejected PDF ever reaches PyPDF2"""
+    import PyPDF2
+
+    def reader(*args, **kwargs):
+        raise AssertionError("PdfReader was built")
+    monkeypatch.setattr(PyPDF2, 'PdfReader', reader)
+
+def test_docx_text_includes_headers_and_paragraphs():
+    text = extract_resume_text(make_docx(["Jane Doe", "Experience"], header="Confidential"), DOCX_MIME)
+    assert text == "Confidential\n\nJane Doe\n\nExperience"
+
+def test_docx_extraction_stops_at_the_text_limit(monkeypatch):
+    monkeypatch.setitem(config.UPLOAD_LIMITS, 'max_text_chars', 100)
+    parsed = []
+    iterparse = extraction.ElementTree.iterparse
+
+    def counting_iterparse(source):
+        for event in iterparse(source):
+            parsed.append(event)
+            yield event
+    monkeypatch.setattr(extraction.ElementTree, 'iterparse', counting_iterparse)
+
+    text = extract_resume_text(make_docx([f"Line {i} of a long resume" for i in range(5000)]), DOCX_MIME)
+    assert len(text) <= 100
+    assert len(parsed) < 100
+
+def test_docx_zip_bomb_is_rejected(small_limits):
+    padding = ' ' * (8 * 1024 * 1024)
+    bomb = make_docx([padding])
+    with pytest.raises(UploadRejected):
+        extract_resume_text(bomb, DOCX_MIME)
+
+def test_pdf_flate_bomb_in_a_content_stream_is_rejected(small_limits, no_pdf_reader):
+    bomb = zlib.compress(b'0' * (8 * 1024 * 1024), 9)
+    with pytest.raises(UploadRejected):
+        extract_resume_text(make_pdf((b'/Filter /FlateDecode', bomb)), PDF_MIME)
+
+@pytest.mark.parametrize('stream_type', [b'/ObjStm /N 1 /First 4', b'/XRef /W [1 2 1]'])
+def test_pdf_object_and_xref_stream_bombs_are_rejected_before_parsing(small_limits, no_pdf_reader, stream_type):
+    bomb = zlib.compress(b'0' * (8 * 1024 * 1024), 9)
+    with pytest.raises(UploadRejected):
+        extract_resume_text(make_pdf((b'/Type ' + stream_type + b' /Filter [/FlateDecode]', bomb)), PDF_MIME)
+
+def test_pdf_chained_decompression_filters_are_rejected(no_pdf_reader):
+    data = zlib.compress(zlib.compress(b'BT (Jane Doe) Tj ET'))
+    with pytest.raises(UploadRejected):
+        extract_resume_text(make_pdf((b'/Filter [/FlateDecode /FlateDecode]', data)), PDF_MIME)
+
+def test_pdf_many_streams_share_one_budget(small_limits, no_pdf_reader, monkeypatch):
+    monkeypatch.setitem(config.UPLOAD_LIMITS, 'max_compression_ratio', 10_000)
+    stream = (b'/Filter /FlateDecode', zlib.compress(b'0' * (1024 * 1024), 9))
+    with pytest.raises(UploadRejected):
+        extract_resume_text(make_pdf(*[stream] * 5), PDF_MIME)
+
+def test_ordinary_pdf_is_extracted():
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pageCompression=1)
+    pdf.drawString(72, 720, "Jane Doe, Data Scientist")
+    pdf.showPage()
+    pdf.save()
+    buffer.seek(0)
+    assert "Jane Doe, Data Scientist" in extract_resume_text(buffer, PDF_MIME)
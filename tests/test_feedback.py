@@ -0,0 +1,50 @@
+import pytest
+
+from resume_core import analysis, history
+
+RESPONSE = """Here is the analysis:
+{"strengths": ["Clear summary", "  "], "improvements": "Add metrics",
+ "recommendations": ["Lead with impact"], "missing_elements": [], "score": 104.6}
+"""
+
+class FakeBackend:
+    name = 'fake'
+
+    def __init__(self, response):
+        self.response = response
+
+    def complete(self, messages, task, context=None, json_mode=False):
+        return self.response
+
+def test_parse_feedback_json_normalizes_sections_and_score():
+    structured = analysis.parse_feedback_json(RESPONSE)
+    assert structured == {'strengths': ["Clear summary"], 'improvements': ["Add metrics"],
+                          'recommendations': ["Lead with impact"], 'missing_elements': [], 'score': 100}
+
+@pytest.mark.parametrize('raw', ["no json here", '["a list"]', '{"strengths": 3, "score": 50}', '{"strengths": []}'])
+def test_parse_feedback_json_rejects_invalid_responses(raw):
+    with pytest.raises(ValueError):
+        analysis.parse_feedback_json(raw)
+
+def test_structured_feedback_is_stored_and_read_back(database, monkeypatch):
+    monkeypatch.setattr(analysis, 'get_llm_backend', lambda prompt_tokens=0: FakeBackend(RESPONSE))
+    structured = analysis.get_structured_feedback("Jane Doe\nData scientist with Python", "Data Scientist")
+    assert structured['backend'] == 'fake' and structured['score'] == 100
+
+    markdown = analysis.render_feedback_markdown(structured, "Data Scientist")
+    record_id = history.save_feedback_to_db(1, 'jane.pdf', 'Data Scientist', markdown, structured['score'], "",
+                                            structured=structured)
+    record = history.get_feedback_record(record_id, 1)
+    assert record['structured'] == structured
+    assert record['feedback'] == markdown
+    assert "• Lead with impact" in record['feedback']
+
+def test_failed_feedback_is_stored_with_its_error(database, monkeypatch):
+    monkeypatch.setattr(analysis, 'get_llm_backend', lambda prompt_tokens=0: FakeBackend("not json"))
+    structured = analysis.get_structured_feedback("Jane Doe", "Data Scientist")
+    assert structured['score'] == 0 and structured['error']
+
+    record_id = history.save_feedback_to_db(1, 'jane.pdf', 'Data Scientist', "Error generating feedback", 0, "",
+                                            structured=structured)
+    assert history.get_feedback_record(record_id, 1)['structured']['error'] == structured['error']
+    assert history.get_previous_analysis(1, 'jane.pdf', 'Data Scientist') is None
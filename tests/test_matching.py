@@ -0,0 +1,90 @@
+import hashlib
+import math
+
+import pytest
+
+from resume_core import config, documents, history, matching, retention
+from resume_core.db import connect
+from resume_core.parsing import parse_resume
+
+RESUMES = [
+    "Jane Doe\nSkills: Python, SQL, machine learning\nBuilt churn models in Python and pandas",
+    "John Roe\nSkills: Java, Spring, SQL\nMaintained payment services in Java",
+    "Ann Poe\nSkills: Tableau, Excel, SQL\nBuilt sales dashboards in Tableau",
+    "Max Moe\nSkills: Python, Docker, Kubernetes\nAutomated deployments with Docker",
+]
+JOB = "Data Scientist\nSkills: Python, SQL, machine learning, pandas\nBuild churn and forecasting models"
+
+def _store(text):
+    file_bytes = text.encode()
+    content_hash = hashlib.sha256(file_bytes).hexdigest()
+    ids = documents.save_extracted_documents([{'content_hash': content_hash, 'filename': f'{text.split()[0]}.pdf',
+                                               'mime_type': 'application/pdf', 'file_bytes': file_bytes,
+                                               'text': text}])
+    return ids[content_hash]
+
+def _age(table, row_id, days=200):
+    conn = connect()
+    conn.execute(f"UPDATE {table} SET created_at = datetime('now', ?) WHERE id = ?", (f"-{days} days", row_id))
+    conn.commit()
+    conn.close()
+
+def _brute_force(texts, job_text):
+    """Scores by rescanning every text, the way matching worked before the index"""
+    settings = config.MATCHING_CONFIG
+    doc_terms = {document_id: matching.extract_terms(text, parse_resume(text)) for document_id, text in texts.items()}
+    terms = matching.extract_terms(job_text, parse_resume(job_text))
+    query = sorted(terms.items(), key=lambda item: (-item[1], item[0]))[:settings['max_query_terms']]
+    n = len(texts)
+    scores = {}
+    for term, weight in query:
+        holders = [document_id for document_id, weights in doc_terms.items() if term in weights]
+        idf = math.log((1 + n) / (1 + len(holders))) + 1
+        for document_id in holders:
+            scores[document_id] = scores.get(document_id, 0) + weight * idf * doc_terms[document_id][term]
+    return scores
+
+def test_index_agrees_with_a_rescan(database):
+    texts = {_store(text): text for text in RESUMES}
+    expected = _brute_force(texts, JOB)
+
+    matches = matching.match_resumes(JOB, top_k=len(RESUMES))
+    assert [match['document_id'] for match in matches] == sorted(expected, key=lambda i: (-expected[i], i))
+    for match in matches:
+        assert match['score'] == pytest.approx(expected[match['document_id']])
+    assert {'python', 'sql'} <= set(matches[0]['matched_skills'])
+
+def test_deleted_and_stripped_documents_leave_the_index(database):
+    deleted, stripped, kept = (_store(text) for text in RESUMES[:3])
+    history.save_feedback_to_db(1, 'a.pdf', 'Data Scientist', "ok", 70, "", document_id=deleted)
+    old_id = history.save_feedback_to_db(2, 'b.pdf', 'Data Scientist', "ok", 70, "", document_id=stripped)
+    history.save_feedback_to_db(3, 'c.pdf', 'Data Scientist', "ok", 70, "", document_id=kept)
+
+    history.delete_user_history(1)
+    _age('feedback_history', old_id)
+    _age('documents', stripped)
+    retention.archive_old_feedback(days=180)
+    retention.purge_old_documents(days=180)
+
+    conn = connect()
+    indexed = {row[0] for row in conn.execute("SELECT DISTINCT document_id FROM document_terms")}
+    conn.close()
+    assert indexed == {kept}
+    assert [match['document_id'] for match in matching.match_resumes("SQL Python Java Tableau")] == [kept]
+
+def test_matching_leaves_the_backfill_to_the_scheduler(database):
+    document_id = _store(RESUMES[0])
+    conn = connect()
+    conn.execute("DELETE FROM document_terms")
+    conn.execute("UPDATE documents SET index_version = NULL")
+    conn.commit()
+    plan = ' '.join(row[-1] for row in conn.execute(
+        """EXPLAIN QUERY PLAN SELECT id FROM documents
+           WHERE extracted_text IS NOT NULL AND COALESCE(index_version, 0) < 1"""))
+    conn.close()
+    assert 'idx_documents_index_version' in plan
+
+    assert matching.match_resumes(JOB) == []
+    assert matching.update_document_index() == 1
+    assert [match['document_id'] for match in matching.match_resumes(JOB)] == [document_id]
+    assert matching.update_document_index() == 0
@@ -0,0 +1,73 @@
+import json
+
+from resume_core import documents
+from resume_core.parsing import ParsedResume, parse_resume
+
+RESUME = """Jane Doe
+jane.doe@example.com | +1 (555) 123-4567 | linkedin.com/in/janedoe
+
+## Professional Summary
+Data scientist with five years of Python.
+Focused on churn and pricing models.
+
+Work Experience
+**Senior Data Scientist, Acme Corp**
+Jan 2021 - Present
+• Built a churn model that cut attrition by 12%
+• Led a team of 4
+
+Data Analyst, Beta Inc, 2018 - 2020
+- Automated weekly reporting
+
+Education
+BSc Computer Science, State University, 2018
+
+Technical Skills
+Languages: Python, SQL, R
+Tools: pandas; scikit-learn | python
+"""
+
+def test_contact_details_come_from_the_header():
+    contact = parse_resume(RESUME).contact
+    assert contact.name == "Jane Doe"
+    assert contact.email == "jane.doe@example.com"
+    assert contact.phone == "+1 (555) 123-4567"
+    assert contact.links == ["linkedin.com/in/janedoe"]
+
+def test_sections_summary_and_skills():
+    parsed = parse_resume(RESUME)
+    assert parsed.section_names == ['summary', 'experience', 'education', 'skills']
+    assert parsed.summary == "Data scientist with five years of Python. Focused on churn and pricing models."
+    # Labels are dropped and repeats (in any case) kept once
+    assert parsed.skills == ['Python', 'SQL', 'R', 'pandas', 'scikit-learn']
+
+def test_experience_and_education_entries():
+    parsed = parse_resume(RESUME)
+    first, second = parsed.experience
+    assert first.heading == "Senior Data Scientist, Acme Corp | Jan 2021 - Present"
+    assert (first.start, first.end) == ("Jan 2021", "Present")
+    assert first.bullets == ["Built a churn model that cut attrition by 12%", "Led a team of 4"]
+    assert (second.start, second.end, second.bullets) == ("2018", "2020", ["Automated weekly reporting"])
+    assert [(e.heading, e.end) for e in parsed.education] == [("BSc Computer Science, State University, 2018", "2018")]
+
+def test_lines_are_tagged_by_kind():
+    experience = next(s for s in parse_resume(RESUME).sections if s.name == 'experience')
+    assert experience.heading == "Work Experience"
+    assert [kind for kind, _ in experience.lines] == ['subheading', 'text', 'bullet', 'bullet', 'blank',
+                                                      'text', 'bullet', 'blank']
+
+def test_a_date_range_is_not_a_phone_number():
+    assert parse_resume("Jane Doe\nAcme Corp 2019 - 2021").contact.phone is None
+
+def test_parse_round_trips_through_json():
+    parsed = parse_resume(RESUME)
+    restored = ParsedResume.from_dict(json.loads(json.dumps(parsed.to_dict())))
+    assert restored.to_dict() == parsed.to_dict()
+    assert restored.sections[1].lines == parsed.sections[1].lines
+
+def test_stored_documents_keep_their_parse(database):
+    ids = documents.save_extracted_documents([{'content_hash': 'a' * 64, 'filename': 'jane.pdf',
+                                               'mime_type': 'application/pdf', 'file_bytes': b'%PDF',
+                                               'text': RESUME}])
+    stored = documents.get_document(ids['a' * 64])['parsed']
+    assert stored.to_dict() == parse_resume(RESUME).to_dict()
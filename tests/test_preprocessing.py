@@ -0,0 +1,53 @@
+import pytest
+
+from resume_core.preprocessing import PAGE_BREAK, compact_resume_text, is_page_number, strip_page_furniture
+
+PAGES = [
+    """Jane Doe - Data Scientist
+jane@example.com
+Experience
+Acme Corp, 2019 - 2022
+• Managed a team of 5 engineers
+• Shipped the churn model to production
+1 of 2""",
+    """Jane Doe - Data Scientist
+Beta Inc, 2016 - 2019
+• Managed a team of 5 engineers
+• Shipped the churn model to production
+Certifications
+2019
+Page 2 of 2""",
+]
+
+@pytest.mark.parametrize('line, page_count, expected', [
+    ("Page 2", 3, True),
+    ("page 2 of 3", 3, True),
+    ("2 of 3", 3, True),
+    ("- 2 -", 3, True),
+    ("2", 3, True),
+    ("2/3", 3, True),
+    ("2019", 3, False),
+    ("12", 3, False),
+    ("03/2019", 3, False),
+    ("4 of 3", 3, False),
+    ("5 engineers", 3, False),
+])
+def test_is_page_number(line, page_count, expected):
+    assert is_page_number(line, page_count) is expected
+
+def test_page_furniture_is_stripped_and_repeated_body_lines_kept():
+    pages, removed = strip_page_furniture(PAGES)
+    text = '\n'.join(pages)
+    assert text.count("Jane Doe - Data Scientist") == 1
+    assert "1 of 2" not in text and "Page 2 of 2" not in text
+    assert removed == 3
+    assert text.count("• Managed a team of 5 engineers") == 2
+    assert text.count("• Shipped the churn model to production") == 2
+    assert "2019" in text.split("\n")
+
+def test_compaction_keeps_repeated_bullets():
+    compacted, report = compact_resume_text(PAGE_BREAK.join(PAGES))
+    assert compacted.count("• Managed a team of 5 engineers") == 2
+    assert "2019" in compacted.split("\n")
+    assert report['furniture_lines_removed'] == 3
+    assert report['tokens_saved'] > 0
@@ -0,0 +1,76 @@
+import hashlib
+import os
+
+from resume_core import documents, history, retention
+from resume_core.db import connect
+
+FEEDBACK = "**Resume Analysis**\n" + "• Quantify the impact of each role\n" * 50
+
+def _age(table, row_id, days=200):
+    conn = connect()
+    conn.execute(f"UPDATE {table} SET created_at = datetime('now', ?) WHERE id = ?", (f"-{days} days", row_id))
+    conn.commit()
+    conn.close()
+
+def _store(text):
+    file_bytes = text.encode()
+    content_hash = hashlib.sha256(file_bytes).hexdigest()
+    ids = documents.save_extracted_documents([{'content_hash': content_hash, 'filename': 'resume.pdf',
+                                               'mime_type': 'application/pdf', 'file_bytes': file_bytes,
+                                               'text': text}])
+    return ids[content_hash]
+
+def _save(user_id, document_id=None):
+    return history.save_feedback_to_db(user_id, 'resume.pdf', 'Data Scientist', FEEDBACK, 72, "Rewritten resume",
+                                       document_id=document_id, structured={'score': 72, 'strengths': ['clear']})
+
+def test_old_analyses_are_archived_and_keep_their_summary(database):
+    old_id, new_id = _save(1), _save(1)
+    _age('feedback_history', old_id)
+
+    result = retention.archive_old_feedback(days=180)
+    assert result['rows'] == 1
+    archived = retention.read_archive(result['path'])
+    assert [row['id'] for row in archived] == [old_id]
+    assert archived[0]['feedback'] == FEEDBACK
+    assert archived[0]['structured'] == {'score': 72, 'strengths': ['clear']}
+
+    record = history.get_feedback_record(old_id, 1)
+    assert record['archived_at'] is not None
+    assert record['feedback'] is None and record['rewritten_resume'] is None and record['structured'] is None
+    assert (record['score'], record['target_role'], record['filename']) == (72, 'Data Scientist', 'resume.pdf')
+    assert history.get_feedback_record(new_id, 1)['feedback'] == FEEDBACK
+
+    # Already archived rows are not archived again
+    assert retention.archive_old_feedback(days=180) == {'rows': 0, 'path': None}
+
+def test_purge_strips_documents_only_archived_analyses_use(database):
+    archived_doc, live_doc = _store("Archived resume text"), _store("Live resume text")
+    old_id = _save(1, archived_doc)
+    _save(2, live_doc)
+    _age('feedback_history', old_id)
+    _age('documents', archived_doc)
+    _age('documents', live_doc)
+    archived_blob = documents.get_document(archived_doc)['blob_path']
+
+    retention.archive_old_feedback(days=180)
+    assert retention.purge_old_documents(days=180) == 1
+
+    stripped = documents.get_document(archived_doc)
+    assert stripped['text'] is None and stripped['parsed'] is None
+    assert not os.path.exists(archived_blob)
+    assert documents.get_document(live_doc)['text'] == "Live resume text"
+    # The archived analysis still points at its (stripped) document
+    assert history.get_feedback_record(old_id, 1)['document_id'] == archived_doc
+    assert retention.purge_old_documents(days=180) == 0
+
+def test_incremental_vacuum_returns_archived_pages(database):
+    # New databases are created with auto_vacuum=INCREMENTAL
+    assert not retention.enable_incremental_vacuum()
+    # Random text compresses poorly, so the archived rows held whole pages
+    record_ids = [history.save_feedback_to_db(1, 'resume.pdf', 'Data Scientist', os.urandom(4000).hex(), 72, "")
+                  for _ in range(50)]
+    for record_id in record_ids:
+        _age('feedback_history', record_id)
+    retention.archive_old_feedback(days=180)
+    assert retention.incremental_vacuum() > 0
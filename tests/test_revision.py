@@ -0,0 +1,148 @@
+import hashlib
+
+import pytest
+
+from resume_core import analysis, config, documents, history
+from resume_core.parsing import parse_resume
+
+EXPERIENCE = '\n'.join(f"• Built production model {i} for customer analytics with Python and SQL at scale"
+                       for i in range(40))
+RESUME = f"""Jane Doe
+jane@example.com
+
+Summary
+Data scientist with five years of Python.
+
+Experience
+{EXPERIENCE}
+
+Education
+BSc Computer Science
+
+Skills
+Python, SQL, pandas
+
+Projects
+• Churn model
+"""
+
+class FakeBackend:
+    name = 'fake'
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def complete(self, messages, task, context=None, json_mode=False):
+        self.calls.append((task, messages))
+        if self.fail:
+            raise RuntimeError("backend down")
+        return '{"strengths": ["updated"], "improvements": [], "recommendations": [], ' \
+               '"missing_elements": [], "score": 77}'
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = FakeBackend()
+    monkeypatch.setattr(analysis, 'get_llm_backend', lambda prompt_tokens=0: fake)
+    return fake
+
+def _previous(text=RESUME):
+    parsed = parse_resume(text)
+    structured = {'strengths': ['clear summary'], 'improvements': ['add metrics'], 'recommendations': [],
+                  'missing_elements': [], 'score': 70, 'backend': 'fake'}
+    return {'record_id': 1, 'document_id': 1, 'structured': structured}, parsed
+
+def test_fingerprints_change_only_for_edited_sections():
+    old = analysis.section_fingerprints(parse_resume(RESUME))
+    new = analysis.section_fingerprints(parse_resume(RESUME.replace("Churn model", "Churn model, 0.91 AUC")))
+    assert old.keys() == new.keys()
+    assert [key for key in new if new[key][0] != old[key][0]] == ['projects']
+
+def test_unchanged_resume_reuses_feedback_without_a_call(backend):
+    previous, parsed = _previous()
+    structured = analysis.get_revision_feedback(RESUME, "Data Scientist", parse_resume(RESUME), previous, parsed)
+    assert structured['revision']['mode'] == 'reused'
+    assert structured['score'] == 70 and structured['strengths'] == ['clear summary']
+    assert backend.calls == []
+
+def test_changed_section_is_sent_alone_with_the_earlier_feedback(backend):
+    previous, parsed = _previous()
+    revised = RESUME.replace("Churn model", "Churn model with XGBoost, 0.91 AUC")
+    structured = analysis.get_revision_feedback(revised, "Data Scientist", parse_resume(revised), previous, parsed)
+    assert structured['revision']['mode'] == 'incremental'
+    assert structured['revision']['changed_sections'] == ['projects']
+    assert structured['score'] == 77
+    (task, messages), = backend.calls
+    prompt = messages[0]['content']
+    assert task == 'revision' and 'XGBoost' in prompt and 'add metrics' in prompt
+    assert 'production model 12' not in prompt
+    assert structured['revision']['prompt'] == prompt
+
+    report = structured['token_report']
+    assert report['tokens_after'] == analysis.estimate_tokens(prompt)
+    assert report['tokens_saved'] == report['tokens_before'] - report['tokens_after'] > 0
+
+def test_rewrite_conversation_reuses_the_sent_prompt(backend):
+    previous, parsed = _previous()
+    revised = RESUME.replace("Churn model", "Churn model with XGBoost, 0.91 AUC")
+    structured = analysis.get_revision_feedback(revised, "Data Scientist", parse_resume(revised), previous, parsed)
+    conversation = analysis.build_analysis_conversation(revised, "Data Scientist", structured)
+    assert conversation[0]['content'] == structured['revision']['prompt']
+    assert [message['role'] for message in conversation] == ['user', 'assistant', 'user']
+    assert 'production model 12' in conversation[2]['content']
+
+    analysis.rewrite_resume(revised, "Data Scientist", "", conversation)
+    task, messages = backend.calls[-1]
+    assert task == 'rewrite' and messages[:2] == conversation[:2]
+    assert [message['role'] for message in messages] == ['user', 'assistant', 'user']
+
+def test_mostly_changed_resume_is_analyzed_in_full(backend, monkeypatch):
+    monkeypatch.setitem(config.REVISION_CONFIG, 'max_changed_fraction', 0.1)
+    previous, parsed = _previous()
+    revised = RESUME.replace("Churn model", "Churn model v2").replace("five years", "six years")
+    structured = analysis.get_revision_feedback(revised, "Data Scientist", parse_resume(revised), previous, parsed)
+    assert structured['revision']['mode'] == 'full'
+    assert [task for task, _ in backend.calls] == ['feedback']
+
+def test_failed_revision_falls_back_to_a_full_analysis(monkeypatch):
+    calls = []
+
+    def backend(prompt_tokens=0):
+        fake = FakeBackend(fail=not calls)
+        calls.append(fake)
+        return fake
+
+    monkeypatch.setattr(analysis, 'get_llm_backend', backend)
+    previous, parsed = _previous()
+    revised = RESUME.replace("Churn model", "Churn model with XGBoost")
+    structured = analysis.get_revision_feedback(revised, "Data Scientist", parse_resume(revised), previous, parsed)
+    assert structured['revision']['mode'] == 'full' and structured['score'] == 77
+    assert [fake.calls[0][0] for fake in calls] == ['revision', 'feedback']
+
+def _store(text):
+    content_hash = hashlib.sha256(text.encode()).hexdigest()
+    ids = documents.save_extracted_documents([{'content_hash': content_hash, 'filename': 'jane.pdf',
+                                               'mime_type': 'application/pdf', 'file_bytes': text.encode(),
+                                               'text': text}])
+    return documents.get_document(ids[content_hash])
+
+def test_upload_of_a_revised_file_is_analyzed_against_the_stored_analysis(database, backend):
+    first = _store(RESUME)
+    structured = analysis.analyze_upload(1, 'jane.pdf', first, "Data Scientist")
+    assert 'revision' not in structured
+    history.save_feedback_to_db(1, 'jane.pdf', "Data Scientist", "feedback", structured['score'], "",
+                                document_id=first['id'], structured=structured)
+
+    revised = _store(RESUME.replace("Churn model", "Churn model with XGBoost, 0.91 AUC"))
+    assert analysis.analyze_upload(1, 'jane.pdf', revised, "Data Scientist")['revision']['mode'] == 'incremental'
+    assert analysis.analyze_upload(1, 'jane.pdf', first, "Data Scientist")['revision']['mode'] == 'reused'
+    # Another user, file name or role has no earlier analysis to build on
+    assert 'revision' not in analysis.analyze_upload(2, 'jane.pdf', revised, "Data Scientist")
+    assert 'revision' not in analysis.analyze_upload(1, 'jane-v2.pdf', revised, "Data Scientist")
+    assert 'revision' not in analysis.analyze_upload(1, 'jane.pdf', revised, "ML Engineer")
+
+def test_failed_earlier_analysis_is_not_reused(database, backend):
+    first = _store(RESUME)
+    history.save_feedback_to_db(1, 'jane.pdf', "Data Scientist", "Error generating feedback", 0, "",
+                                document_id=first['id'], structured={'score': 0, 'error': 'backend down'})
+    assert 'revision' not in analysis.analyze_upload(1, 'jane.pdf', first, "Data Scientist")
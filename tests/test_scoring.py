@@ -0,0 +1,61 @@
+from resume_core.parsing import parse_resume
+from resume_core.scoring import prescreen_resumes, resolve_role, role_skills, score_resume
+
+STRONG = """Jane Doe
+jane@example.com | +1 555 123 4567 | linkedin.com/in/janedoe
+
+Summary
+Data scientist building machine learning models for retail forecasting.
+
+Experience
+• Built a demand forecasting model in Python and pandas that cut stockouts by 18%
+• Led A/B testing of pricing changes across 40 stores, lifting margin by 3%
+• Designed feature engineering pipelines in Spark processing 2 TB per day
+• Deployed classification models with scikit-learn serving 1M predictions a day
+
+Education
+MSc Statistics, University of Somewhere
+
+Skills
+Python, SQL, pandas, numpy, scikit-learn, TensorFlow, statistics, data visualization, regression
+"""
+
+WEAK = """John Smith
+
+I like computers and want a job.
+"""
+
+def test_resolve_role_maps_aliases_and_titles():
+    assert resolve_role("Data Scientist") == 'data scientist'
+    assert resolve_role("Senior Data Scientist") == 'data scientist'
+    assert resolve_role("Engineer") is None
+
+def test_role_skills_falls_back_to_the_role_words():
+    assert 'python' in role_skills("Data Scientist")
+    assert role_skills("Underwater Basket Weaver") == {'underwater', 'basket', 'weaver'}
+
+def test_score_breakdown_sums_to_score():
+    result = score_resume(STRONG, "Data Scientist")
+    assert 0 <= result['score'] <= 100
+    assert result['score'] == int(round(sum(result['breakdown'].values())))
+    assert result['role_key'] == 'data scientist'
+
+def test_score_details():
+    result = score_resume(STRONG, "Data Scientist")
+    assert {'python', 'pandas', 'scikit-learn', 'statistics'} <= set(result['matched_skills'])
+    assert 'pytorch' in result['missing_skills']
+    assert result['contact'] == {'email': True, 'phone': True, 'linkedin': True}
+    assert result['quantified_lines'] == 2   # The two percentages; "2 TB per day" is not a metric
+    assert result['action_verb_lines'] >= 4
+    assert 'experience' in result['sections'] and 'education' in result['sections']
+
+def test_strong_resume_outscores_weak_one():
+    assert score_resume(STRONG, "Data Scientist")['score'] > score_resume(WEAK, "Data Scientist")['score'] + 30
+
+def test_reusing_a_parse_gives_the_same_score():
+    assert score_resume(STRONG, "Data Scientist", parse_resume(STRONG)) == score_resume(STRONG, "Data Scientist")
+
+def test_prescreen_ranks_best_first_and_flags_passes():
+    ranked = prescreen_resumes([('weak', WEAK), ('strong', STRONG)], "Data Scientist", min_score=50)
+    assert [resume_id for resume_id, _ in ranked] == ['strong', 'weak']
+    assert ranked[0][1]['passed'] and not ranked[1][1]['passed']
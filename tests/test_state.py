@@ -0,0 +1,87 @@
+import os
+import threading
+
+import pytest
+
+from resume_core import state
+from resume_core.state import MemoryRedis, RedisStateStore, SQLiteStateStore
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def store(request, database):
+    if request.param == 'sqlite':
+        return SQLiteStateStore()
+    return RedisStateStore(MemoryRedis())
+
+def test_set_get_delete(store):
+    assert store.get('session:1:abc') is None
+    store.set('session:1:abc', {'current_analysis': {'score': 80}})
+    assert store.get('session:1:abc') == {'current_analysis': {'score': 80}}
+    store.delete('session:1:abc')
+    assert store.get('session:1:abc') is None
+
+def test_values_expire(store, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(state.time, 'time', lambda: clock[0])
+    store.set('rewrite:1', "text", ttl=10)
+    clock[0] += 9
+    assert store.get('rewrite:1') == "text"
+    clock[0] += 2
+    assert store.get('rewrite:1') is None
+
+def test_update_is_atomic(store):
+    def add_one():
+        for _ in range(20):
+            store.update('counter', lambda value: (value or 0) + 1)
+
+    threads = [threading.Thread(target=add_one) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get('counter') == 100
+
+def test_memory_redis_matches_the_redis_client_commands():
+    client = MemoryRedis()
+    assert client.set('k', 'v', px=60_000) is True
+    assert client.get('k') == b'v'
+    assert client.delete('k', 'missing') == 1
+    assert client.get('k') is None
+    with client.lock('k-lock', timeout=1, blocking_timeout=1):
+        pass
+
+def test_lease_has_one_holder_at_a_time(database, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(state.time, 'time', lambda: clock[0])
+    assert state.claim_lease('backup-scheduler', 60)
+    monkeypatch.setattr(state, '_lease_owner', 'another-process')
+    assert not state.claim_lease('backup-scheduler', 60)
+    clock[0] += 61
+    assert state.claim_lease('backup-scheduler', 60)
+
+def test_app_session_keeps_no_login_under_the_url_sid(database, monkeypatch):
+    AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+    monkeypatch.setitem(state.config.STATE_STORE_CONFIG, 'backend', 'memory')
+    state.reset_state_store()
+    app_path = os.path.join(os.path.dirname(__file__), '..', 'app.py')
+
+    at = AppTest.from_file(app_path, default_timeout=60)
+    at.run()
+    at.text_input[0].input('admin')
+    at.text_input[1].input('admin123')
+    at.button[0].click().run()
+    user = at.session_state['user']
+    at.session_state['rewritten_resume'] = 'Jane Doe, Engineer'
+    at.run()
+    sid = at.query_params['sid']
+    sid = sid[0] if isinstance(sid, list) else sid
+
+    # The work is stored per user; nothing under the sid alone says who is logged in
+    store = state.get_state_store()
+    assert store.get(f"session:{user['id']}:{sid}") == {'rewritten_resume': 'Jane Doe, Engineer'}
+    assert all(f"session:{user['id']}:" in key for key in store.client._data if sid in key)
+
+    # Another browser opening the same link is not logged in
+    other = AppTest.from_file(app_path, default_timeout=60)
+    other.query_params['sid'] = sid
+    other.run()
+    assert not other.session_state['user']
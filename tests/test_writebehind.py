@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from resume_core import config, history
+from resume_core.writebehind import WriteBehindBuffer
+
+class Recorder:
+    """write_batch that records each batch, optionally blocking until released"""
+
+    def __init__(self, block=False):
+        self.batches = []
+        self.next_id = 1
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, records):
+        self.started.set()
+        self.release.wait(5)
+        self.batches.append(list(records))
+        ids = list(range(self.next_id, self.next_id + len(records)))
+        self.next_id += len(records)
+        return ids
+
+def test_close_writes_everything_queued():
+    write = Recorder()
+    buffer = WriteBehindBuffer(write, max_batch=100, interval=10.0)
+    futures = [buffer.submit(i) for i in range(5)]
+    buffer.close()
+    assert [future.result(0) for future in futures] == [1, 2, 3, 4, 5]
+    assert [record for batch in write.batches for record in batch] == [0, 1, 2, 3, 4]
+    with pytest.raises(RuntimeError):
+        buffer.submit(5)
+
+def test_records_queued_during_a_commit_form_the_next_batch_in_order():
+    write = Recorder(block=True)
+    buffer = WriteBehindBuffer(write, max_batch=100)
+    first = buffer.submit('a')
+    assert write.started.wait(5)
+    later = [buffer.submit(record) for record in 'bcd']
+    write.release.set()
+    buffer.flush(timeout=5)
+    assert write.batches == [['a'], ['b', 'c', 'd']]
+    assert first.result(0) == 1 and [future.result(0) for future in later] == [2, 3, 4]
+    buffer.close()
+
+def test_batches_are_capped_at_max_batch():
+    write = Recorder(block=True)
+    buffer = WriteBehindBuffer(write, max_batch=3)
+    buffer.submit(0)
+    assert write.started.wait(5)
+    for i in range(1, 8):
+        buffer.submit(i)
+    write.release.set()
+    buffer.close()
+    assert write.batches == [[0], [1, 2, 3], [4, 5, 6], [7]]
+
+def test_flush_waits_for_the_in_flight_batch():
+    write = Recorder(block=True)
+    buffer = WriteBehindBuffer(write)
+    future = buffer.submit('x')
+    assert write.started.wait(5)
+    threading.Timer(0.05, write.release.set).start()
+    started = time.monotonic()
+    buffer.flush(timeout=5)
+    assert future.done() and time.monotonic() - started >= 0.04
+    buffer.close()
+
+def test_a_bad_record_fails_alone():
+    def write_batch(records):
+        if 'bad' in records:
+            raise ValueError("bad record")
+        return [len(record) for record in records]
+
+    buffer = WriteBehindBuffer(write_batch, interval=0.05)
+    futures = [buffer.submit(record) for record in ('ok', 'bad', 'fine')]
+    buffer.close()
+    assert futures[0].result(0) == 2 and futures[2].result(0) == 4
+    with pytest.raises(ValueError):
+        futures[1].result(0)
+
+def test_saved_feedback_is_readable_right_after_saving(database, monkeypatch):
+    monkeypatch.setitem(config.WRITE_BEHIND_CONFIG, 'enabled', True)
+    record_ids = [history.save_feedback_to_db(7, f"resume{i}.pdf", "Data Scientist", "feedback", 60 + i, "")
+                  for i in range(3)]
+    assert len(set(record_ids)) == 3
+    rows = history.get_user_history(7)
+    assert sorted(row[4] for row in rows) == sorted(record_ids)
+    assert history.get_feedback_record(record_ids[0], 7)['score'] == 60